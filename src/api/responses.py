@@ -0,0 +1,220 @@
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, Tuple
+
+import anyio
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+# Расширение ASGI для передачи файла сервером без копирования через Python (sendfile)
+ZERO_COPY_EXTENSION = "http.response.zerocopysend"
+
+_RANGE_RE = re.compile(r"^\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*$")
+
+
+class RangeNotSatisfiableError(ValueError):
+    """Запрошенный диапазон байтов не пересекается с файлом."""
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Разбирает заголовок Range с одним диапазоном байтов.
+
+    Поддерживаются формы "bytes=A-B", "bytes=A-" и "bytes=-N". Несколько диапазонов
+    и некорректный заголовок игнорируются (отдается файл целиком, как разрешает RFC 9110).
+
+    :param header: Значение заголовка Range.
+    :param size: Размер файла в байтах.
+    :return: Диапазон (начало, конец включительно) или None, если заголовок игнорируется.
+    :raises RangeNotSatisfiableError: Если диапазон лежит за пределами файла.
+    """
+    match = _RANGE_RE.match(header)
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Последние N байтов файла
+        suffix_length = int(last)
+        if suffix_length == 0 or size == 0:
+            raise RangeNotSatisfiableError(header)
+        return max(size - suffix_length, 0), size - 1
+
+    start = int(first)
+    if start >= size:
+        raise RangeNotSatisfiableError(header)
+    end = int(last) if last else size - 1
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _http_date_not_after(value: Optional[str], mtime: float) -> bool:
+    """Проверяет, что HTTP-дата не раньше времени изменения файла (с точностью до секунды)."""
+    if not value:
+        return False
+    try:
+        return parsedate_to_datetime(value).timestamp() >= int(mtime)
+    except (TypeError, ValueError):
+        return False
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class RangeFileResponse(FileResponse):
+    """
+    Ответ с файлом, поддерживающий Range/If-Range, ETag и Last-Modified.
+
+    Если сервер поддерживает расширение ASGI "http.response.zerocopysend",
+    файл передается самим сервером (sendfile); иначе читается блоками.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        request: Request,
+        stat_result: os.stat_result,
+        etag: Optional[str] = None,
+        media_type: Optional[str] = None,
+        filename: Optional[str] = None,
+    ):
+        """
+        :param path: Путь к файлу.
+        :param request: Текущий запрос (заголовки условий и диапазона).
+        :param stat_result: Результат os.stat для файла.
+        :param etag: Сильный ETag (в кавычках); по умолчанию строится из mtime и размера.
+        :param media_type: MIME-тип файла.
+        :param filename: Имя файла для Content-Disposition.
+        """
+        size = stat_result.st_size
+        etag = etag or f'"{stat_result.st_mtime_ns:x}-{size:x}"'
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        super().__init__(
+            path,
+            headers={"accept-ranges": "bytes", "etag": etag, "last-modified": last_modified},
+            media_type=media_type,
+            filename=filename,
+            stat_result=stat_result,
+            method=request.method,
+        )
+        self.range: Optional[Tuple[int, int]] = None
+        self.size = size
+        headers = request.headers
+
+        # Условные запросы: у клиента уже актуальная версия файла
+        if_none_match = headers.get("if-none-match")
+        if _etag_matches(if_none_match, etag) or (
+            if_none_match is None and _http_date_not_after(headers.get("if-modified-since"), stat_result.st_mtime)
+        ):
+            self._headers_only(304)
+            del self.headers["content-length"]
+            return
+
+        range_header = headers.get("range")
+        if not range_header or request.method not in ("GET", "HEAD"):
+            return
+
+        # If-Range: диапазон отдается, только если файл не изменился
+        if_range = headers.get("if-range")
+        if if_range:
+            if if_range.startswith('"') or if_range.startswith("W/"):
+                if if_range != etag:
+                    return
+            elif if_range != last_modified:
+                return
+
+        try:
+            self.range = parse_range(range_header, size)
+        except RangeNotSatisfiableError:
+            self._headers_only(416)
+            self.headers["content-range"] = f"bytes */{size}"
+            self.headers["content-length"] = "0"
+            return
+
+        if self.range is not None:
+            start, end = self.range
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            self.headers["content-length"] = str(end - start + 1)
+
+    def _headers_only(self, status_code: int):
+        self.status_code = status_code
+        self.send_header_only = True
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        start, end = self.range or (0, self.size - 1)
+        count = end - start + 1
+        if self.send_header_only or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif ZERO_COPY_EXTENSION in scope.get("extensions", {}):
+            file = await anyio.to_thread.run_sync(open, self.path, "rb")
+            try:
+                await send({
+                    "type": ZERO_COPY_EXTENSION,
+                    "file": file,
+                    "offset": start,
+                    "count": count,
+                    "more_body": False,
+                })
+            finally:
+                await anyio.to_thread.run_sync(file.close)
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(start)
+                remaining = count
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+                if remaining > 0:
+                    # Файл укоротился во время отдачи — закрываем тело ответа
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        if self.background is not None:
+            await self.background()
+
+
+def accel_redirect_response(internal_uri: str, media_type: str, filename: str) -> Response:
+    """
+    Ответ, передающий отдачу файла обратному прокси (nginx X-Accel-Redirect).
+
+    Прокси сам обрабатывает Range и условные запросы и отдает файл через sendfile.
+
+    :param internal_uri: Внутренний адрес файла в конфигурации прокси.
+    :param media_type: MIME-тип файла.
+    :param filename: Имя файла для Content-Disposition.
+    """
+    return Response(
+        media_type=media_type,
+        headers={
+            "x-accel-redirect": internal_uri,
+            "content-disposition": f'attachment; filename="{filename}"',
+        },
+    )
+
+
+class RequestBodyStreamingResponse(StreamingResponse):
+    """
+    Потоковый ответ, генератор которого сам дочитывает тело запроса.
+
+    StreamingResponse параллельно ждет отключения клиента, читая сообщения
+    тела запроса, и отнимал бы их у генератора. Здесь ожидание отключено:
+    отключение клиента во время чтения тела и так завершит генератор
+    исключением ClientDisconnect из request.stream().
+    """
+
+    async def listen_for_disconnect(self, receive: Receive) -> None:
+        await anyio.sleep_forever()
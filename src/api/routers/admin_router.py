@@ -1,16 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.db.session import get_db
-from src.db.models.book_models import PaginatedBooksResponse, BookWithPrice, Book, BookCreateRequest, BookPrice, BookPriceCreateRequest, BookDB, BookContentDB
-from src.db.models.user_models import User, UserDB
+from src.db.session import get_db, get_pool_metrics
+from src.db.models.book_models import PaginatedBooksResponse, BookWithPrice, Book, BookCreateRequest, BookPrice, BookPriceCreateRequest, BookDB, BookContentDB, TotalMode, BulkPriceUpdateRequest, BulkHideRequest, BulkUpdateResponse
+from src.db.models.user_models import User, UserDB, CurrentUser
 from src.db.repositories.book_repo import BookRepository
 from src.services.book_service import BookService
+from src.services import storage_service
+from src.services.parse_pool import get_parse_pool_stats
+from src.services.storage_service import UploadTooLargeError
+from src.services import catalog_export
+from src.services.catalog_import import ImportFormat, detect_format
+from src.api.responses import RequestBodyStreamingResponse
 from src.db.repositories.content_repo import ContentRepository
-from src.core.security import get_current_admin_user
+from src.core.security import get_current_admin_user, get_token_cache_stats
 from src.core.config import settings
 import os
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -18,18 +25,65 @@ router = APIRouter(prefix="/admin", tags=["admin"])
 async def create_book(
     book: BookCreateRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: UserDB = Depends(get_current_admin_user)
+    current_user: CurrentUser = Depends(get_current_admin_user)
 ):
     repo = BookRepository(db)
     db_book = await repo.create_book(book)
     return db_book
 
+@router.post("/books/import")
+async def import_books(
+    request: Request,
+    import_format: Optional[ImportFormat] = Query(None, alias="format"),
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """
+    Массовый импорт книг из CSV или JSON Lines в теле запроса.
+
+    Тело читается потоком и сохраняется пачками по IMPORT_BATCH_SIZE книг
+    (по транзакции на пачку). Для каждой книги создаются цены (по умолчанию 0)
+    и пустая запись контента. Поля строки — как у POST /admin/books/ плюс
+    price, price_rent_2week, price_rent_month, price_rent_3month.
+
+    :param import_format: csv или jsonl; по умолчанию определяется по Content-Type.
+    :return: Поток NDJSON с ошибками строк, прогрессом после каждой пачки и итогом.
+    """
+    import_format = import_format or detect_format(request.headers.get("content-type"))
+    book_service = BookService(db)
+    progress = book_service.import_books(request.stream(), import_format)
+    return RequestBodyStreamingResponse(progress, media_type="application/x-ndjson")
+
+@router.get("/books/export")
+async def export_books(
+    export_format: ImportFormat = Query(ImportFormat.JSONL, alias="format"),
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """
+    Выгружает весь каталог книг с ценами потоком в CSV или JSON Lines.
+
+    Книги читаются серверным курсором пачками по EXPORT_BATCH_SIZE, поэтому
+    память не растет с размером каталога. Формат совместим с POST /admin/books/import.
+
+    :param export_format: csv или jsonl.
+    :return: Поток строк каталога.
+    """
+    repo = BookRepository(db)
+    body = catalog_export.format_rows(repo.stream_catalog(), export_format)
+    extension = export_format.value
+    return StreamingResponse(
+        body,
+        media_type=catalog_export.MEDIA_TYPES[export_format],
+        headers={"content-disposition": f'attachment; filename="books.{extension}"'},
+    )
+
 @router.post("/books/upload/")
 async def upload_book(
     book_id: int,
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
-    current_user: UserDB = Depends(get_current_admin_user)
+    current_user: CurrentUser = Depends(get_current_admin_user)
 ):
     print(book_id)
     # Проверяем допустимый формат файла (PDF или EPUB)
@@ -43,23 +97,77 @@ async def upload_book(
     repo = BookRepository(db)
     book = await repo.get_book_by_id(book_id)
 
-    # Сохраняем файл в защищенной директории
-    file_path = os.path.join(settings.PROTECTED_BOOKS_DIR, f"{book_id}_{file.filename}")
-    with open(file_path, "wb") as buffer:
-        buffer.write(await file.read())
+    # Потоково сохраняем файл во временный файл рядом с хранилищем, считая SHA-256
+    file_extension = os.path.splitext(file.filename)[1].lower()
+    try:
+        stored = await storage_service.save_upload(file, storage_service.blobs_dir(), suffix=file_extension)
+    except UploadTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Файл больше допустимого размера ({settings.MAX_UPLOAD_BYTES} байт)."
+        )
 
-    # Сохраняем путь к файлу в таблице BookContent
+    try:
+        # Извлекаем текст страниц и помещаем файл в хранилище по хешу (одинаковые файлы хранятся один раз)
+        book_service = BookService(db)
+        file_path, page_count = await book_service.store_book_file(stored, file_extension)
+    except BaseException:
+        storage_service.remove_file(stored.path)
+        raise
+
+    # Сохраняем ссылку на файл и количество страниц в таблице BookContent
     content_repo = ContentRepository(db)
-    db_content = await content_repo.update_content(book_id=book_id, url_content=file_path)
+    db_content = await content_repo.update_content(
+        book_id=book_id, url_content=file_path, page_count=page_count, content_hash=stored.sha256
+    )
 
-    return {"message": "Файл книги успешно загружен", "content_id": db_content.id}
+    return {
+        "message": "Файл книги успешно загружен",
+        "content_id": db_content.id,
+        "page_count": page_count,
+        "size": stored.size,
+        "sha256": stored.sha256,
+    }
+
+# Массовые изменения регистрируются раньше маршрутов /books/{book_id}/..., иначе "bulk" примется за book_id
+@router.patch("/books/bulk/prices", response_model=BulkUpdateResponse)
+async def update_prices_by_filter(
+    request: BulkPriceUpdateRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """
+    Изменяет цены всех книг, попадающих под фильтр, одним запросом к БД.
+
+    :param request: Фильтр книг, способ изменения (set, add, percent) и значения по тарифам.
+    :return: Количество измененных книг.
+    """
+    repo = BookRepository(db)
+    updated = await repo.update_prices_by_filter(request.filter, request.mode, request.price_changes())
+    return BulkUpdateResponse(updated=updated)
+
+@router.patch("/books/bulk/hide", response_model=BulkUpdateResponse)
+async def hide_books_by_filter(
+    request: BulkHideRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """
+    Скрывает или показывает все книги, попадающие под фильтр, одним запросом к БД.
+
+    :param request: Фильтр книг и новое значение hidden.
+    :return: Количество книг, у которых изменилась видимость.
+    """
+    repo = BookRepository(db)
+    updated = await repo.hide_books_by_filter(request.filter, request.hidden)
+    return BulkUpdateResponse(updated=updated)
 
 @router.patch("/books/{book_id}/update", response_model=Book)
 async def update_book(
     book_id: int,
     updated_data: BookCreateRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: UserDB = Depends(get_current_admin_user)
+    current_user: CurrentUser = Depends(get_current_admin_user)
 ):
     book_service = BookService(db)
     updated_book = await book_service.update_book(book_id, updated_data.dict(exclude_unset=True))
@@ -70,7 +178,7 @@ async def hide_book(
     book_id: int,
     hidden_flag: bool = True,
     db: AsyncSession = Depends(get_db),
-    current_user: UserDB = Depends(get_current_admin_user)
+    current_user: CurrentUser = Depends(get_current_admin_user)
 ):
     repo = BookRepository(db)
     db_book = await repo.hide_book(book_id, hidden_flag)
@@ -81,7 +189,7 @@ async def set_book_price(
     book_id: int,
     price: BookPriceCreateRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: UserDB = Depends(get_current_admin_user)
+    current_user: CurrentUser = Depends(get_current_admin_user)
 ):
     repo = BookRepository(db)
     db_price = await repo.set_book_price(book_id, price)
@@ -91,18 +199,67 @@ async def set_book_price(
 async def get_books_with_prices_paginated(
     page: int = 1,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    total_mode: TotalMode = Query(TotalMode.EXACT, alias="total"),
     db: AsyncSession = Depends(get_db),
-    current_user: UserDB = Depends(get_current_admin_user)
+    current_user: CurrentUser = Depends(get_current_admin_user)
 ):
     """
     Возвращает книги с ценами с поддержкой пагинации.
 
     :param page: Номер страницы.
     :param limit: Количество элементов на странице.
+    :param cursor: Курсор следующей страницы из предыдущего ответа (если передан, page игнорируется).
+    :param total_mode: Способ подсчета общего количества: exact (точно) или estimate (оценка планировщика).
     :return: Пагинированный список книг с ценами.
     """
     if limit > 100:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Лимит не может превышать 100.")
 
     book_service = BookService(db)
-    return await book_service.get_books_with_prices_paginated(page, limit)
\ No newline at end of file
+    return await book_service.get_books_with_prices_paginated(page, limit, cursor, total_mode)
+
+@router.get("/metrics/token-cache")
+async def get_token_cache_metrics(current_user: CurrentUser = Depends(get_current_admin_user)):
+    """
+    Возвращает метрики кэша проверки токенов Яндекса и кэша пользователей.
+
+    :return: Размер кэшей, попадания/промахи и статистика общих запросов к Яндексу.
+    """
+    return get_token_cache_stats()
+
+@router.get("/metrics/db")
+async def get_db_metrics(current_user: CurrentUser = Depends(get_current_admin_user)):
+    """
+    Возвращает метрики пула соединений с БД.
+
+    :return: Размер пула, выданные и свободные соединения, переполнение,
+        количество выдач, ожиданий и таймаутов, среднее и максимальное время ожидания.
+    """
+    return get_pool_metrics()
+
+@router.get("/metrics/parse-pool")
+async def get_parse_pool_metrics(current_user: CurrentUser = Depends(get_current_admin_user)):
+    """
+    Возвращает состояние пула разбора документов.
+
+    :return: Количество воркеров, занятые и свободные места в очереди,
+        задачи по воркерам и бюджет кэша документов одного воркера.
+    """
+    return get_parse_pool_stats()
+
+@router.post("/storage/gc")
+async def collect_storage_garbage(
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin_user)
+):
+    """
+    Удаляет из хранилища файлы книг, на которые не ссылается ни одна книга.
+
+    Файлы моложе BLOB_GC_GRACE_SECONDS не удаляются.
+
+    :return: Количество удаленных файлов и освобожденные байты.
+    """
+    book_service = BookService(db)
+    result = await book_service.collect_storage_garbage()
+    return {"removed_files": result["removed_files"], "freed_bytes": result["freed_bytes"]}
@@ -3,8 +3,8 @@ from fastapi.responses import RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.services.auth_service import AuthService
 from src.db.session import get_db
-from src.db.models.user_models import User, UserDB
-from src.db.models.token_models import Token
+from src.db.models.user_models import User, UserDB, CurrentUser
+from src.db.models.token_models import Token, RefreshTokenRequest
 from src.core.security import get_current_user
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -27,14 +27,20 @@ async def yandex_callback(code: str, db: AsyncSession = Depends(get_db)):
     email = user_info.email
     # Сохраняем или обновляем пользователя в БД
     user = await AuthService.save_or_update_user(db, yandex_id, login, email, access_token, refresh_token)
-    return Token(
-        access_token=access_token,
-        refresh_token=refresh_token,
-        token_type="bearer"
-    )
+    # Выдаем собственные токены сервиса вместо токенов Яндекса
+    return await AuthService.issue_session_tokens(db, user)
+
+@router.post("/refresh", response_model=Token)
+async def refresh_tokens(request: RefreshTokenRequest, db: AsyncSession = Depends(get_db)):
+    return await AuthService.refresh_session(db, request.refresh_token)
+
+@router.post("/logout")
+async def logout(db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
+    await AuthService.revoke_session(db, current_user.id)
+    return {"message": "Сессия завершена"}
 
 @router.get("/users/me")
-async def read_users_me(current_user: UserDB = Depends(get_current_user)):
+async def read_users_me(current_user: CurrentUser = Depends(get_current_user)):
     return {
         "id": current_user.id,
         "yandex_id": current_user.yandex_id,
@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from src.api.responses import RangeFileResponse, accel_redirect_response
+from src.core.config import settings
 from src.core.security import get_current_user
-from src.db.models.user_models import UserDB
-from src.db.models.book_models import FilterParams, BookPageResponse
+from src.db.models.user_models import UserDB, CurrentUser
+from src.db.models.book_models import FilterParams, BookPageResponse, TotalMode
 from src.services.book_service import BookService
 from src.db.models.feed_models import FeedBook, PaginatedFeedResponse
+from src.db.models.transaction_models import ExpiringRental
+from src.services import expiry_scheduler
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.db.session import get_db
 import os
+from typing import List, Optional
 
 router = APIRouter(prefix="/books", tags=["books"])
 
@@ -15,8 +22,10 @@ async def get_filtered_feed_books(
     filters: FilterParams = Depends(),
     page: int = 1,
     limit: int = 10,
+    cursor: Optional[str] = None,
+    total_mode: TotalMode = Query(TotalMode.EXACT, alias="total"),
     db: AsyncSession = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Возвращает отфильтрованную ленту книг для пользователя.
@@ -24,10 +33,12 @@ async def get_filtered_feed_books(
     :param filters: Параметры фильтрации.
     :param page: Номер страницы.
     :param limit: Количество элементов на странице.
+    :param cursor: Курсор следующей страницы из предыдущего ответа (если передан, page игнорируется).
+    :param total_mode: Способ подсчета общего количества: exact (точно) или estimate (оценка планировщика).
     :return: Ответ с пагинированным списком книг.
     """
     book_service = BookService(db)
-    total, feed_books = await book_service.get_filtered_feed_books(
+    total, feed_books, next_cursor = await book_service.get_filtered_feed_books(
         user=current_user,
         categories=filters.categories,
         authors=filters.authors,
@@ -35,22 +46,63 @@ async def get_filtered_feed_books(
         year_to=filters.year_to,
         open_for_read=filters.open_for_read,
         page=page,
-        limit=limit
+        limit=limit,
+        cursor=cursor,
+        total_mode=total_mode
     )
 
     return PaginatedFeedResponse(
         total=total,
+        total_estimated=total_mode == TotalMode.ESTIMATE,
         page=page,
         limit=limit,
-        books=feed_books
+        books=feed_books,
+        next_cursor=next_cursor
     )
 
+@router.get("/expiring", response_model=List[ExpiringRental])
+async def get_expiring_rentals(current_user: CurrentUser = Depends(get_current_user)):
+    """
+    Возвращает аренды пользователя, которые скоро закончатся.
+
+    Список берется из памяти планировщика уведомлений и обновляется раз в EXPIRY_CHECK_INTERVAL.
+
+    :return: Книги и даты окончания аренды по возрастанию.
+    """
+    scheduler = expiry_scheduler.expiry_scheduler
+    if scheduler is None:
+        return []
+    return scheduler.get_expiring_rentals(current_user.id)
+
+@router.get("/read/{book_id}")
+async def read_book_pages(
+    book_id: int,
+    page_from: int = Query(..., alias="from", ge=0),
+    page_to: int = Query(..., alias="to", ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Читает диапазон страниц книги одним запросом с одной проверкой прав доступа.
+
+    Страницы отдаются потоком в формате NDJSON: по строке {"page": N, "content": "..."}
+    на страницу. Если книга закончилась раньше, поток завершается на последней странице.
+
+    :param book_id: ID книги.
+    :param page_from: Первая страница диапазона.
+    :param page_to: Последняя страница диапазона (включительно).
+    :return: Поток страниц книги.
+    """
+    book_service = BookService(db)
+    pages = await book_service.stream_book_pages(current_user, book_id, page_from, page_to)
+    return StreamingResponse(pages, media_type="application/x-ndjson")
+
 @router.get("/read/{book_id}/{page}", response_model=BookPageResponse)
 async def read_book_page(
     book_id: int,
     page: int,
     db: AsyncSession = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Читает страницу книги с проверкой прав доступа.
@@ -60,5 +112,47 @@ async def read_book_page(
     :return: Содержимое страницы или ошибка.
     """
     book_service = BookService(db)
-    page_data = await book_service.read_book_page(current_user.id, book_id, page)
-    return BookPageResponse(page=page, content=page_data)
\ No newline at end of file
+    page_data = await book_service.get_book_page(current_user, book_id, page)
+    return BookPageResponse(page=page, content=page_data["content"])
+
+# MIME-типы исходных файлов книг
+BOOK_MEDIA_TYPES = {".pdf": "application/pdf", ".epub": "application/epub+zip"}
+
+@router.api_route("/{book_id}/download", methods=["GET", "HEAD"])
+async def download_book(
+    book_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Отдает исходный файл книги (PDF/EPUB) для чтения офлайн.
+
+    Поддерживаются докачка (Range/If-Range) и условные запросы (ETag/Last-Modified).
+
+    :param book_id: ID книги.
+    :return: Файл книги или его часть.
+    """
+    book_service = BookService(db)
+    content = await book_service.get_book_file(current_user, book_id)
+
+    file_path = content.url_content
+    file_extension = os.path.splitext(file_path)[1].lower()
+    media_type = BOOK_MEDIA_TYPES.get(file_extension, "application/octet-stream")
+    filename = f"book_{book_id}{file_extension}"
+
+    # Отдачу файла из защищенной директории берет на себя nginx (sendfile, Range, условные запросы)
+    relative_path = os.path.relpath(file_path, settings.PROTECTED_BOOKS_DIR or ".").replace(os.sep, "/")
+    if settings.DOWNLOAD_ACCEL_PREFIX and not relative_path.startswith("../"):
+        internal_uri = settings.DOWNLOAD_ACCEL_PREFIX.rstrip("/") + "/" + relative_path
+        return accel_redirect_response(internal_uri, media_type, filename)
+
+    try:
+        stat_result = await run_in_threadpool(os.stat, file_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Файл книги не найден.")
+
+    etag = f'"{content.content_hash}"' if content.content_hash else None
+    return RangeFileResponse(
+        file_path, request, stat_result, etag=etag, media_type=media_type, filename=filename
+    )
@@ -1,24 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.db.session import get_db
 from src.services.book_service import BookService
-from src.db.models.user_models import UserDB
+from src.db.models.user_models import UserDB, CurrentUser
 from src.core.security import get_current_user
 from src.db.models.transaction_models import TransactionStatus
-from src.db.models.transaction_models import TransactionResponse
+from src.db.models.transaction_models import TransactionResponse, BatchPurchaseRequest, BatchTransactionResponse
+from src.core.config import settings
+from typing import Optional
 
 router = APIRouter(prefix="/purchase", tags=["purchase"])
 
+@router.post("/batch", response_model=BatchTransactionResponse)
+async def purchase_or_rent_books(
+    request: BatchPurchaseRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    db: AsyncSession = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Покупка или аренда нескольких книг одним запросом (все или ничего).
+
+    :param request: Список пар (ID книги, действие).
+    :param idempotency_key: Повтор запроса с тем же ключом возвращает сохраненный ответ без повторной покупки.
+    :return: Общая сумма, баланс после списания и созданные транзакции.
+    """
+    if len(request.items) > settings.PURCHASE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"В корзине может быть не более {settings.PURCHASE_BATCH_MAX_ITEMS} книг"
+        )
+    book_service = BookService(db)
+    result = await book_service.purchase_or_rent_books(current_user.id, request.items, idempotency_key)
+    return BatchTransactionResponse(**result)
+
 @router.post("/{book_id}/{action}", response_model=TransactionResponse)
 async def purchase_or_rent_book(
     book_id: int,
     action: str,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: AsyncSession = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     book_service = BookService(db)
-    result = await book_service.purchase_or_rent_book(current_user.id, book_id, action)
+    result = await book_service.purchase_or_rent_book(current_user.id, book_id, action, idempotency_key)
     return TransactionResponse(
         message=result["message"],
-        transaction=result["transaction"].dict()
+        transaction=result["transaction"]
     )
\ No newline at end of file
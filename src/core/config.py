@@ -8,7 +8,108 @@ class Settings:
     YANDEX_CLIENT_ID = os.getenv("YANDEX_CLIENT_ID")
     YANDEX_CLIENT_SECRET = os.getenv("YANDEX_CLIENT_SECRET")
     YANDEX_REDIRECT_URI = os.getenv("YANDEX_REDIRECT_URI")
+    YANDEX_USER_INFO_URL = os.getenv("YANDEX_USER_INFO_URL", "https://login.yandex.ru/info")
     PROTECTED_BOOKS_DIR = os.getenv("PROTECTED_BOOKS_DIR")
+
+    # Собственные токены сессии, выдаваемые после входа через Яндекс
+    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+    JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+    ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+    REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+
+    # Общий HTTP-клиент для запросов к OAuth Яндекса
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+    HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+    HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.2"))
+
+    # Кэш общего количества книг для пагинации
+    COUNT_CACHE_TTL = int(os.getenv("COUNT_CACHE_TTL", "60"))
+    COUNT_CACHE_MAXSIZE = int(os.getenv("COUNT_CACHE_MAXSIZE", "1024"))
+
+    # Кэш результатов проверки токенов Яндекса
+    TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "300"))
+    TOKEN_NEGATIVE_CACHE_TTL = int(os.getenv("TOKEN_NEGATIVE_CACHE_TTL", "30"))
+    TOKEN_CACHE_MAXSIZE = int(os.getenv("TOKEN_CACHE_MAXSIZE", "10000"))
+
+    # Хранилище извлеченного текста страниц (по умолчанию PROTECTED_BOOKS_DIR/pages)
+    PAGE_STORE_DIR = os.getenv("PAGE_STORE_DIR")
+    # Сколько книг хранилища страниц держать отображенными в память
+    PAGE_STORE_OPEN_BOOKS = int(os.getenv("PAGE_STORE_OPEN_BOOKS", "256"))
+
+    # Кэш разобранных PDF/EPUB документов читалки (суммарный размер файлов в байтах,
+    # делится поровну между воркерами PARSE_POOL_WORKERS)
+    DOCUMENT_CACHE_MAX_BYTES = int(os.getenv("DOCUMENT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+    # Кэш данных аутентифицированных пользователей по yandex_id
+    IDENTITY_CACHE_TTL = int(os.getenv("IDENTITY_CACHE_TTL", "300"))
+    IDENTITY_CACHE_MAXSIZE = int(os.getenv("IDENTITY_CACHE_MAXSIZE", "10000"))
+
+    # Пул процессов для разбора PDF/EPUB (очередь ограничена, задачи с таймаутом, секунды)
+    PARSE_POOL_WORKERS = int(os.getenv("PARSE_POOL_WORKERS", str(os.cpu_count() or 2)))
+    PARSE_POOL_MAX_PENDING = int(os.getenv("PARSE_POOL_MAX_PENDING", "64"))
+    PARSE_JOB_TIMEOUT = float(os.getenv("PARSE_JOB_TIMEOUT", "10"))
+    PARSE_EXTRACT_TIMEOUT = float(os.getenv("PARSE_EXTRACT_TIMEOUT", "300"))
+
+    # Чтение книги диапазоном страниц и предзагрузка следующих страниц (0 — выключена)
+    READ_RANGE_MAX_PAGES = int(os.getenv("READ_RANGE_MAX_PAGES", "50"))
+    READ_PREFETCH_PAGES = int(os.getenv("READ_PREFETCH_PAGES", "5"))
+    PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "600"))
+    PAGE_CACHE_MAXSIZE = int(os.getenv("PAGE_CACHE_MAXSIZE", "2000"))
+    READ_POSITION_TTL = int(os.getenv("READ_POSITION_TTL", "1800"))
+    READ_POSITION_CACHE_MAXSIZE = int(os.getenv("READ_POSITION_CACHE_MAXSIZE", "10000"))
+
+    # Загрузка файлов книг: максимальный размер и размер блока записи (байты)
+    MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(500 * 1024 * 1024)))
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+    # Хранилище файлов книг по хешу содержимого (по умолчанию PROTECTED_BOOKS_DIR/blobs)
+    BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR")
+    # Минимальный возраст файла без ссылок, после которого сборщик мусора его удаляет (секунды)
+    BLOB_GC_GRACE_SECONDS = int(os.getenv("BLOB_GC_GRACE_SECONDS", "3600"))
+
+    # Внутренний префикс nginx для X-Accel-Redirect при скачивании книг (если не задан, файл отдает приложение)
+    DOWNLOAD_ACCEL_PREFIX = os.getenv("DOWNLOAD_ACCEL_PREFIX")
+
+    # Максимальное количество книг в одной покупке корзиной
+    PURCHASE_BATCH_MAX_ITEMS = int(os.getenv("PURCHASE_BATCH_MAX_ITEMS", "50"))
+
+    # Время хранения ответов на покупки по заголовку Idempotency-Key (секунды);
+    # истекшие ключи удаляет планировщик окончания аренды
+    IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", str(24 * 60 * 60)))
+
+    # Планировщик уведомлений об окончании аренды (интервал и окно — секунды)
+    EXPIRY_SCHEDULER_ENABLED = os.getenv("EXPIRY_SCHEDULER_ENABLED", "true").lower() == "true"
+    EXPIRY_CHECK_INTERVAL = int(os.getenv("EXPIRY_CHECK_INTERVAL", "300"))
+    EXPIRY_NOTIFY_WINDOW = int(os.getenv("EXPIRY_NOTIFY_WINDOW", str(3 * 24 * 60 * 60)))
+    EXPIRY_NOTIFY_BATCH_SIZE = int(os.getenv("EXPIRY_NOTIFY_BATCH_SIZE", "500"))
+    # Куда отправлять уведомления: log или file (JSON Lines в EXPIRY_NOTIFICATION_FILE)
+    EXPIRY_NOTIFICATION_SINK = os.getenv("EXPIRY_NOTIFICATION_SINK", "log")
+    EXPIRY_NOTIFICATION_FILE = os.getenv("EXPIRY_NOTIFICATION_FILE", "expiry_notifications.jsonl")
+
+    # Массовый импорт каталога: книг в одной транзакции и максимум ошибок в отчете
+    IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+    IMPORT_MAX_REPORTED_ERRORS = int(os.getenv("IMPORT_MAX_REPORTED_ERRORS", "100"))
+    # Выгрузка каталога: строк в одной пачке серверного курсора
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+    # Реплика для только читающих запросов (каталог, лента, админские списки); если не задана — все запросы идут в основную БД
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+    # Подключение к БД: пул соединений (время — секунды) и логирование SQL
+    DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Ограничение времени выполнения запроса на стороне PostgreSQL (миллисекунды, 0 — без ограничения)
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    # Кэш подготовленных выражений asyncpg на соединение (0 — выключен, нужно для pgbouncer в режиме transaction)
+    DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
 settings = Settings()
 
 
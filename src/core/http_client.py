@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from typing import Optional
+
+import httpx
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Ответы, при которых повторный GET-запрос имеет смысл
+RETRY_STATUS_CODES = (502, 503, 504)
+
+# Ошибки соединения, которые повторяет сам транспорт, а не get_with_retry
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+# Общий для приложения HTTP-клиент; создается и закрывается в lifespan приложения
+_client: Optional[httpx.AsyncClient] = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Создает HTTP-клиент с пулом keep-alive соединений и таймаутами из настроек."""
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    )
+    # Транспорт сам повторяет попытки установить соединение
+    transport = httpx.AsyncHTTPTransport(limits=limits, retries=settings.HTTP_RETRIES)
+    timeout = httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT)
+    return httpx.AsyncClient(transport=transport, timeout=timeout)
+
+
+async def init_http_client():
+    """Создает общий HTTP-клиент при старте приложения."""
+    global _client
+    if _client is None:
+        _client = create_http_client()
+
+
+async def close_http_client():
+    """Закрывает общий HTTP-клиент при остановке приложения."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Возвращает общий HTTP-клиент.
+
+    Вне lifespan приложения (скрипты, тесты) клиент создается при первом обращении.
+    """
+    global _client
+    if _client is None:
+        _client = create_http_client()
+    return _client
+
+
+async def get_with_retry(url: str, **kwargs) -> httpx.Response:
+    """
+    Выполняет GET-запрос через общий клиент с повторами и экспоненциальной задержкой.
+
+    Повторяются таймауты, сетевые ошибки и ответы 502/503/504. Ошибки установки
+    соединения повторяет только транспорт клиента, поэтому общее число попыток
+    соединения не превышает HTTP_RETRIES + 1. POST-запросы (например, обмен
+    одноразового кода на токен) повторяются только на уровне транспорта.
+
+    :param url: Адрес запроса.
+    :return: Ответ сервера.
+    """
+    client = get_http_client()
+    attempts = settings.HTTP_RETRIES + 1
+    for attempt in range(attempts):
+        last_attempt = attempt == attempts - 1
+        try:
+            response = await client.get(url, **kwargs)
+        except (httpx.TimeoutException, httpx.NetworkError) as e:
+            # Ошибки установки соединения уже повторил транспорт (retries=HTTP_RETRIES)
+            if last_attempt or isinstance(e, CONNECT_ERRORS):
+                raise
+            logger.warning("GET %s не выполнен (%s), повтор %d", url, e, attempt + 1)
+        else:
+            if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                return response
+            logger.warning("GET %s вернул %d, повтор %d", url, response.status_code, attempt + 1)
+        await asyncio.sleep(settings.HTTP_RETRY_BACKOFF * (2 ** attempt))
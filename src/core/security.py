@@ -1,26 +1,64 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from src.db.models.user_models import UserDB
-from src.db.session import AsyncSessionLocal
+from src.db.models.user_models import UserDB, CurrentUser
+from src.db.session import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from src.core.config import settings
+from src.core.http_client import get_with_retry
+from src.utils.cache import TTLCache, SingleFlight
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import hashlib
 import httpx
 import logging
-from functools import lru_cache
+import secrets
+
+logger = logging.getLogger(__name__)
 
 # OAuth2 схема для получения токена из запроса
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
-    """Получает текущего пользователя на основе токена."""
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+# Кэш результатов проверки токенов: хэш токена -> данные пользователя (None — токен отклонен)
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_MAXSIZE, ttl=settings.TOKEN_CACHE_TTL)
+_token_verifications = SingleFlight()
+
+# Кэш пользователей по yandex_id: неизменяемые снимки CurrentUser
+identity_cache = TTLCache(maxsize=settings.IDENTITY_CACHE_MAXSIZE, ttl=settings.IDENTITY_CACHE_TTL)
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> CurrentUser:
+    """
+    Получает текущего пользователя на основе токена.
+
+    Собственный access-токен сервиса проверяется локально, без обращений к сети и БД.
+    Токены Яндекса по-прежнему принимаются и проверяются через Yandex API, а данные
+    пользователя берутся из кэша identity_cache или из сессии БД текущего запроса.
+    """
     if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Требуется авторизация",
         )
 
-    # Проверяем валидность токена (локально или через API)
+    # Собственный токен сервиса: все данные пользователя уже в claims
+    payload = decode_session_token(token, ACCESS_TOKEN_TYPE)
+    if payload:
+        return CurrentUser(
+            id=int(payload["sub"]),
+            yandex_id=payload.get("yandex_id"),
+            login=payload.get("login"),
+            email=payload.get("email"),
+            is_admin=payload.get("is_admin", False),
+        )
+
+    # Проверяем валидность токена через API Яндекса (с кэшированием)
     user_info = await verify_yandex_token(token)
     if not user_info:
         raise HTTPException(
@@ -28,51 +66,142 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
             detail="Неверный токен",
         )
 
-    async with AsyncSessionLocal() as session:
-        # Ищем пользователя по yandex_id
-        result = await session.execute(
-            select(UserDB).where(UserDB.yandex_id == user_info['id'])
+    yandex_id = str(user_info['id'])
+    current_user = identity_cache.get(yandex_id)
+    if current_user is not None:
+        return current_user
+
+    # Ищем пользователя по yandex_id в сессии текущего запроса
+    result = await db.execute(
+        select(UserDB).where(UserDB.yandex_id == yandex_id)
+    )
+    user = result.scalars().first()
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Пользователь не найден",
+        )
+
+    current_user = CurrentUser.from_orm(user)
+    identity_cache.set(yandex_id, current_user)
+    return current_user
+
+def _encode_session_token(claims: dict, expires_delta: timedelta) -> str:
+    if not settings.JWT_SECRET_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Не задан JWT_SECRET_KEY",
         )
-        user = result.scalars().first()
+    now = datetime.now(timezone.utc)
+    payload = {**claims, "iat": now, "exp": now + expires_delta}
+    return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+
+def create_access_token(user: UserDB) -> str:
+    """
+    Создает короткоживущий access-токен сервиса.
+
+    :param user: Пользователь.
+    :return: Подписанный JWT с ID пользователя и признаком администратора.
+    """
+    return _encode_session_token(
+        {
+            "sub": str(user.id),
+            "type": ACCESS_TOKEN_TYPE,
+            "is_admin": bool(user.is_admin),
+            "yandex_id": user.yandex_id,
+            "login": user.login,
+            "email": user.email,
+        },
+        timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
 
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Пользователь не найден",
-            )
+def create_refresh_token(user: UserDB) -> str:
+    """
+    Создает refresh-токен сервиса.
 
-        return user
+    :param user: Пользователь.
+    :return: Подписанный JWT с уникальным идентификатором (jti).
+    """
+    return _encode_session_token(
+        {
+            "sub": str(user.id),
+            "type": REFRESH_TOKEN_TYPE,
+            "jti": secrets.token_urlsafe(16),
+        },
+        timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
 
-async def verify_yandex_token(token: str) -> dict:
-    """Проверяет валидность токена через Yandex API или локально (если это JWT)."""
+def decode_session_token(token: str, token_type: str) -> Optional[dict]:
+    """
+    Проверяет подпись и срок действия токена сервиса.
+
+    :param token: Токен.
+    :param token_type: Ожидаемый тип токена (access или refresh).
+    :return: Claims токена или None, если токен не выдан этим сервисом или недействителен.
+    """
+    if not settings.JWT_SECRET_KEY:
+        return None
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        return None
+    if payload.get("type") != token_type or "sub" not in payload:
+        return None
+    return payload
+
+def hash_token(token: str) -> str:
+    """Возвращает хэш токена для хранения в БД."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+async def verify_yandex_token(token: str) -> Optional[dict]:
+    """
+    Проверяет валидность токена через Yandex API.
+
+    Результаты проверки кэшируются в памяти процесса: успешные — на TOKEN_CACHE_TTL,
+    отклоненные Яндексом токены — на TOKEN_NEGATIVE_CACHE_TTL. Одновременные запросы
+    с одним и тем же токеном используют один общий запрос к Яндексу.
+    """
+    # В кэше храним хэш токена, а не сам токен
+    key = hash_token(token)
+    found, user_info = token_cache.lookup(key)
+    if found:
+        return user_info
+
+    return await _token_verifications.do(key, lambda: _verify_and_cache_token(key, token))
+
+async def _verify_and_cache_token(key: str, token: str) -> Optional[dict]:
     try:
-        # Пытаемся декодировать JWT локально (если это возможно)
-        try:
-            payload = jwt.decode(
-                token,
-                settings.YANDEX_CLIENT_SECRET,
-                algorithms=["RS256"],
-                audience=settings.YANDEX_CLIENT_ID  # Убедитесь, что аудитория совпадает с вашим client_id
-            )
-            return payload  # Возвращаем декодированные данные из JWT
-
-        except JWTError as e:
-            print(f"Не удалось декодировать JWT: {e}. Проверяем через API.")
-
-        # Если это не JWT или декодирование не удалось, проверяем через API Yandex
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                "https://login.yandex.ru/info",
-                headers={"Authorization": f"OAuth {token}"}
-            )
-            response.raise_for_status()  # Проверяем статус ответа
-
-            return response.json()
-
-    except httpx.HTTPError as e: 
+        response = await get_with_retry(
+            settings.YANDEX_USER_INFO_URL,
+            headers={"Authorization": f"OAuth {token}"}
+        )
+        response.raise_for_status()  # Проверяем статус ответа
+        user_info = response.json()
+
+    except httpx.HTTPStatusError as e:
+        # Яндекс отклонил токен: запоминаем отказ, чтобы не проверять его повторно
+        if e.response.status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN):
+            token_cache.set(key, None, ttl=settings.TOKEN_NEGATIVE_CACHE_TTL)
         return None
 
-async def get_current_admin_user(current_user: UserDB = Depends(get_current_user)):
+    except httpx.HTTPError as e:
+        # Сетевые ошибки не кэшируем
+        logger.warning("Не удалось проверить токен через Yandex API: %s", e)
+        return None
+
+    token_cache.set(key, user_info)
+    return user_info
+
+def get_token_cache_stats() -> dict:
+    """Возвращает метрики кэша проверки токенов."""
+    return {
+        **token_cache.stats(),
+        "verifications": _token_verifications.stats(),
+        "identity_cache": identity_cache.stats(),
+    }
+
+async def get_current_admin_user(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     if not current_user.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -1,4 +1,4 @@
-from .user_models import User, UserAuth, UserWallet
+from .user_models import User, UserAuth, UserWallet, CurrentUser
 from .book_models import Book, BookContent, BookPrice
 from .transaction_models import UserTransaction, TransactionStatus
 from .feed_models import FeedBook, FeedBookStatus, ReadBook
\ No newline at end of file
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, root_validator, validator
 from typing import List, Optional
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime, ARRAY, Integer, ForeignKey
+from enum import Enum
+from sqlalchemy import Column, String, Boolean, DateTime, Integer, ForeignKey
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from src.db.base import Base
@@ -18,6 +20,8 @@ class Book(BaseModel):
 class BookContent(BaseModel):
     book_id: int = Field(..., description="Идентификатор книги")
     url_content: str = Field(..., description="Ссылка на контент книги")
+    page_count: Optional[int] = Field(None, ge=0, description="Количество страниц (после извлечения текста)")
+    content_hash: Optional[str] = Field(None, description="SHA-256 файла книги (ключ в хранилище файлов)")
 
 class BookPrice(BaseModel):
     book_id: int = Field(..., description="Идентификатор книги")
@@ -26,6 +30,9 @@ class BookPrice(BaseModel):
     price_rent_month: Optional[int] = Field(None, ge=0, description="Цена аренды на месяц")
     price_rent_3month: Optional[int] = Field(None, ge=0, description="Цена аренды на 3 месяца")
 
+# Поля цен книги (покупка и тарифы аренды)
+PRICE_TIERS = ("price", "price_rent_2week", "price_rent_month", "price_rent_3month")
+
 class BookCreateRequest(BaseModel):
     title: str = Field(..., min_length=1, description="Название книги")
     url_img: str = Field(..., description="Ссылка на обложку книги")
@@ -34,6 +41,34 @@ class BookCreateRequest(BaseModel):
     year_of_create: datetime = Field(..., description="Год создания книги")
     hidden: bool = Field(default=False, description="Скрыта ли книга от пользователей")
 
+class BookImportRow(BookCreateRequest):
+    """Строка массового импорта каталога: книга вместе с ценами."""
+    price: Optional[int] = Field(0, ge=0, description="Цена покупки книги")
+    price_rent_2week: Optional[int] = Field(0, ge=0, description="Цена аренды на 2 недели")
+    price_rent_month: Optional[int] = Field(0, ge=0, description="Цена аренды на месяц")
+    price_rent_3month: Optional[int] = Field(0, ge=0, description="Цена аренды на 3 месяца")
+
+    @validator("category", "author", pre=True)
+    def split_list(cls, value):
+        # В CSV списки записываются через ";"
+        if isinstance(value, str):
+            return [item.strip() for item in value.split(";") if item.strip()]
+        return value
+
+    @validator("year_of_create", pre=True)
+    def parse_year(cls, value):
+        # Допускаем указание только года ("1869"), а не полной даты
+        if isinstance(value, int) or (isinstance(value, str) and value.strip().isdigit()):
+            return datetime(int(value), 1, 1)
+        return value
+
+    @validator("price", "price_rent_2week", "price_rent_month", "price_rent_3month", pre=True)
+    def empty_price(cls, value):
+        # Пустая ячейка CSV — книга недоступна для этого вида покупки
+        if isinstance(value, str) and not value.strip():
+            return None
+        return value
+
 class BookPriceCreateRequest(BaseModel):
     book_id: int = Field(..., description="Идентификатор книги")
     price: Optional[int] = Field(None, ge=0, description="Цена покупки книги")
@@ -48,11 +83,17 @@ class BookWithPrice(BaseModel):
     price_rent_month: Optional[int] = Field(None, ge=0, description="Цена аренды на месяц")
     price_rent_3month: Optional[int] = Field(None, ge=0, description="Цена аренды на 3 месяца")
 
+class TotalMode(str, Enum):
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+
 class PaginatedBooksResponse(BaseModel):
     total: int = Field(..., description="Общее количество книг")
+    total_estimated: bool = Field(default=False, description="Является ли total оценкой планировщика")
     page: int = Field(..., description="Текущая страница")
     limit: int = Field(..., description="Количество элементов на странице")
     books: List[BookWithPrice] = Field(..., description="Список книг с ценами")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы (None, если страница последняя)")
 
 class FilterParams(BaseModel):
     categories: Optional[List[str]] = None
@@ -61,6 +102,57 @@ class FilterParams(BaseModel):
     year_to: Optional[int] = None
     open_for_read: Optional[bool] = None
 
+class CatalogFilter(BaseModel):
+    """Выборка книг каталога для массовых изменений."""
+    categories: Optional[List[str]] = Field(None, description="Книги хотя бы одной из категорий")
+    authors: Optional[List[str]] = Field(None, description="Книги хотя бы одного из авторов")
+    year_from: Optional[int] = Field(None, description="Минимальный год написания")
+    year_to: Optional[int] = Field(None, description="Максимальный год написания")
+    all_books: bool = Field(default=False, description="Изменить весь каталог (требуется при пустом фильтре)")
+
+    @root_validator(skip_on_failure=True)
+    def check_not_empty(cls, values):
+        has_conditions = any(values.get(name) for name in ("categories", "authors", "year_from", "year_to"))
+        if not has_conditions and not values.get("all_books"):
+            raise ValueError("Пустой фильтр изменит весь каталог: укажите условия или all_books=true")
+        return values
+
+class PriceChangeMode(str, Enum):
+    SET = "set"          # Установить цену
+    ADD = "add"          # Прибавить к цене (значение может быть отрицательным)
+    PERCENT = "percent"  # Изменить цену на процент (например, -20)
+
+class BulkPriceUpdateRequest(BaseModel):
+    filter: CatalogFilter = Field(..., description="Какие книги изменить")
+    mode: PriceChangeMode = Field(..., description="Способ изменения цен")
+    price: Optional[float] = Field(None, description="Изменение цены покупки")
+    price_rent_2week: Optional[float] = Field(None, description="Изменение цены аренды на 2 недели")
+    price_rent_month: Optional[float] = Field(None, description="Изменение цены аренды на месяц")
+    price_rent_3month: Optional[float] = Field(None, description="Изменение цены аренды на 3 месяца")
+
+    @root_validator(skip_on_failure=True)
+    def check_changes(cls, values):
+        changes = [values[name] for name in PRICE_TIERS if values.get(name) is not None]
+        if not changes:
+            raise ValueError("Не указано ни одной изменяемой цены")
+        mode = values["mode"]
+        if mode == PriceChangeMode.SET and any(value < 0 or value != int(value) for value in changes):
+            raise ValueError("Новая цена должна быть целым неотрицательным числом")
+        if mode == PriceChangeMode.PERCENT and any(value < -100 for value in changes):
+            raise ValueError("Цену нельзя уменьшить больше чем на 100%")
+        return values
+
+    def price_changes(self) -> dict:
+        """Возвращает изменяемые цены: {поле цены: значение}."""
+        return {name: getattr(self, name) for name in PRICE_TIERS if getattr(self, name) is not None}
+
+class BulkHideRequest(BaseModel):
+    filter: CatalogFilter = Field(..., description="Какие книги изменить")
+    hidden: bool = Field(default=True, description="Скрыть (true) или показать (false) книги")
+
+class BulkUpdateResponse(BaseModel):
+    updated: int = Field(..., description="Количество измененных книг")
+
 class BookPageResponse(BaseModel):
     page: int = Field(..., description="Номер страницы")
     content: str = Field(..., description="Текстовое содержимое страницы")
@@ -91,4 +183,6 @@ class BookContentDB(Base):
     id = Column(Integer, primary_key=True, index=True)
     book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
     url_content = Column(String, nullable=False)
+    page_count = Column(Integer, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)
 
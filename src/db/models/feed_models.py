@@ -19,9 +19,11 @@ class FeedBook(BaseModel):
 
 class PaginatedFeedResponse(BaseModel):
     total: int = Field(..., description="Общее количество книг")
+    total_estimated: bool = Field(default=False, description="Является ли total оценкой планировщика")
     page: int = Field(..., description="Текущая страница")
     limit: int = Field(..., description="Количество элементов на странице")
     books: List[FeedBook] = Field(..., description="Список книг в ленте")
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы (None, если страница последняя)")
 
 class ReadBook(BaseModel):
     user_id: str = Field(..., description="Идентификатор пользователя")
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+from src.db.base import Base
+
+class IdempotencyKeyDB(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)  # SHA-256 параметров запроса
+    response = Column(JSONB, nullable=True)  # Сохраненный ответ (заполняется при фиксации покупки)
+    created_at = Column(DateTime, nullable=False, default=datetime.now, index=True)  # Для удаления истекших ключей
@@ -3,4 +3,7 @@ from pydantic import BaseModel
 class Token(BaseModel):
     access_token: str
     refresh_token: str
-    token_type: str
\ No newline at end of file
+    token_type: str
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
\ No newline at end of file
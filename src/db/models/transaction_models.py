@@ -1,8 +1,9 @@
 from pydantic import BaseModel, Field
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timedelta
 from enum import Enum
+from typing import List, Optional
 from sqlalchemy.ext.declarative import declarative_base
 from src.db.models.user_models import User, UserDB
 from src.db.models.book_models import Book, BookDB
@@ -14,22 +15,81 @@ class TransactionStatus(str, Enum):
     RENT_MONTH = "rent_month"
     RENT_3MONTH = "rent_3month"
 
+# Продолжительность аренды для каждого статуса транзакции
+RENT_DURATIONS = {
+    TransactionStatus.RENT_2WEEK: timedelta(weeks=2),
+    TransactionStatus.RENT_MONTH: timedelta(days=30),
+    TransactionStatus.RENT_3MONTH: timedelta(days=90),
+}
+
+# Поле цены книги (BookPriceDB) для каждого статуса транзакции
+PRICE_FIELDS = {
+    TransactionStatus.BUY: "price",
+    TransactionStatus.RENT_2WEEK: "price_rent_2week",
+    TransactionStatus.RENT_MONTH: "price_rent_month",
+    TransactionStatus.RENT_3MONTH: "price_rent_3month",
+}
+
+def calculate_expires_at(status: str, date_buy: datetime) -> Optional[datetime]:
+    """
+    Вычисляет дату окончания доступа по транзакции.
+
+    :param status: Статус транзакции.
+    :param date_buy: Дата покупки/аренды.
+    :return: Дата окончания аренды или None для бессрочной покупки.
+    """
+    duration = RENT_DURATIONS.get(status)
+    if duration is None:
+        return None
+    return date_buy + duration
+
 class UserTransaction(BaseModel):
     user_id: int = Field(..., description="Идентификатор пользователя")
     book_id: int = Field(..., description="Идентификатор книги")
     date_buy: datetime = Field(..., description="Дата покупки/аренды")
     price: int = Field(..., ge=0, description="Сумма транзакции")
     status: TransactionStatus = Field(..., description="Статус транзакции")
+    expires_at: Optional[datetime] = Field(None, description="Дата окончания аренды (None для покупки)")
 
 class TransactionResponse(BaseModel):
     message: str = Field(..., description="Статус операции")
     transaction: dict = Field(..., description="Детали транзакции")
+
+class PurchaseItem(BaseModel):
+    book_id: int = Field(..., description="Идентификатор книги")
+    action: TransactionStatus = Field(..., description="Действие: покупка или аренда")
+
+class BatchPurchaseRequest(BaseModel):
+    items: List[PurchaseItem] = Field(..., min_items=1, description="Книги корзины")
+
+class ExpiryNotification(BaseModel):
+    transaction_id: int = Field(..., description="Идентификатор транзакции аренды")
+    user_id: int = Field(..., description="Идентификатор пользователя")
+    book_id: int = Field(..., description="Идентификатор книги")
+    status: TransactionStatus = Field(..., description="Тип аренды")
+    expires_at: datetime = Field(..., description="Дата окончания аренды")
+
+class ExpiringRental(BaseModel):
+    book_id: int = Field(..., description="Идентификатор книги")
+    expires_at: datetime = Field(..., description="Дата окончания аренды")
+
+class BatchTransactionResponse(BaseModel):
+    message: str = Field(..., description="Статус операции")
+    total_price: int = Field(..., description="Общая сумма списания")
+    balance: int = Field(..., description="Баланс после списания")
+    transactions: List[dict] = Field(..., description="Детали транзакций")
     
 class UserTransactionDB(Base):
     __tablename__ = "user_transactions"
+    __table_args__ = (
+        Index("ix_user_transactions_user_book_expires", "user_id", "book_id", "expires_at"),
+        Index("ix_user_transactions_expires_at", "expires_at"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
     date_buy = Column(DateTime, nullable=False)
     price = Column(Integer, nullable=False)
-    status = Column(String, nullable=False)
\ No newline at end of file
+    status = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=True)
+    notified_at = Column(DateTime, nullable=True)  # Когда отправлено уведомление об окончании аренды
\ No newline at end of file
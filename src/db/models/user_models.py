@@ -21,6 +21,18 @@ class UserWallet(BaseModel):
     user_id: str = Field(..., description="Идентификатор пользователя")
     account: int = Field(..., ge=0, description="Баланс пользователя в виртуальных рублях")
 
+class CurrentUser(BaseModel):
+    """Неизменяемый снимок аутентифицированного пользователя."""
+    id: int = Field(..., description="Уникальный идентификатор пользователя")
+    yandex_id: Optional[str] = Field(None, description="ID пользователя в Яндекс OAuth")
+    login: str = Field(..., description="Логин пользователя")
+    email: Optional[str] = Field(None, description="Email пользователя")
+    is_admin: bool = Field(default=False, description="Является ли пользователь администратором")
+
+    class Config:
+        orm_mode = True
+        frozen = True
+
 class UserDB(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
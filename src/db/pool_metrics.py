@@ -0,0 +1,86 @@
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolMetrics:
+    """Счетчики выдачи соединений из пула."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.checkout_time = 0.0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    def record_checkout(self, elapsed: float, waited: bool):
+        """
+        Учитывает выданное соединение.
+
+        :param elapsed: Время получения соединения в секундах (включая открытие нового).
+        :param waited: Ждал ли запрос освобождения соединения (пул и переполнение исчерпаны).
+        """
+        self.checkouts += 1
+        self.checkout_time += elapsed
+        if waited:
+            self.waits += 1
+            self.wait_time += elapsed
+            self.max_wait = max(self.max_wait, elapsed)
+
+    def record_timeout(self, elapsed: float):
+        """Учитывает запрос, не дождавшийся соединения за pool_timeout."""
+        self.timeouts += 1
+        self.waits += 1
+        self.wait_time += elapsed
+        self.max_wait = max(self.max_wait, elapsed)
+
+    def snapshot(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+            "avg_checkout_ms": round(self.checkout_time / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "avg_wait_ms": round(self.wait_time / self.waits * 1000, 3) if self.waits else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
+
+
+class InstrumentedPoolMixin:
+    """Добавляет к пулу SQLAlchemy учет выдачи соединений и ожиданий (см. PoolMetrics)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        # Свободных соединений нет и лимит переполнения исчерпан — запрос будет ждать
+        waiting = self._pool.empty() and self._max_overflow > -1 and self._overflow >= self._max_overflow
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout(time.perf_counter() - started)
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started, waiting)
+        return connection
+
+    def get_metrics(self) -> dict:
+        """
+        Возвращает текущее состояние пула и накопленные счетчики.
+
+        :return: Размер пула, свободные и выданные соединения, переполнение и метрики PoolMetrics.
+        """
+        return {
+            "pool_size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            **self.metrics.snapshot(),
+        }
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """Пул соединений асинхронного движка с метриками."""
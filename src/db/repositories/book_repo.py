@@ -1,10 +1,20 @@
+from sqlalchemy import Integer, case, cast, insert, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import joinedload
 from sqlalchemy.sql import func
-from src.db.models.book_models import Book, BookDB, BookCreateRequest, BookPriceDB, BookPriceCreateRequest, BookContentDB
+from src.db.models.book_models import Book, BookDB, BookCreateRequest, BookPriceDB, BookPriceCreateRequest, BookContentDB, BookImportRow, CatalogFilter, PriceChangeMode, TotalMode
 from fastapi import HTTPException, status
-from typing import Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from datetime import datetime
+from src.core.config import settings
+from src.utils.cache import TTLCache
+from src.utils.pagination import encode_cursor, decode_cursor
+from src.db.routing import read_only, use_replica
+import json
+
+# Кэш общего количества книг по сигнатуре фильтров
+count_cache = TTLCache(maxsize=settings.COUNT_CACHE_MAXSIZE, ttl=settings.COUNT_CACHE_TTL)
 
 class BookRepository:
     def __init__(self, db: AsyncSession):
@@ -38,9 +48,44 @@ class BookRepository:
         self.db.add(db_content)
         await self.db.commit()
         await self.db.refresh(db_content)
+        count_cache.clear()
         return db_content
         return db_book
     
+    async def bulk_insert_books(self, rows: List[BookImportRow]) -> List[int]:
+        """
+        Вставляет пачку книг вместе с ценами и пустым контентом.
+
+        Каждая таблица заполняется одним многострочным INSERT; ID книг
+        возвращаются через RETURNING в порядке строк. Фиксация транзакции
+        остается за вызывающим кодом.
+
+        :param rows: Строки импорта.
+        :return: ID созданных книг в порядке строк.
+        """
+        if not rows:
+            return []
+        book_fields = BookCreateRequest.__fields__.keys()
+        result = await self.db.execute(
+            insert(BookDB).returning(BookDB.id, sort_by_parameter_order=True),
+            [{field: getattr(row, field) for field in book_fields} for row in rows]
+        )
+        book_ids = list(result.scalars().all())
+
+        await self.db.execute(insert(BookPriceDB), [
+            {
+                "book_id": book_id,
+                "price": row.price,
+                "price_rent_2week": row.price_rent_2week,
+                "price_rent_month": row.price_rent_month,
+                "price_rent_3month": row.price_rent_3month,
+            }
+            for book_id, row in zip(book_ids, rows)
+        ])
+        await self.db.execute(insert(BookContentDB), [{"book_id": book_id, "url_content": ""} for book_id in book_ids])
+        count_cache.clear()
+        return book_ids
+
     async def update_book(self, book_id: int, updated_data: dict) -> BookDB:
         """
         Обновляет информацию о книге в базе данных.
@@ -64,6 +109,7 @@ class BookRepository:
         self.db.add(book)
         await self.db.commit()
         await self.db.refresh(book)
+        count_cache.clear()
 
         return book
 
@@ -77,6 +123,7 @@ class BookRepository:
         db_book.hidden = hidden_flag
         await self.db.commit()
         await self.db.refresh(db_book)
+        count_cache.clear()
         return db_book
     
     async def set_book_price(self, book_id: int, price: BookPriceCreateRequest):
@@ -97,9 +144,69 @@ class BookRepository:
         # Сохраняем изменения
         await self.db.commit()
         await self.db.refresh(db_price)
+        count_cache.clear()
 
         return db_price
 
+    async def update_prices_by_filter(self, catalog_filter: CatalogFilter, mode: PriceChangeMode, changes: Dict[str, float]) -> int:
+        """
+        Изменяет цены всех книг, попадающих под фильтр, одним UPDATE.
+
+        При изменении на величину или процент результат округляется и не опускается
+        ниже нуля; недоступные тарифы (NULL) остаются недоступными.
+
+        :param catalog_filter: Фильтр книг.
+        :param mode: Способ изменения цен.
+        :param changes: Изменяемые цены: {поле цены: значение}.
+        :return: Количество измененных записей цен.
+        """
+        values = {}
+        for field, value in changes.items():
+            column = getattr(BookPriceDB, field)
+            if mode == PriceChangeMode.SET:
+                values[field] = int(value)
+            else:
+                changed = column + value if mode == PriceChangeMode.ADD else column * (1 + value / 100)
+                # GREATEST игнорирует NULL, поэтому недоступный тариф проверяется отдельно
+                values[field] = case(
+                    (column.is_(None), None),
+                    else_=func.greatest(cast(func.round(changed), Integer), 0)
+                )
+
+        book_ids = select(BookDB.id).where(*self._catalog_filter_conditions(
+            catalog_filter.categories, catalog_filter.authors, catalog_filter.year_from, catalog_filter.year_to
+        ))
+        result = await self.db.execute(
+            update(BookPriceDB)
+            .where(BookPriceDB.book_id.in_(book_ids))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        count_cache.clear()
+        return result.rowcount
+
+    async def hide_books_by_filter(self, catalog_filter: CatalogFilter, hidden_flag: bool = True) -> int:
+        """
+        Скрывает или показывает все книги, попадающие под фильтр, одним UPDATE.
+
+        :param catalog_filter: Фильтр книг.
+        :param hidden_flag: Скрыть (True) или показать (False).
+        :return: Количество измененных книг.
+        """
+        conditions = self._catalog_filter_conditions(
+            catalog_filter.categories, catalog_filter.authors, catalog_filter.year_from, catalog_filter.year_to
+        )
+        result = await self.db.execute(
+            update(BookDB)
+            .where(*conditions, BookDB.hidden.is_distinct_from(hidden_flag))
+            .values(hidden=hidden_flag)
+            .execution_options(synchronize_session=False)
+        )
+        await self.db.commit()
+        count_cache.clear()
+        return result.rowcount
+
     async def get_book_by_id(self, book_id: int) -> BookDB: 
         result = await self.db.execute(select(BookDB).where(BookDB.id == book_id))
         book = result.scalars().first()
@@ -110,11 +217,49 @@ class BookRepository:
             )
         return book
     
+    async def get_book_with_price(self, book_id: int):
+        """
+        Получить книгу вместе с ценой одним запросом.
+
+        :param book_id: ID книги.
+        :return: Пара (книга, цена); цена может быть None.
+        :raises HTTPException: Если книга не найдена.
+        """
+        result = await self.db.execute(
+            select(BookDB, BookPriceDB)
+            .outerjoin(BookPriceDB, BookPriceDB.book_id == BookDB.id)
+            .where(BookDB.id == book_id)
+        )
+        row = result.first()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Книга с указанным ID не найдена."
+            )
+        return row[0], row[1]
+
+    async def get_books_with_prices(self, book_ids: List[int]) -> Dict[int, Tuple[BookDB, Optional[BookPriceDB]]]:
+        """
+        Получить несколько книг вместе с ценами одним запросом.
+
+        :param book_ids: Список ID книг.
+        :return: Словарь {ID книги: (книга, цена)}; отсутствующих книг в нем нет.
+        """
+        if not book_ids:
+            return {}
+        result = await self.db.execute(
+            select(BookDB, BookPriceDB)
+            .outerjoin(BookPriceDB, BookPriceDB.book_id == BookDB.id)
+            .where(BookDB.id.in_(book_ids))
+        )
+        return {book.id: (book, book_price) for book, book_price in result.all()}
+
     async def get_book_price_by_id(self, book_id: int):
         """Получить цену книги по ID."""
         result = await self.db.execute(select(BookPriceDB).where(BookPriceDB.book_id == book_id))
         return result.scalars().first()
     
+    @read_only
     async def get_all_books_with_prices(self):
         """
         Возвращает список всех книг вместе с их ценами.
@@ -127,39 +272,62 @@ class BookRepository:
         )
         return result.all()
 
+    async def stream_catalog(self) -> AsyncIterator[List[tuple]]:
+        """
+        Выбирает весь каталог с ценами через серверный курсор.
+
+        Строки читаются пачками по EXPORT_BATCH_SIZE и не загружаются в сессию
+        как ORM-объекты, поэтому память не зависит от размера каталога.
+
+        :return: Асинхронный генератор пачек строк (поля книги и цены, порядок по ID).
+        """
+        query = (
+            select(
+                BookDB.id, BookDB.title, BookDB.url_img, BookDB.category, BookDB.author,
+                BookDB.year_of_create, BookDB.hidden,
+                BookPriceDB.price, BookPriceDB.price_rent_2week,
+                BookPriceDB.price_rent_month, BookPriceDB.price_rent_3month,
+            )
+            .outerjoin(BookPriceDB, BookDB.id == BookPriceDB.book_id)
+            .order_by(BookDB.id)
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        with use_replica():
+            result = await self.db.stream(query)
+        async for partition in result.partitions():
+            yield partition
+
+    @read_only
     async def get_books_with_prices_paginated(
         self,
         page: int = 1,
-        limit: int = 10
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        total_mode: TotalMode = TotalMode.EXACT
     ):
         """
         Возвращает книги с ценами с поддержкой пагинации.
         
         :param page: Номер страницы.
         :param limit: Количество элементов на странице.
-        :return: Список книг с ценами и общее количество книг.
+        :param cursor: Курсор keyset-пагинации (если передан, page игнорируется).
+        :param total_mode: Способ подсчета общего количества (точный или оценка планировщика).
+        :return: Общее количество книг, список книг с ценами и курсор следующей страницы.
         """
-        offset = (page - 1) * limit
-
         # Получаем общее количество книг
-        total_query = await self.db.execute(select(func.count()).select_from(BookDB))
-        total = total_query.scalar()
-        if total is None:
-            total = 0
+        total = await self._count_books(select(BookDB), ("all",), total_mode)
 
         # Получаем книги с ценами для текущей страницы
         query = (
             select(BookDB)
             .outerjoin(BookPriceDB, BookDB.id == BookPriceDB.book_id)
             .options(joinedload(BookDB.prices))  # Загружаем связанные данные о ценах
-            .offset(offset)
-            .limit(limit)
         )
-        result = await self.db.execute(query)
-        books = result.unique().scalars().all()  # Получаем только объекты BookDB
+        books, next_cursor = await self._fetch_page(query, page, limit, cursor)
 
-        return total, books
+        return total, books, next_cursor
 
+    @read_only
     async def get_filtered_books(
         self,
         categories: Optional[list[str]] = None,
@@ -169,7 +337,9 @@ class BookRepository:
         open_for_read: Optional[bool] = None,
         user_id: Optional[int] = None,
         page: int = 1,
-        limit: int = 10
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        total_mode: TotalMode = TotalMode.EXACT
     ):
         """
         Возвращает книги с поддержкой фильтрации и пагинации.
@@ -182,45 +352,149 @@ class BookRepository:
         :param user_id: ID пользователя для проверки доступности книг.
         :param page: Номер страницы.
         :param limit: Количество элементов на странице.
-        :return: Список книг с ценами и общее количество книг.
+        :param cursor: Курсор keyset-пагинации (если передан, page игнорируется).
+        :param total_mode: Способ подсчета общего количества (точный или оценка планировщика).
+        :return: Общее количество книг, список книг с ценами и курсор следующей страницы.
         """
-        offset = (page - 1) * limit
-
         query = (
             select(BookDB)
             .outerjoin(BookPriceDB, BookDB.id == BookPriceDB.book_id)
             .options(joinedload(BookDB.prices))
         )
 
-        # Фильтрация по категориям
-        if categories:
-            query = query.filter(BookDB.category.overlap(categories))
-
-        # Фильтрация по авторам
-        if authors:
-            query = query.filter(BookDB.author.overlap(authors))
-
-        # Фильтрация по году написания
-        if year_from:
-            query = query.filter(BookDB.year_of_create >= datetime(year_from, 1, 1))
-        if year_to:
-            query = query.filter(BookDB.year_of_create <= datetime(year_to, 12, 31))
+        # Фильтрация по категориям, авторам и году написания
+        query = query.filter(*self._catalog_filter_conditions(categories, authors, year_from, year_to))
 
         # Фильтрация по доступности для чтения
+        signature = None
         if open_for_read is not None and user_id is not None:
             subquery = await self._get_open_for_read_subquery(user_id)
             query = query.filter(BookDB.id.in_(subquery))
+        else:
+            # Количество зависит только от фильтров каталога, поэтому его можно кэшировать
+            signature = self._filter_signature(categories, authors, year_from, year_to)
 
         # Получаем общее количество книг
-        total_query = await self.db.execute(select(func.count()).select_from(query.subquery()))
-        total = total_query.scalar()
+        total = await self._count_books(query, signature, total_mode)
 
         # Применяем пагинацию
-        query = query.offset(offset).limit(limit)
-        result = await self.db.execute(query)
+        books, next_cursor = await self._fetch_page(query, page, limit, cursor)
+
+        return total, books, next_cursor
+
+    @staticmethod
+    def _catalog_filter_conditions(
+        categories: Optional[list[str]] = None,
+        authors: Optional[list[str]] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None
+    ) -> list:
+        """Возвращает условия WHERE для таблицы книг по фильтрам каталога."""
+        conditions = []
+        if categories:
+            conditions.append(BookDB.category.overlap(categories))
+        if authors:
+            conditions.append(BookDB.author.overlap(authors))
+        if year_from:
+            conditions.append(BookDB.year_of_create >= datetime(year_from, 1, 1))
+        if year_to:
+            conditions.append(BookDB.year_of_create <= datetime(year_to, 12, 31))
+        return conditions
+
+    @staticmethod
+    def _filter_signature(
+        categories: Optional[list[str]] = None,
+        authors: Optional[list[str]] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None
+    ) -> tuple:
+        """
+        Возвращает нормализованную сигнатуру фильтров для ключа кэша количества книг.
+
+        Порядок и повторы значений в списках не влияют на сигнатуру.
+        """
+        return (
+            "filtered",
+            tuple(sorted(set(categories))) if categories else None,
+            tuple(sorted(set(authors))) if authors else None,
+            year_from or None,
+            year_to or None,
+        )
+
+    async def _count_books(self, query, signature: Optional[tuple], total_mode: TotalMode = TotalMode.EXACT) -> int:
+        """
+        Возвращает общее количество книг для запроса.
+
+        Точное значение кэшируется по сигнатуре фильтров и сбрасывается при изменении
+        каталога администратором. В режиме оценки используется статистика планировщика.
+
+        :param query: Запрос выборки книг (без пагинации).
+        :param signature: Сигнатура фильтров для кэша или None, если результат нельзя кэшировать.
+        :param total_mode: Способ подсчета.
+        :return: Количество книг.
+        """
+        if total_mode == TotalMode.ESTIMATE:
+            return await self._estimate_count(query)
+
+        if signature is not None:
+            found, total = count_cache.lookup(signature)
+            if found:
+                return total
+
+        total_query = await self.db.execute(select(func.count()).select_from(query.subquery()))
+        total = total_query.scalar() or 0
+
+        if signature is not None:
+            count_cache.set(signature, total)
+        return total
+
+    async def _estimate_count(self, query) -> int:
+        """
+        Оценивает количество строк запроса по плану PostgreSQL без выполнения запроса.
+
+        :param query: Запрос выборки книг.
+        :return: Оценка количества строк.
+        """
+        conn = await self.db.connection()
+        compiled = query.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+        result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    async def _fetch_page(self, query, page: int, limit: int, cursor: Optional[str] = None):
+        """
+        Выбирает страницу книг в стабильном порядке по ID.
+
+        Без курсора используется OFFSET по номеру страницы, с курсором — поиск
+        по индексу первичного ключа (keyset), стоимость которого не зависит от глубины.
+
+        :param query: Запрос выборки книг.
+        :param page: Номер страницы.
+        :param limit: Количество элементов на странице.
+        :param cursor: Курсор keyset-пагинации.
+        :return: Список книг и курсор следующей страницы (None, если страница последняя).
+        """
+        query = query.order_by(BookDB.id)
+        if cursor is not None:
+            try:
+                last_id = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Недопустимый курсор.")
+            query = query.where(BookDB.id > last_id)
+        else:
+            query = query.offset((page - 1) * limit)
+
+        # Запрашиваем на одну запись больше, чтобы узнать, есть ли следующая страница
+        result = await self.db.execute(query.limit(limit + 1))
         books = result.unique().scalars().all()
 
-        return total, books
+        next_cursor = None
+        if len(books) > limit:
+            books = books[:limit]
+            next_cursor = encode_cursor(books[-1].id)
+        return books, next_cursor
 
     async def _get_open_for_read_subquery(self, user_id: int):
         """
@@ -253,26 +527,10 @@ class BookRepository:
                     TransactionStatus.RENT_MONTH,
                     TransactionStatus.RENT_3MONTH
                 ]),
-                UserTransactionDB.date_buy + self._get_rent_duration(UserTransactionDB.status) > datetime.now()
+                UserTransactionDB.expires_at > datetime.now()
             )
         )
 
         # Объединяем все подзапросы
         subquery = free_books.union(bought_books).union(rented_books)
         return subquery
-
-    @staticmethod
-    def _get_rent_duration(status):
-        """
-        Возвращает продолжительность аренды в зависимости от статуса транзакции.
-
-        :param status: Статус транзакции.
-        :return: Продолжительность аренды.
-        """
-        if status == TransactionStatus.RENT_2WEEK:
-            return timedelta(weeks=2)
-        elif status == TransactionStatus.RENT_MONTH:
-            return timedelta(days=30)
-        elif status == TransactionStatus.RENT_3MONTH:
-            return timedelta(days=90)
-        return timedelta(0)
\ No newline at end of file
@@ -1,22 +1,37 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from src.db.models.book_models import BookContentDB
+from src.db.routing import read_only
+from fastapi import HTTPException
+from typing import Optional, Set
 
 class ContentRepository:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def update_content(self, book_id: int, url_content: str):
+    async def update_content(
+        self, book_id: int, url_content: str, page_count: Optional[int] = None, content_hash: Optional[str] = None
+    ):
         result = await self.db.execute(select(BookContentDB).where(BookContentDB.book_id == book_id))
         db_content = result.scalars().first()
         if not db_content:
             raise HTTPException(status_code=404, detail="Книга не найдена")
         # Устанавливаем hidden в True
         db_content.url_content = url_content
+        db_content.page_count = page_count
+        db_content.content_hash = content_hash
         await self.db.commit()
         await self.db.refresh(db_content)
         return db_content
 
+    @read_only
     async def get_content_by_book_id(self, book_id: int):
         result = await self.db.execute(select(BookContentDB).where(BookContentDB.book_id == book_id))
-        return result.scalars().first()
\ No newline at end of file
+        return result.scalars().first()
+
+    async def get_referenced_hashes(self) -> Set[str]:
+        """Возвращает хеши всех файлов, на которые ссылаются книги (с основной БД: по ним удаляются файлы)."""
+        result = await self.db.execute(
+            select(BookContentDB.content_hash).where(BookContentDB.content_hash.isnot(None)).distinct()
+        )
+        return set(result.scalars().all())
@@ -0,0 +1,80 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
+from src.db.models.idempotency_models import IdempotencyKeyDB
+from datetime import datetime
+from typing import Optional
+
+class IdempotencyRepository:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_key(self, user_id: int, key: str, created_after: datetime) -> Optional[IdempotencyKeyDB]:
+        """
+        Получить ключ идемпотентности пользователя, если он еще не истек.
+
+        :param user_id: ID пользователя.
+        :param key: Значение заголовка Idempotency-Key.
+        :param created_after: Ключи, созданные раньше, считаются истекшими.
+        """
+        result = await self.db.execute(
+            select(IdempotencyKeyDB).where(
+                IdempotencyKeyDB.user_id == user_id,
+                IdempotencyKeyDB.key == key,
+                IdempotencyKeyDB.created_at > created_after
+            )
+        )
+        return result.scalars().first()
+
+    async def claim_key(self, user_id: int, key: str, fingerprint: str) -> Optional[int]:
+        """
+        Занимает ключ идемпотентности в текущей транзакции (без фиксации).
+
+        Если тот же ключ занят параллельным незафиксированным запросом,
+        INSERT ждет его завершения.
+
+        :return: ID записи или None, если ключ уже занят.
+        """
+        result = await self.db.execute(
+            insert(IdempotencyKeyDB)
+            .values(user_id=user_id, key=key, fingerprint=fingerprint, created_at=datetime.now())
+            .on_conflict_do_nothing(index_elements=["user_id", "key"])
+            .returning(IdempotencyKeyDB.id)
+        )
+        return result.scalar_one_or_none()
+
+    async def save_response(self, key_id: int, response: dict):
+        """Сохраняет ответ для занятого ключа (без фиксации)."""
+        await self.db.execute(
+            update(IdempotencyKeyDB).where(IdempotencyKeyDB.id == key_id).values(response=response)
+        )
+
+    async def delete_expired_keys(self, user_id: int, created_before: datetime):
+        """Удаляет истекшие ключи пользователя (без фиксации)."""
+        await self.db.execute(
+            delete(IdempotencyKeyDB).where(
+                IdempotencyKeyDB.user_id == user_id,
+                IdempotencyKeyDB.created_at <= created_before
+            )
+        )
+
+    async def delete_keys_created_before(self, created_before: datetime, limit: int) -> int:
+        """
+        Удаляет пачку истекших ключей всех пользователей (без фиксации).
+
+        :param created_before: Ключи, созданные не позже, считаются истекшими.
+        :param limit: Максимальное количество удаляемых ключей.
+        :return: Количество удаленных ключей.
+        """
+        expired_ids = (
+            select(IdempotencyKeyDB.id)
+            .where(IdempotencyKeyDB.created_at <= created_before)
+            .limit(limit)
+        )
+        result = await self.db.execute(
+            delete(IdempotencyKeyDB)
+            .where(IdempotencyKeyDB.id.in_(expired_ids))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
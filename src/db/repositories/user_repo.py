@@ -1,8 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import DateTime, Integer, String, insert, literal, or_, update
 from src.db.models.user_models import UserDB, UserWalletDB
-from src.db.models.transaction_models import TransactionStatus, UserTransaction, UserTransactionDB
-from datetime import datetime, timedelta
+from src.db.models.transaction_models import TransactionStatus, UserTransaction, UserTransactionDB, calculate_expires_at
+from datetime import datetime
+from typing import List, Optional, Set
 
 class UserRepository:
     def __init__(self, db: AsyncSession):
@@ -13,6 +15,11 @@ class UserRepository:
         result = await self.db.execute(select(UserDB).where(UserDB.yandex_id == yandex_id))
         return result.scalars().first()
 
+    async def get_user_by_id(self, user_id: int):
+        """Получить пользователя по ID."""
+        result = await self.db.execute(select(UserDB).where(UserDB.id == user_id))
+        return result.scalars().first()
+
     async def create_user(self, user: UserDB):
         """Создать нового пользователя."""
         self.db.add(user)
@@ -47,45 +54,174 @@ class UserRepository:
         :return: Активная транзакция (покупка или действующая аренда) или None, если активной транзакции нет.
         """
         result = await self.db.execute(
-            select(UserTransactionDB).where(
-                UserTransactionDB.user_id == user_id,
-                UserTransactionDB.book_id == book_id
+            select(UserTransactionDB)
+            .where(UserTransactionDB.book_id == book_id, *self._active_transaction_conditions(user_id, datetime.now()))
+            .order_by(UserTransactionDB.expires_at.desc().nullsfirst())
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    def _active_transaction_conditions(user_id: int, now: datetime) -> list:
+        # Покупка бессрочна (expires_at IS NULL), аренда активна до expires_at
+        return [
+            UserTransactionDB.user_id == user_id,
+            or_(
+                UserTransactionDB.status == TransactionStatus.BUY,
+                UserTransactionDB.expires_at > now
             )
+        ]
+
+    async def debit_wallet(self, user_id: int, amount: int) -> Optional[int]:
+        """
+        Списывает сумму с кошелька одним условным UPDATE (без фиксации транзакции).
+
+        Строка кошелька остается заблокированной до конца транзакции, поэтому
+        параллельные покупки одного пользователя выполняются по очереди.
+
+        :param user_id: ID пользователя.
+        :param amount: Списываемая сумма.
+        :return: Новый баланс или None, если кошелька нет или средств недостаточно.
+        """
+        result = await self.db.execute(
+            update(UserWalletDB)
+            .where(UserWalletDB.user_id == user_id, UserWalletDB.account >= amount)
+            .values(account=UserWalletDB.account - amount)
+            .returning(UserWalletDB.account)
         )
-        transactions = result.scalars().all()
-
-        for transaction in transactions:
-            # Если книга куплена навсегда, возвращаем транзакцию
-            if transaction.status == TransactionStatus.BUY:
-                return transaction
-            
-            # Если книга арендована, проверяем срок аренды
-            if transaction.status in [TransactionStatus.RENT_2WEEK, TransactionStatus.RENT_MONTH, TransactionStatus.RENT_3MONTH]:
-                # Вычисляем срок окончания аренды
-                if transaction.status == TransactionStatus.RENT_2WEEK:
-                    rent_duration = timedelta(weeks=2)
-                elif transaction.status == TransactionStatus.RENT_MONTH:
-                    rent_duration = timedelta(days=30)
-                elif transaction.status == TransactionStatus.RENT_3MONTH:
-                    rent_duration = timedelta(days=90)
-                
-                # Проверяем, не истек ли срок аренды
-                if datetime.now() < transaction.date_buy + rent_duration:
-                    return transaction
-        
-        # Если активных транзакций нет, возвращаем None
-        return None
+        return result.scalar_one_or_none()
+
+    async def create_transaction_if_not_active(self, transaction: UserTransaction) -> Optional[int]:
+        """
+        Создает транзакцию, только если у пользователя нет активной покупки/аренды книги
+        (INSERT ... SELECT ... WHERE NOT EXISTS, без фиксации транзакции).
+
+        :param transaction: Данные транзакции.
+        :return: ID созданной транзакции или None, если книга уже куплена/арендована.
+        """
+        expires_at = transaction.expires_at or calculate_expires_at(transaction.status, transaction.date_buy)
+        active_exists = (
+            select(UserTransactionDB.id)
+            .where(
+                UserTransactionDB.book_id == transaction.book_id,
+                *self._active_transaction_conditions(transaction.user_id, transaction.date_buy)
+            )
+            .exists()
+        )
+        values = select(
+            literal(transaction.user_id, Integer),
+            literal(transaction.book_id, Integer),
+            literal(transaction.date_buy, DateTime),
+            literal(transaction.price, Integer),
+            literal(transaction.status.value, String),
+            literal(expires_at, DateTime),
+        ).where(~active_exists)
+
+        result = await self.db.execute(
+            insert(UserTransactionDB)
+            .from_select(
+                ["user_id", "book_id", "date_buy", "price", "status", "expires_at"],
+                values
+            )
+            .returning(UserTransactionDB.id)
+        )
+        return result.scalar_one_or_none()
     
     async def create_transaction(self, transaction: UserTransaction):
         """Создать транзакцию."""
         print(transaction)
         db_transaction = UserTransactionDB(**transaction.dict())
+        if db_transaction.expires_at is None:
+            db_transaction.expires_at = calculate_expires_at(transaction.status, transaction.date_buy)
         print(db_transaction)
         self.db.add(db_transaction)
         await self.db.commit()
         await self.db.refresh(db_transaction)
         return db_transaction
     
+    async def get_active_transaction_book_ids(self, user_id: int, book_ids: List[int], now: datetime) -> Set[int]:
+        """
+        Возвращает книги из списка, уже купленные или арендованные пользователем.
+
+        :param user_id: ID пользователя.
+        :param book_ids: Список ID книг.
+        :param now: Момент, на который проверяется аренда.
+        :return: Множество ID книг с активной покупкой/арендой.
+        """
+        if not book_ids:
+            return set()
+        result = await self.db.execute(
+            select(UserTransactionDB.book_id)
+            .where(UserTransactionDB.book_id.in_(book_ids), *self._active_transaction_conditions(user_id, now))
+            .distinct()
+        )
+        return set(result.scalars().all())
+
+    async def create_transactions(self, transactions: List[UserTransaction]) -> List[int]:
+        """
+        Создает несколько транзакций одним многострочным INSERT (без фиксации транзакции).
+
+        :param transactions: Данные транзакций.
+        :return: ID созданных транзакций.
+        """
+        result = await self.db.execute(
+            insert(UserTransactionDB)
+            .values([transaction.dict() for transaction in transactions])
+            .returning(UserTransactionDB.id)
+        )
+        return list(result.scalars().all())
+
+    async def claim_expiring_rentals(self, now: datetime, until: datetime, limit: int):
+        """
+        Отмечает пачку аренд, истекающих в окне (now, until], как уведомленные
+        и возвращает их (без фиксации транзакции).
+
+        Строки выбираются диапазонным запросом по индексу expires_at; заблокированные
+        другим экземпляром приложения строки пропускаются (SKIP LOCKED).
+
+        :param now: Начало окна.
+        :param until: Конец окна.
+        :param limit: Размер пачки.
+        :return: Строки (id, user_id, book_id, status, expires_at).
+        """
+        pending_ids = (
+            select(UserTransactionDB.id)
+            .where(
+                UserTransactionDB.expires_at > now,
+                UserTransactionDB.expires_at <= until,
+                UserTransactionDB.notified_at.is_(None)
+            )
+            .order_by(UserTransactionDB.expires_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.db.execute(
+            update(UserTransactionDB)
+            .where(UserTransactionDB.id.in_(pending_ids.scalar_subquery()))
+            .values(notified_at=now)
+            .returning(
+                UserTransactionDB.id,
+                UserTransactionDB.user_id,
+                UserTransactionDB.book_id,
+                UserTransactionDB.status,
+                UserTransactionDB.expires_at
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.all()
+
+    async def get_expiring_rentals(self, now: datetime, until: datetime):
+        """
+        Возвращает аренды, истекающие в окне (now, until].
+
+        :return: Строки (user_id, book_id, expires_at).
+        """
+        result = await self.db.execute(
+            select(UserTransactionDB.user_id, UserTransactionDB.book_id, UserTransactionDB.expires_at)
+            .where(UserTransactionDB.expires_at > now, UserTransactionDB.expires_at <= until)
+        )
+        return result.all()
+
     async def update_user_wallet(self, wallet: UserWalletDB):
         """Обновить баланс пользователя."""
         await self.db.commit()
@@ -106,4 +242,22 @@ class UserRepository:
                 UserTransactionDB.book_id == book_id
             )
         )
+        return result.scalars().all()
+
+    async def get_user_transactions_for_books(self, user_id: int, book_ids: List[int]):
+        """
+        Возвращает все транзакции пользователя сразу для нескольких книг одним запросом.
+
+        :param user_id: ID пользователя.
+        :param book_ids: Список ID книг.
+        :return: Список транзакций по указанным книгам.
+        """
+        if not book_ids:
+            return []
+        result = await self.db.execute(
+            select(UserTransactionDB).where(
+                UserTransactionDB.user_id == user_id,
+                UserTransactionDB.book_id.in_(book_ids)
+            )
+        )
         return result.scalars().all()
\ No newline at end of file
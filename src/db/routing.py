@@ -0,0 +1,68 @@
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+# Выполняется ли сейчас метод, которому достаточно данных с реплики
+_read_only: ContextVar[bool] = ContextVar("db_read_only", default=False)
+
+
+@contextmanager
+def use_replica():
+    """Направляет запросы внутри блока на реплику (если она настроена и сессия не закреплена за основной БД)."""
+    token = _read_only.set(True)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+def read_only(method):
+    """
+    Помечает асинхронный метод репозитория как только читающий.
+
+    Запросы метода могут выполняться на реплике, поэтому его результат может
+    немного отставать от основной БД. Проверки прав и чтение перед записью
+    так помечать нельзя.
+    """
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        with use_replica():
+            return await method(*args, **kwargs)
+    return wrapper
+
+
+class RoutingSession(Session):
+    """
+    Сессия, выбирающая движок для каждого запроса: основной или реплику.
+
+    На реплику уходят только запросы, выполняемые внутри use_replica/read_only.
+    После первой записи (flush или INSERT/UPDATE/DELETE) сессия закрепляется за
+    основной БД до своего закрытия, чтобы дальнейшие чтения видели эти изменения.
+    Используется как sync_session_class у AsyncSession.
+    """
+
+    def __init__(self, *args, primary: Engine, replica: Optional[Engine] = None, **kwargs):
+        """
+        :param primary: Синхронный движок основной БД (AsyncEngine.sync_engine).
+        :param replica: Синхронный движок реплики; если не задан, все запросы идут в основную БД.
+        """
+        super().__init__(*args, **kwargs)
+        self.primary = primary
+        self.replica = replica
+        self.pinned_to_primary = False
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.pinned_to_primary = True
+        if self.replica is not None and _read_only.get() and not self.pinned_to_primary:
+            return self.replica
+        return self.primary
+
+    def close(self):
+        super().close()
+        self.pinned_to_primary = False
@@ -1,6 +1,10 @@
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from src.core.config import settings
+from src.db.pool_metrics import InstrumentedAsyncQueuePool
+from src.db.routing import RoutingSession
 import os
 
 # Загружаем переменные из .env
@@ -12,12 +16,56 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL не найден в .env файле")
 
+
+def create_engine_from_settings(url: str):
+    """
+    Создает асинхронный движок с параметрами пула и соединений из настроек.
+
+    :param url: Адрес базы данных.
+    :return: Асинхронный движок с пулом InstrumentedAsyncQueuePool.
+    """
+    connect_args = {}
+    if make_url(url).get_driver_name() == "asyncpg":
+        connect_args["statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+        connect_args["prepared_statement_cache_size"] = settings.DB_STATEMENT_CACHE_SIZE
+        if settings.DB_STATEMENT_TIMEOUT_MS:
+            connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+
+    return create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
 # Создаем асинхронный движок
-engine = create_async_engine(DATABASE_URL, echo=True)
+engine = create_engine_from_settings(DATABASE_URL)
+# Движок реплики для только читающих запросов (см. src.db.routing)
+replica_engine = create_engine_from_settings(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
 
 # Создаем асинхронную сессию
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+AsyncSessionLocal = sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    primary=engine.sync_engine,
+    replica=replica_engine.sync_engine if replica_engine is not None else None,
+    expire_on_commit=False,
+)
 
 async def get_db():
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+def get_pool_metrics() -> dict:
+    """Возвращает метрики пула соединений с основной БД (и с репликой в ключе "replica", если она настроена)."""
+    metrics = engine.pool.get_metrics()
+    if replica_engine is not None:
+        metrics["replica"] = replica_engine.pool.get_metrics()
+    return metrics
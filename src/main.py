@@ -8,8 +8,29 @@ from src.api.routers.test_router import router as test_router
 from src.api.routers.admin_router import router as admin_router
 from src.api.routers.books_router import router as books_router
 from src.api.routers.purchase_router import router as purchase_router
+from src.core.http_client import init_http_client, close_http_client
+from src.services.parse_pool import start_parse_pool, stop_parse_pool
+from src.services.expiry_scheduler import start_expiry_scheduler, stop_expiry_scheduler
+from src.services.notification_sinks import create_notification_sink
+from src.db.session import AsyncSessionLocal
+from src.core.config import settings
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Общий HTTP-клиент с пулом соединений для запросов к Яндексу
+    await init_http_client()
+    # Пул процессов для разбора PDF/EPUB; воркеры прогреваются до приема запросов
+    await start_parse_pool()
+    # Уведомления об окончании аренды
+    if settings.EXPIRY_SCHEDULER_ENABLED:
+        await start_expiry_scheduler(AsyncSessionLocal, create_notification_sink())
+    yield
+    await stop_expiry_scheduler()
+    await stop_parse_pool()
+    await close_http_client()
+
+app = FastAPI(lifespan=lifespan)
 
 # Подключаем роутер для авторизации
 app.include_router(auth_router)
@@ -6,10 +6,19 @@ from src.db.models.user_models import User, UserDB
 from src.db.models.token_models import Token
 from src.db.session import get_db
 from src.core.config import settings
+from src.core.http_client import get_http_client, get_with_retry
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from src.db.repositories.user_repo import UserRepository
+from src.core.security import (
+    REFRESH_TOKEN_TYPE,
+    create_access_token,
+    create_refresh_token,
+    decode_session_token,
+    hash_token,
+    identity_cache,
+)
 # Загружаем переменные окружения
 load_dotenv()
 
@@ -19,7 +28,7 @@ YANDEX_CLIENT_SECRET = os.getenv("YANDEX_CLIENT_SECRET")
 YANDEX_REDIRECT_URI = os.getenv("YANDEX_REDIRECT_URI")
 YANDEX_AUTH_URL = "https://oauth.yandex.ru/authorize"
 YANDEX_TOKEN_URL = "https://oauth.yandex.ru/token"
-YANDEX_USER_INFO_URL = "https://login.yandex.ru/info"
+YANDEX_USER_INFO_URL = settings.YANDEX_USER_INFO_URL
 
 class AuthService:
     @staticmethod
@@ -28,48 +37,48 @@ class AuthService:
 
     @staticmethod
     async def get_yandex_token(code: str) -> Token:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                YANDEX_TOKEN_URL,
-                data={
-                    "grant_type": "authorization_code",
-                    "code": code,
-                    "client_id": YANDEX_CLIENT_ID,
-                    "client_secret": YANDEX_CLIENT_SECRET,
-                    "redirect_uri": YANDEX_REDIRECT_URI,
-                },
-            )
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Не удалось получить токен",
-                )
-            token_data = response.json()
-            return Token(
-                access_token=token_data["access_token"],
-                refresh_token=token_data["refresh_token"],
-                token_type=token_data["token_type"],
+        # Код авторизации одноразовый, поэтому запрос не повторяем
+        client = get_http_client()
+        response = await client.post(
+            YANDEX_TOKEN_URL,
+            data={
+                "grant_type": "authorization_code",
+                "code": code,
+                "client_id": YANDEX_CLIENT_ID,
+                "client_secret": YANDEX_CLIENT_SECRET,
+                "redirect_uri": YANDEX_REDIRECT_URI,
+            },
+        )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Не удалось получить токен",
             )
+        token_data = response.json()
+        return Token(
+            access_token=token_data["access_token"],
+            refresh_token=token_data["refresh_token"],
+            token_type=token_data["token_type"],
+        )
 
     @staticmethod
     async def get_yandex_user_info(access_token: str) -> User:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                YANDEX_USER_INFO_URL,
-                headers={"Authorization": f"OAuth {access_token}"},
-            )
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Не удалось получить данные пользователя",
-                )
-            user_data = response.json()
-            return User(
-                id=user_data["id"],  # Используем ID от Яндекс
-                login=user_data["default_email"],  # Используем email как логин
-                email=user_data["default_email"],
-                yandex_id=user_data["id"],
+        response = await get_with_retry(
+            YANDEX_USER_INFO_URL,
+            headers={"Authorization": f"OAuth {access_token}"},
+        )
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Не удалось получить данные пользователя",
             )
+        user_data = response.json()
+        return User(
+            id=user_data["id"],  # Используем ID от Яндекс
+            login=user_data["default_email"],  # Используем email как логин
+            email=user_data["default_email"],
+            yandex_id=user_data["id"],
+        )
     
     @staticmethod
     async def save_or_update_user(db: AsyncSession, yandex_id: str, login: str, email: str, access_token: str, refresh_token:str):
@@ -90,4 +99,80 @@ class AuthService:
             # Создаём кошелёк с начальным балансом.
             await repo.create_user_wallet(user_id=created_user.id)
             return created_user
-        return await repo.update_user(user=user)
\ No newline at end of file
+        user = await repo.update_user(user=user)
+        # Данные пользователя изменились, поэтому сбрасываем его снимок в кэше
+        identity_cache.invalidate(str(yandex_id))
+        return user
+
+    @staticmethod
+    async def issue_session_tokens(db: AsyncSession, user: UserDB) -> Token:
+        """
+        Выдает пользователю пару собственных токенов сервиса.
+
+        В БД сохраняется хэш refresh-токена: предыдущий refresh-токен при этом
+        становится недействительным.
+
+        :param db: Сессия БД.
+        :param user: Пользователь.
+        :return: Access- и refresh-токены.
+        """
+        access_token = create_access_token(user)
+        refresh_token = create_refresh_token(user)
+        user.refresh_token = hash_token(refresh_token)
+        await UserRepository(db).update_user(user=user)
+        return Token(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            token_type="bearer",
+        )
+
+    @staticmethod
+    async def refresh_session(db: AsyncSession, refresh_token: str) -> Token:
+        """
+        Обменивает refresh-токен на новую пару токенов (ротация).
+
+        :param db: Сессия БД.
+        :param refresh_token: Текущий refresh-токен.
+        :return: Новые access- и refresh-токены.
+        """
+        payload = decode_session_token(refresh_token, REFRESH_TOKEN_TYPE)
+        if not payload:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Неверный refresh токен",
+            )
+
+        repo = UserRepository(db)
+        user = await repo.get_user_by_id(int(payload["sub"]))
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Неверный refresh токен",
+            )
+
+        if user.refresh_token != hash_token(refresh_token):
+            # Токен уже был ротирован или отозван: повторное использование
+            # считаем компрометацией и отзываем текущую сессию пользователя
+            if user.refresh_token is not None:
+                user.refresh_token = None
+                await repo.update_user(user=user)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh токен отозван",
+            )
+
+        return await AuthService.issue_session_tokens(db, user)
+
+    @staticmethod
+    async def revoke_session(db: AsyncSession, user_id: int):
+        """
+        Отзывает refresh-токен пользователя.
+
+        :param db: Сессия БД.
+        :param user_id: ID пользователя.
+        """
+        repo = UserRepository(db)
+        user = await repo.get_user_by_id(user_id)
+        if user and user.refresh_token is not None:
+            user.refresh_token = None
+            await repo.update_user(user=user)
\ No newline at end of file
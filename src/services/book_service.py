@@ -1,19 +1,45 @@
 from datetime import datetime, timedelta
 from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.db.models.book_models import BookPrice, Book, BookPriceDB, BookWithPrice, BookDB, BookContentDB, PaginatedBooksResponse
-from src.db.models.user_models import UserWalletDB, UserDB
+from src.db.models.book_models import BookPrice, Book, BookPriceDB, BookWithPrice, BookDB, BookContentDB, PaginatedBooksResponse, TotalMode
+from src.db.models.user_models import UserWalletDB, UserDB, CurrentUser
 from src.db.models.feed_models import FeedBook, FeedBookStatus
-from src.db.models.transaction_models import TransactionStatus, UserTransaction, UserTransactionDB
+from src.db.models.transaction_models import TransactionStatus, UserTransaction, UserTransactionDB, PurchaseItem, PRICE_FIELDS, calculate_expires_at
 from src.db.repositories.book_repo import BookRepository
 from src.db.repositories.user_repo import UserRepository
 from src.db.repositories.content_repo import ContentRepository
+from src.db.repositories.idempotency_repo import IdempotencyRepository
 from src.db.session import get_db
+from src.core.config import settings
+from src.services import catalog_import, document_reader, page_store, storage_service
+from src.services.catalog_import import ImportFormat
+from src.services.storage_service import StoredUpload
+from src.services.document_reader import PageOutOfRangeError
+from src.services import parse_pool
+from src.services.parse_pool import run_in_parse_pool, ParsePoolBusyError, ParseTimeoutError
+from src.utils.cache import TTLCache
+import asyncio
+import hashlib
+import json
 import os
-from PyPDF2 import PdfReader
-from ebooklib import epub
-from ebooklib import ITEM_DOCUMENT
-from typing import List, Tuple, Optional
+from typing import AsyncIterator, Dict, List, Tuple, Optional
+
+# Кэш текста страниц книг (в том числе предзагруженных) по (ID книги, файл, номер страницы)
+page_cache = TTLCache(maxsize=settings.PAGE_CACHE_MAXSIZE, ttl=settings.PAGE_CACHE_TTL)
+
+# Последняя прочитанная страница по (ID пользователя, ID книги) — для определения последовательного чтения
+reading_positions = TTLCache(maxsize=settings.READ_POSITION_CACHE_MAXSIZE, ttl=settings.READ_POSITION_TTL)
+
+# Выполняющиеся задачи предзагрузки страниц
+_prefetch_tasks: Dict[tuple, asyncio.Future] = {}
+
+
+def _page_store_key(content: BookContentDB) -> str:
+    # Книги, загруженные до хранилища по хешу, лежат в хранилище страниц под своим ID
+    return content.content_hash or str(content.book_id)
 
 class BookService:
     def __init__(self, db: AsyncSession):
@@ -21,6 +47,7 @@ class BookService:
         self.book_repo = BookRepository(db)
         self.user_repo = UserRepository(db)
         self.content_repo = ContentRepository(db)
+        self.idempotency_repo = IdempotencyRepository(db)
     
     async def update_book(self, book_id: int, updated_data: dict):
         """
@@ -32,7 +59,7 @@ class BookService:
         """
         return await self.book_repo.update_book(book_id, updated_data)
 
-    async def get_book_page(self, user: UserDB, book_id: int, page: int):
+    async def get_book_page(self, user: CurrentUser, book_id: int, page: int):
         """
         Получить страницу книги с проверкой доступа.
         
@@ -41,6 +68,64 @@ class BookService:
         :param page: Номер страницы.
         :return: Содержимое страницы или ошибка.
         """
+        content = await self._get_readable_content(user, book_id)
+        text = await self._read_content_page(content, page)
+        self._track_reading(user.id, content, page, page)
+        return {"page": page, "content": text}
+
+    async def stream_book_pages(self, user: CurrentUser, book_id: int, page_from: int, page_to: int) -> AsyncIterator[str]:
+        """
+        Читает диапазон страниц книги с одной проверкой доступа.
+
+        Первая страница читается сразу, чтобы ошибки доступа и номера страницы
+        вернулись обычным HTTP-ответом. Остальные страницы отдаются по мере чтения.
+
+        :param user: Текущий пользователь.
+        :param book_id: ID книги.
+        :param page_from: Первая страница диапазона.
+        :param page_to: Последняя страница диапазона (включительно).
+        :return: Асинхронный генератор строк NDJSON ({"page": N, "content": "..."}).
+        """
+        if page_to < page_from:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Некорректный диапазон страниц.")
+        if page_to - page_from + 1 > settings.READ_RANGE_MAX_PAGES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"За один запрос можно прочитать не более {settings.READ_RANGE_MAX_PAGES} страниц."
+            )
+
+        content = await self._get_readable_content(user, book_id)
+        if content.page_count is not None:
+            page_to = min(page_to, content.page_count - 1)
+        first_page = await self._read_content_page(content, page_from)
+        self._track_reading(user.id, content, page_from, page_to)
+
+        async def pages() -> AsyncIterator[str]:
+            yield json.dumps({"page": page_from, "content": first_page}, ensure_ascii=False) + "\n"
+            for page in range(page_from + 1, page_to + 1):
+                try:
+                    text = await self._read_content_page(content, page)
+                except HTTPException as e:
+                    # Для книг без индекса страниц конец книги узнаем только при чтении
+                    if e.status_code != status.HTTP_400_BAD_REQUEST:
+                        yield json.dumps({"page": page, "error": e.detail}, ensure_ascii=False) + "\n"
+                    return
+                yield json.dumps({"page": page, "content": text}, ensure_ascii=False) + "\n"
+
+        return pages()
+
+    async def get_book_file(self, user: CurrentUser, book_id: int) -> BookContentDB:
+        """
+        Возвращает исходный файл книги для скачивания с проверкой доступа.
+
+        :param user: Текущий пользователь.
+        :param book_id: ID книги.
+        :return: Содержимое книги (путь к файлу и хеш).
+        """
+        return await self._get_readable_content(user, book_id)
+
+    async def _get_readable_content(self, user: CurrentUser, book_id: int) -> BookContentDB:
+        """Проверяет право пользователя на чтение книги и возвращает ее содержимое."""
         # Проверяем права доступа к книге
         if not await self.is_book_accessible(user.id, book_id):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="У вас нет прав на чтение этой книги.")
@@ -49,21 +134,201 @@ class BookService:
         content = await self.content_repo.get_content_by_book_id(book_id)
         if not content or not content.url_content:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Содержимое книги не найдено.")
-        
+        return content
+
+    @classmethod
+    async def _read_content_page(cls, content: BookContentDB, page: int) -> str:
+        """
+        Читает текст страницы книги без проверки доступа.
+
+        :param content: Содержимое книги.
+        :param page: Номер страницы.
+        :return: Текст страницы.
+        """
+        cache_key = (content.book_id, content.url_content, page)
+        found, text = page_cache.lookup(cache_key)
+        if found:
+            return text
+
+        # Текст страниц извлечен при загрузке: номер проверяем по page_count, страницу берем срезом
+        if content.page_count is not None:
+            if page < 0 or page >= content.page_count:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Недопустимый номер страницы.")
+            try:
+                text = await run_in_threadpool(page_store.read_page, _page_store_key(content), page)
+                page_cache.set(cache_key, text)
+                return text
+            except (FileNotFoundError, IndexError):
+                # Хранилища страниц нет или page_count в БД не совпадает с ним — читаем из исходного файла
+                pass
+
         # Читаем страницу из файла
         try:
             file_extension = os.path.splitext(content.url_content)[1].lower()
             if file_extension == ".pdf":
-                text = await self._read_pdf_page(content.url_content, page)
+                text = await cls._read_pdf_page(content.url_content, page)
             elif file_extension == ".epub":
-                text = await self._read_epub_page(content.url_content, page)
+                text = await cls._read_epub_page(content.url_content, page)
             else:
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Неподдерживаемый формат файла.")
-            
-            return {"page": page, "content": text}
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Ошибка при чтении книги: {str(e)}")
 
+        page_cache.set(cache_key, text)
+        return text
+
+    @classmethod
+    def _track_reading(cls, user_id: int, content: BookContentDB, page_from: int, page_to: int):
+        """
+        Запоминает позицию чтения и при последовательном чтении прогревает
+        следующие READ_PREFETCH_PAGES страниц в фоне.
+        """
+        position_key = (user_id, content.book_id)
+        previous_to = reading_positions.get(position_key)
+        reading_positions.set(position_key, page_to)
+
+        if settings.READ_PREFETCH_PAGES <= 0 or previous_to is None or page_from != previous_to + 1:
+            return
+        # Без индекса страниц каждая страница разбирается в пуле процессов — его места нужнее читателям
+        if content.page_count is None:
+            return
+
+        last_page = min(page_to + settings.READ_PREFETCH_PAGES, content.page_count - 1)
+        for page in range(page_to + 1, last_page + 1):
+            cache_key = (content.book_id, content.url_content, page)
+            if cache_key in _prefetch_tasks or page_cache.lookup(cache_key)[0]:
+                continue
+            task = asyncio.ensure_future(cls._prefetch_page(content, page))
+            _prefetch_tasks[cache_key] = task
+            task.add_done_callback(lambda _, key=cache_key: _prefetch_tasks.pop(key, None))
+
+    @classmethod
+    async def _prefetch_page(cls, content: BookContentDB, page: int):
+        # Если страницу придется разбирать из файла, оставляем хотя бы одно место пула читателям
+        if not page_store.has_pages(_page_store_key(content)) and not parse_pool.has_free_slots(reserved=1):
+            return
+        try:
+            await cls._read_content_page(content, page)
+        except Exception:
+            pass  # Предзагрузка не должна влиять на ответы пользователю
+
+    async def store_book_file(self, stored: StoredUpload, extension: str) -> Tuple[str, int]:
+        """
+        Помещает загруженный файл книги в хранилище по хешу содержимого.
+
+        Текст страниц извлекается до размещения файла, поэтому поврежденный файл
+        отклоняется, не попадая в хранилище. Если такой же файл уже загружался,
+        повторно не сохраняется ни файл, ни текст его страниц.
+
+        :param stored: Временный файл загрузки.
+        :param extension: Расширение файла книги.
+        :return: Путь к файлу в хранилище и количество страниц.
+        """
+        page_count = None
+        if storage_service.blob_exists(stored.sha256, extension):
+            page_count = page_store.get_page_count(stored.sha256)
+        if page_count is None:
+            page_count = await self.index_book_pages(stored.sha256, stored.path)
+
+        file_path = await run_in_threadpool(storage_service.store_blob, stored.path, stored.sha256, extension)
+        return file_path, page_count
+
+    async def collect_storage_garbage(self) -> dict:
+        """
+        Удаляет файлы книг (и текст их страниц), на которые не ссылается ни одна книга.
+
+        :return: Статистика удаления.
+        """
+        referenced_hashes = await self.content_repo.get_referenced_hashes()
+        result = await run_in_threadpool(
+            storage_service.collect_garbage, referenced_hashes, settings.BLOB_GC_GRACE_SECONDS
+        )
+        for content_hash in result["removed_hashes"]:
+            await run_in_threadpool(page_store.delete_pages, content_hash)
+        return result
+
+    async def index_book_pages(self, key: str, file_path: str) -> int:
+        """
+        Извлекает текст всех страниц книги и сохраняет его в хранилище страниц.
+
+        :param key: Ключ книги в хранилище страниц (хеш содержимого файла).
+        :param file_path: Путь к загруженному файлу книги.
+        :return: Количество страниц.
+        """
+        try:
+            pages = await run_in_parse_pool(
+                document_reader.extract_pages, file_path, timeout=settings.PARSE_EXTRACT_TIMEOUT
+            )
+        except ParsePoolBusyError:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Сервер перегружен, повторите загрузку позже.")
+        except ParseTimeoutError:
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Превышено время разбора файла книги.")
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Не удалось разобрать файл книги: {str(e)}")
+        page_count = await run_in_threadpool(page_store.write_pages, key, pages)
+        page_cache.clear()
+        return page_count
+
+    async def import_books(self, chunks: AsyncIterator[bytes], import_format: ImportFormat) -> AsyncIterator[str]:
+        """
+        Импортирует каталог книг из потока CSV или JSON Lines.
+
+        Строки разбираются по мере чтения тела запроса и вставляются пачками
+        по IMPORT_BATCH_SIZE книг; каждая пачка — отдельная транзакция, поэтому
+        при сбое уже зафиксированные пачки сохраняются. Ошибочные строки
+        пропускаются и попадают в отчет (не более IMPORT_MAX_REPORTED_ERRORS).
+
+        :param chunks: Асинхронный поток блоков тела запроса.
+        :param import_format: Формат тела запроса.
+        :return: Асинхронный генератор строк NDJSON: ошибки строк ({"line", "error"}),
+            прогресс после каждой пачки ({"batch", "imported", "failed", "line"})
+            и итог ({"done", "imported", "failed"}).
+        """
+        imported = 0
+        failed = 0
+        batch_number = 0
+        batch: List[catalog_import.ParsedRow] = []
+
+        def event(data: dict) -> str:
+            return json.dumps(data, ensure_ascii=False) + "\n"
+
+        async def flush() -> str:
+            nonlocal imported, batch_number
+            try:
+                await self.book_repo.bulk_insert_books([parsed.row for parsed in batch])
+                await self.db.commit()
+            except SQLAlchemyError as e:
+                await self.db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Не удалось сохранить строки {batch[0].line}-{batch[-1].line}: {e.__class__.__name__}"
+                )
+            imported += len(batch)
+            batch_number += 1
+            last_line = batch[-1].line
+            batch.clear()
+            return event({"batch": batch_number, "imported": imported, "failed": failed, "line": last_line})
+
+        try:
+            async for parsed in catalog_import.iter_rows(chunks, import_format):
+                if parsed.error is not None:
+                    failed += 1
+                    if failed <= settings.IMPORT_MAX_REPORTED_ERRORS:
+                        yield event({"line": parsed.line, "error": parsed.error})
+                    continue
+                batch.append(parsed)
+                if len(batch) >= settings.IMPORT_BATCH_SIZE:
+                    yield await flush()
+            if batch:
+                yield await flush()
+        except HTTPException as e:
+            # Заголовки ответа уже отправлены — сообщаем об ошибке последней строкой потока
+            yield event({"done": False, "imported": imported, "failed": failed, "error": e.detail})
+            return
+        yield event({"done": True, "imported": imported, "failed": failed})
+
     async def is_book_accessible(self, user_id: int, book_id: int) -> bool:
         """
         Проверяет, имеет ли пользователь доступ к книге.
@@ -82,28 +347,9 @@ class BookService:
         if book_price and book_price.price == 0 and book.hidden == False:
             return True
 
-        # Проверяем транзакции пользователя
+        # Проверяем, есть ли у пользователя покупка или действующая аренда
         active_transaction = await self.user_repo.get_active_user_transaction(user_id, book_id)
-        if active_transaction:
-            if active_transaction.status == TransactionStatus.BUY:
-                return True
-            elif active_transaction.status in [
-                TransactionStatus.RENT_2WEEK,
-                TransactionStatus.RENT_MONTH,
-                TransactionStatus.RENT_3MONTH,
-            ]:
-                # Проверяем срок аренды
-                now = datetime.now()
-                if active_transaction.status == TransactionStatus.RENT_2WEEK:
-                    expiration_date = active_transaction.date_buy + timedelta(weeks=2)
-                elif active_transaction.status == TransactionStatus.RENT_MONTH:
-                    expiration_date = active_transaction.date_buy + timedelta(days=30)
-                elif active_transaction.status == TransactionStatus.RENT_3MONTH:
-                    expiration_date = active_transaction.date_buy + timedelta(days=90)
-                
-                return now < expiration_date
-        
-        return False
+        return active_transaction is not None
 
     async def get_all_books_with_prices(self) -> List[BookWithPrice]:
         """
@@ -137,16 +383,20 @@ class BookService:
     async def get_books_with_prices_paginated(
         self,
         page: int = 1,
-        limit: int = 10
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        total_mode: TotalMode = TotalMode.EXACT
     ) -> PaginatedBooksResponse:
         """
         Возвращает книги с ценами с поддержкой пагинации.
         
         :param page: Номер страницы.
         :param limit: Количество элементов на странице.
+        :param cursor: Курсор keyset-пагинации (если передан, page игнорируется).
+        :param total_mode: Способ подсчета общего количества книг.
         :return: Ответ с пагинированным списком книг.
         """
-        total, books = await self.book_repo.get_books_with_prices_paginated(page, limit)
+        total, books, next_cursor = await self.book_repo.get_books_with_prices_paginated(page, limit, cursor, total_mode)
 
         # Преобразуем результаты в список объектов BookWithPrice
         book_list = []
@@ -171,22 +421,26 @@ class BookService:
         print(total, type(total))
         return PaginatedBooksResponse(
             total=total,
+            total_estimated=total_mode == TotalMode.ESTIMATE,
             page=page,
             limit=limit,
-            books=book_list
+            books=book_list,
+            next_cursor=next_cursor
         )
 
     async def get_filtered_feed_books(
         self,
-        user: UserDB,
+        user: CurrentUser,
         categories: Optional[List[str]] = None,
         authors: Optional[List[str]] = None,
         year_from: Optional[int] = None,
         year_to: Optional[int] = None,
         open_for_read: Optional[bool] = None,
         page: int = 1,
-        limit: int = 10
-    ) -> Tuple[int, List[FeedBook]]:
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        total_mode: TotalMode = TotalMode.EXACT
+    ) -> Tuple[int, List[FeedBook], Optional[str]]:
         """
         Возвращает отфильтрованную ленту книг для пользователя.
 
@@ -198,9 +452,11 @@ class BookService:
         :param open_for_read: Фильтр по доступности для чтения.
         :param page: Номер страницы.
         :param limit: Количество элементов на странице.
-        :return: Общее количество книг и список книг.
+        :param cursor: Курсор keyset-пагинации (если передан, page игнорируется).
+        :param total_mode: Способ подсчета общего количества книг.
+        :return: Общее количество книг, список книг и курсор следующей страницы.
         """
-        total, books = await self.book_repo.get_filtered_books(
+        total, books, next_cursor = await self.book_repo.get_filtered_books(
             categories=categories,
             authors=authors,
             year_from=year_from,
@@ -208,9 +464,14 @@ class BookService:
             open_for_read=open_for_read,
             user_id=user.id,
             page=page,
-            limit=limit
+            limit=limit,
+            cursor=cursor,
+            total_mode=total_mode
         )
 
+        # Статусы всех книг страницы определяем одним запросом
+        statuses = await self._resolve_feed_statuses(user.id, books)
+
         feed_books = []
         for book in books:
             price_db = getattr(book, "prices", None)
@@ -222,9 +483,7 @@ class BookService:
                 "price_rent_3month": price_db.price_rent_3month if price_db else None,
             }
 
-            # Определяем статус книги
-            status = await self._get_book_status(user.id, book.id)
-            print(status)
+            status = statuses.get(book.id)
             feed_books.append(FeedBook(
                 book=Book(**book.__dict__),
                 price=BookPrice(**price_data),
@@ -237,157 +496,294 @@ class BookService:
                 status=status
             ))
 
-        return total, feed_books
+        return total, feed_books, next_cursor
 
-    async def _get_book_status(self, user_id: int, book_id: int) -> Optional[str]:
+    async def _resolve_feed_statuses(self, user_id: int, books: List[BookDB]) -> Dict[int, Optional[FeedBookStatus]]:
         """
-        Определяет статус книги для пользователя.
+        Определяет статусы сразу для всех книг страницы ленты.
 
-        :param user_id: ID пользователя.
-        :param book_id: ID книги.
-        :return: Статус книги (FeedBookStatus) или None, если книга платная и не взаимодействована.
-        """
-        # 1. Проверяем, является ли книга бесплатной
-        book_price = await self.book_repo.get_book_price_by_id(book_id)
-        if book_price and book_price.price == 0:
-            return FeedBookStatus.READ_FREE
+        Цены берутся из уже загруженной связи `prices`, а транзакции пользователя
+        по всем книгам страницы читаются одним запросом.
 
-        # 2. Проверяем транзакции пользователя для данной книги
-        active_transaction = await self.user_repo.get_active_user_transaction(user_id, book_id)
-        if active_transaction:
-            if active_transaction.status == TransactionStatus.BUY:
-                return FeedBookStatus.BUY
-
-            elif active_transaction.status in [
-                TransactionStatus.RENT_2WEEK,
-                TransactionStatus.RENT_MONTH,
-                TransactionStatus.RENT_3MONTH,
-            ]:
-                # Рассчитываем дату окончания аренды
-                expiration_date = self._calculate_expiration_date(
-                    active_transaction.status, active_transaction.date_buy
-                )
-
-                if datetime.now() < expiration_date:
-                    # Аренда еще действует
-                    return active_transaction.status  # Возвращаем строковое значение статуса
-                else:
-                    # Срок аренды истек
-                    return FeedBookStatus.RENT_END
-
-        # 3. Если книга платная и нет активных транзакций, возвращаем None
-        return None
-
-    @staticmethod
-    def _calculate_expiration_date(status: str, date_buy: datetime) -> datetime:
+        :param user_id: ID пользователя.
+        :param books: Книги текущей страницы (с загруженными ценами).
+        :return: Словарь {ID книги: статус (FeedBookStatus) или None}.
         """
-        Вычисляет дату окончания аренды.
+        statuses: Dict[int, Optional[FeedBookStatus]] = {}
+        paid_book_ids = []
 
-        :param status: Статус транзакции.
-        :param date_buy: Дата покупки/аренды.
-        :return: Дата окончания аренды.
-        """
-        if status == TransactionStatus.RENT_2WEEK:
-            return date_buy + timedelta(weeks=2)
-        elif status == TransactionStatus.RENT_MONTH:
-            return date_buy + timedelta(days=30)
-        elif status == TransactionStatus.RENT_3MONTH:
-            return date_buy + timedelta(days=90)
-        return date_buy
+        # 1. Бесплатные книги определяем по уже загруженным ценам
+        for book in books:
+            price_db = getattr(book, "prices", None)
+            if price_db and price_db.price == 0:
+                statuses[book.id] = FeedBookStatus.READ_FREE
+            else:
+                statuses[book.id] = None
+                paid_book_ids.append(book.id)
+
+        # 2. Транзакции пользователя по всем платным книгам страницы
+        transactions = await self.user_repo.get_user_transactions_for_books(user_id, paid_book_ids)
+
+        now = datetime.now()
+        active_expirations: Dict[int, datetime] = {}
+        for transaction in transactions:
+            book_id = transaction.book_id
+            if statuses[book_id] == FeedBookStatus.BUY:
+                continue
+
+            if transaction.status == TransactionStatus.BUY:
+                statuses[book_id] = FeedBookStatus.BUY
+                continue
+
+            expiration_date = transaction.expires_at
+            if expiration_date is not None and now < expiration_date:
+                # Аренда еще действует: оставляем аренду с самым поздним сроком окончания
+                if book_id not in active_expirations or expiration_date > active_expirations[book_id]:
+                    active_expirations[book_id] = expiration_date
+                    statuses[book_id] = FeedBookStatus(transaction.status)
+            elif book_id not in active_expirations:
+                # Срок аренды истек
+                statuses[book_id] = FeedBookStatus.RENT_END
+
+        return statuses
 
     @staticmethod
     async def _read_pdf_page(file_path: str, page: int) -> str:
-        """Чтение страницы PDF."""
-        from PyPDF2 import PdfReader
-        reader = PdfReader(file_path)
-        if page < 0 or page >= len(reader.pages):
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Недопустимый номер страницы.")
-        return reader.pages[page].extract_text()
+        """Чтение страницы PDF в пуле процессов (разобранный документ берется из кэша воркера)."""
+        return await BookService._run_read_job(document_reader.read_pdf_page, file_path, page)
 
     @staticmethod
     async def _read_epub_page(file_path: str, page: int) -> str:
-        """Чтение страницы EPUB."""
-        from ebooklib import epub
-        book = epub.read_epub(file_path)
-        items = list(book.get_items_of_type(ITEM_DOCUMENT))
-        print(file_path)
-        print(items)
-        print(len(items), page)
-        if page < 0 or page >= len(items):
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Недопустимый номер страницы.")
-        return items[page].get_body_content().decode("utf-8")
+        """Чтение страницы EPUB в пуле процессов (разобранный документ берется из кэша воркера)."""
+        return await BookService._run_read_job(document_reader.read_epub_page, file_path, page)
 
-    async def purchase_or_rent_book(self, user_id: int, book_id: int, action: str):
+    @staticmethod
+    async def _run_read_job(func, file_path: str, page: int) -> str:
+        try:
+            # Страницы одной книги читаются в одном воркере, где документ уже в кэше
+            return await run_in_parse_pool(func, file_path, page, key=file_path)
+        except PageOutOfRangeError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Недопустимый номер страницы.")
+        except ParsePoolBusyError:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Сервер перегружен, повторите запрос позже.",
+                headers={"Retry-After": "1"},
+            )
+        except ParseTimeoutError:
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Превышено время чтения страницы книги.")
+
+    async def purchase_or_rent_book(self, user_id: int, book_id: int, action: str, idempotency_key: Optional[str] = None):
         """
         Покупка или аренда книги.
         
         :param user_id: ID пользователя
         :param book_id: ID книги
         :param action: Действие (покупка или аренда)
+        :param idempotency_key: Ключ идемпотентности: повтор запроса с тем же ключом получает сохраненный ответ
         :return: Результат операции
         """
-        # Получаем информацию о книге и ее цене
-        book = await self.book_repo.get_book_by_id(book_id)
-        if not book:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Книга не найдена")
+        fingerprint = self._request_fingerprint("purchase", book_id, action)
+        if idempotency_key:
+            stored_response = await self._get_stored_response(user_id, idempotency_key, fingerprint)
+            if stored_response is not None:
+                return stored_response
+
+        # Действие совпадает со статусом транзакции
+        try:
+            transaction_status = TransactionStatus(action)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Неверное действие")
+
+        # Получаем книгу и ее цену одним запросом
+        book, book_price = await self.book_repo.get_book_with_price(book_id)
+
+        transaction = self._build_transaction(user_id, book, book_price, transaction_status, datetime.now())
+        price = transaction.price
+
+        # Списание и создание транзакции выполняются в одной транзакции БД:
+        # условный UPDATE кошелька блокирует его строку, поэтому параллельные покупки
+        # не уводят баланс в минус и не создают двух активных транзакций на одну книгу
+        try:
+            key_id = await self._claim_idempotency_key(user_id, idempotency_key, fingerprint)
+            if key_id is None and idempotency_key:
+                await self.db.rollback()
+                return await self._get_stored_response(user_id, idempotency_key, fingerprint, required=True)
+
+            await self._debit_wallet(user_id, price)
+
+            transaction_id = await self.user_repo.create_transaction_if_not_active(transaction)
+            if transaction_id is None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Книга уже куплена/арендована")
+
+            response = jsonable_encoder({"message": "Книга успешно куплена/арендована", "transaction": transaction})
+            if key_id is not None:
+                await self.idempotency_repo.save_response(key_id, response)
+            await self.db.commit()
+        except BaseException:
+            await self.db.rollback()
+            raise
+
+        return response
+
+    async def purchase_or_rent_books(self, user_id: int, items: List[PurchaseItem], idempotency_key: Optional[str] = None):
+        """
+        Покупка или аренда нескольких книг (корзина) в одной транзакции БД.
+
+        Цены всех книг читаются одним запросом, кошелек списывается один раз на
+        общую сумму, транзакции создаются одним многострочным INSERT. Если хотя бы
+        одну книгу купить нельзя, не покупается ни одна.
 
+        :param user_id: ID пользователя
+        :param items: Книги и действия (покупка или аренда)
+        :param idempotency_key: Ключ идемпотентности: повтор запроса с тем же ключом получает сохраненный ответ
+        :return: Результат операции
+        """
+        # Порядок книг в корзине не важен: повтор с переставленными книгами — тот же запрос
+        fingerprint = self._request_fingerprint("batch", *sorted((item.book_id, item.action.value) for item in items))
+        if idempotency_key:
+            stored_response = await self._get_stored_response(user_id, idempotency_key, fingerprint)
+            if stored_response is not None:
+                return stored_response
+
+        book_ids = [item.book_id for item in items]
+        if len(set(book_ids)) != len(book_ids):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Книга указана в корзине несколько раз")
+
+        # Получаем книги и их цены одним запросом
+        books = await self.book_repo.get_books_with_prices(book_ids)
+        missing_ids = [book_id for book_id in book_ids if book_id not in books]
+        if missing_ids:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Книги не найдены: {missing_ids}")
+
+        date_buy = datetime.now()
+        transactions = [
+            self._build_transaction(user_id, *books[item.book_id], item.action, date_buy)
+            for item in items
+        ]
+        total_price = sum(transaction.price for transaction in transactions)
+
+        try:
+            key_id = await self._claim_idempotency_key(user_id, idempotency_key, fingerprint)
+            if key_id is None and idempotency_key:
+                await self.db.rollback()
+                return await self._get_stored_response(user_id, idempotency_key, fingerprint, required=True)
+
+            # Списание блокирует строку кошелька: активные транзакции проверяем уже под блокировкой
+            balance = await self._debit_wallet(user_id, total_price)
+
+            owned_ids = await self.user_repo.get_active_transaction_book_ids(user_id, book_ids, date_buy)
+            if owned_ids:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Книги уже куплены/арендованы: {sorted(owned_ids)}"
+                )
+
+            await self.user_repo.create_transactions(transactions)
+
+            response = jsonable_encoder({
+                "message": "Книги успешно куплены/арендованы",
+                "total_price": total_price,
+                "balance": balance,
+                "transactions": transactions
+            })
+            if key_id is not None:
+                await self.idempotency_repo.save_response(key_id, response)
+            await self.db.commit()
+        except BaseException:
+            await self.db.rollback()
+            raise
+
+        return response
+
+    @staticmethod
+    def _build_transaction(
+        user_id: int,
+        book: BookDB,
+        book_price: Optional[BookPriceDB],
+        transaction_status: TransactionStatus,
+        date_buy: datetime
+    ) -> UserTransaction:
+        """
+        Проверяет, что книгу можно купить/арендовать, и формирует транзакцию по ее цене.
+
+        :param user_id: ID пользователя.
+        :param book: Книга.
+        :param book_price: Цены книги.
+        :param transaction_status: Действие (статус транзакции).
+        :param date_buy: Дата покупки/аренды.
+        :return: Данные транзакции.
+        """
         # Проверяем, скрыта ли книга
         if book.hidden:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Книга скрыта и недоступна для покупки/аренды")
 
-        # Получаем цену книги
-        book_price = await self.book_repo.get_book_price_by_id(book_id)
         if not book_price:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Цена книги не найдена")
 
-        # Определяем стоимость в зависимости от действия
-        if action == "buy":
-            price = book_price.price
-            transaction_status = TransactionStatus.BUY
-        elif action == "rent_2week":
-            price = book_price.price_rent_2week
-            transaction_status = TransactionStatus.RENT_2WEEK
-        elif action == "rent_month":
-            price = book_price.price_rent_month
-            transaction_status = TransactionStatus.RENT_MONTH
-        elif action == "rent_3month":
-            price = book_price.price_rent_3month
-            transaction_status = TransactionStatus.RENT_3MONTH
-        else:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Неверное действие")
-
-        # Проверяем, что цена не равна 0
-        if price == 0:
+        # Стоимость зависит от действия; нулевая или не заданная цена — действие недоступно
+        price = getattr(book_price, PRICE_FIELDS[transaction_status])
+        if not price:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Книга недоступна для покупки/аренды")
 
-        # Получаем баланс пользователя
-        user_wallet = await self.user_repo.get_user_wallet(user_id)
-        if not user_wallet:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Кошелек пользователя не найден")
+        return UserTransaction(
+            user_id=user_id,
+            book_id=book.id,
+            date_buy=date_buy,
+            price=price,
+            status=transaction_status,
+            expires_at=calculate_expires_at(transaction_status, date_buy)
+        )
 
-        # Проверяем, хватает ли средств у пользователя
-        if user_wallet.account < price:
+    async def _debit_wallet(self, user_id: int, amount: int) -> int:
+        """Списывает сумму с кошелька (без фиксации транзакции) и возвращает новый баланс."""
+        balance = await self.user_repo.debit_wallet(user_id, amount)
+        if balance is None:
+            if not await self.user_repo.get_user_wallet(user_id):
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Кошелек пользователя не найден")
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Недостаточно средств на балансе")
+        return balance
 
-        # Проверяем, не купил ли пользователь уже эту книгу
-        existing_transaction = await self.user_repo.get_active_user_transaction(user_id, book_id)
-        if existing_transaction:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Книга уже куплена/арендована")
+    @staticmethod
+    def _request_fingerprint(*parts) -> str:
+        """Хеш параметров запроса: ключ идемпотентности нельзя переиспользовать для другого запроса."""
+        return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()
 
-        # Создаем транзакцию
-        transaction = UserTransaction(
-            user_id=user_id,
-            book_id=book_id,
-            date_buy=datetime.now(),
-            price=price,
-            status=transaction_status
-        )
+    async def _get_stored_response(
+        self, user_id: int, idempotency_key: str, fingerprint: str, required: bool = False
+    ) -> Optional[dict]:
+        """
+        Возвращает сохраненный ответ на запрос с тем же ключом идемпотентности.
 
-        # Обновляем баланс пользователя
-        user_wallet.account -= price
+        :param required: Ключ точно занят (параллельный запрос): ответа нет, только если тот запрос не завершился.
+        :return: Сохраненный ответ или None, если ключ еще не использовался.
+        """
+        created_after = datetime.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+        stored = await self.idempotency_repo.get_key(user_id, idempotency_key, created_after)
+        if stored is None or stored.response is None:
+            if required:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Запрос с этим Idempotency-Key еще выполняется")
+            return None
+        if stored.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key уже использован для другого запроса"
+            )
+        return stored.response
+
+    async def _claim_idempotency_key(self, user_id: int, idempotency_key: Optional[str], fingerprint: str) -> Optional[int]:
+        """
+        Занимает ключ идемпотентности в начале транзакции покупки.
 
-        # Сохраняем транзакцию и обновляем баланс
-        await self.user_repo.create_transaction(transaction)
-        await self.user_repo.update_user_wallet(user_wallet)
+        Параллельный повтор с тем же ключом ждет фиксации первой покупки на
+        уникальном индексе и затем получает ее ответ, не списывая деньги повторно.
 
-        return {"message": "Книга успешно куплена/арендована", "transaction": transaction}
\ No newline at end of file
+        :return: ID записи ключа или None (ключ не передан или уже занят).
+        """
+        if not idempotency_key:
+            return None
+        # Истекшие ключи пользователя удаляем, чтобы ключ можно было использовать снова
+        await self.idempotency_repo.delete_expired_keys(
+            user_id, datetime.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+        )
+        return await self.idempotency_repo.claim_key(user_id, idempotency_key, fingerprint)
@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterable, Sequence
+
+from src.services.catalog_import import ImportFormat
+
+# Поля выгрузки каталога (совпадают с полями импорта, плюс ID книги)
+EXPORT_FIELDS = (
+    "id", "title", "url_img", "category", "author", "year_of_create", "hidden",
+    "price", "price_rent_2week", "price_rent_month", "price_rent_3month",
+)
+
+MEDIA_TYPES = {ImportFormat.CSV: "text/csv; charset=utf-8", ImportFormat.JSONL: "application/x-ndjson"}
+
+
+def _jsonl_chunk(rows: Iterable[Sequence]) -> str:
+    lines = []
+    for row in rows:
+        record = dict(zip(EXPORT_FIELDS, row))
+        record["year_of_create"] = record["year_of_create"].isoformat()
+        lines.append(json.dumps(record, ensure_ascii=False))
+    return "\n".join(lines) + "\n"
+
+
+def _csv_chunk(rows: Iterable[Sequence]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    for row in rows:
+        values = list(row)
+        # Списки записываются через ";", как их ожидает импорт
+        values[3] = ";".join(values[3])
+        values[4] = ";".join(values[4])
+        values[5] = values[5].isoformat()
+        writer.writerow(values)
+    return buffer.getvalue()
+
+
+async def format_rows(partitions: AsyncIterator[Sequence[Sequence]], export_format: ImportFormat) -> AsyncIterator[str]:
+    """
+    Преобразует пачки строк каталога в текст выгрузки.
+
+    Строки пишутся напрямую, без создания pydantic-моделей; каждая пачка
+    становится одним блоком ответа.
+
+    :param partitions: Асинхронный поток пачек строк в порядке EXPORT_FIELDS.
+    :param export_format: Формат выгрузки (CSV с заголовком или JSON Lines).
+    :return: Асинхронный генератор блоков текста.
+    """
+    if export_format == ImportFormat.CSV:
+        yield ",".join(EXPORT_FIELDS) + "\n"
+        async for rows in partitions:
+            yield _csv_chunk(rows)
+    else:
+        async for rows in partitions:
+            yield _jsonl_chunk(rows)
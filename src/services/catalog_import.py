@@ -0,0 +1,118 @@
+import codecs
+import csv
+import json
+from enum import Enum
+from typing import AsyncIterator, List, NamedTuple, Optional
+
+from pydantic import ValidationError
+
+from src.db.models.book_models import BookImportRow
+
+
+class ImportFormat(str, Enum):
+    CSV = "csv"
+    JSONL = "jsonl"
+
+
+class ParsedRow(NamedTuple):
+    """Разобранная строка импорта: книга или описание ошибки."""
+    line: int
+    row: Optional[BookImportRow]
+    error: Optional[str]
+
+
+def detect_format(content_type: Optional[str]) -> ImportFormat:
+    """Определяет формат импорта по Content-Type (по умолчанию JSON Lines)."""
+    if content_type and content_type.split(";")[0].strip().lower() in ("text/csv", "application/csv"):
+        return ImportFormat.CSV
+    return ImportFormat.JSONL
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Разбивает поток байтов на строки по мере поступления.
+
+    В памяти хранится только незавершенная строка, поэтому размер тела
+    запроса не ограничен памятью процесса.
+
+    :param chunks: Асинхронный поток блоков тела запроса.
+    :return: Асинхронный генератор строк без символа перевода строки.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+def _validate(line: int, record) -> ParsedRow:
+    if not isinstance(record, dict):
+        return ParsedRow(line, None, "Ожидался объект с полями книги")
+    try:
+        return ParsedRow(line, BookImportRow(**record), None)
+    except ValidationError as e:
+        errors = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        return ParsedRow(line, None, errors)
+
+
+async def iter_rows(chunks: AsyncIterator[bytes], import_format: ImportFormat) -> AsyncIterator[ParsedRow]:
+    """
+    Разбирает тело запроса импорта построчно.
+
+    JSON Lines — по объекту книги на строку. CSV — первая строка с заголовками
+    полей, списки (category, author) разделяются ";", значения в кавычках
+    могут содержать переводы строк. Ошибочные строки не прерывают разбор.
+
+    :param chunks: Асинхронный поток блоков тела запроса.
+    :param import_format: Формат тела запроса.
+    :return: Асинхронный генератор разобранных строк с номерами строк тела.
+    """
+    line_no = 0
+    if import_format == ImportFormat.JSONL:
+        async for line in iter_lines(chunks):
+            line_no += 1
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield ParsedRow(line_no, None, f"Некорректный JSON: {e}")
+                continue
+            yield _validate(line_no, record)
+        return
+
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    start_line = 0
+    async for line in iter_lines(chunks):
+        line_no += 1
+        if not pending:
+            if not line.strip():
+                continue
+            start_line = line_no
+        pending.append(line)
+        text = "\n".join(pending)
+        # Запись не закончена, пока кавычки не сбалансированы
+        if text.count('"') % 2:
+            continue
+        pending = []
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as e:
+            yield ParsedRow(start_line, None, f"Некорректная строка CSV: {e}")
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield ParsedRow(start_line, None, f"Ожидалось {len(header)} значений, получено {len(values)}")
+            continue
+        yield _validate(start_line, dict(zip(header, values)))
+
+    if pending:
+        yield ParsedRow(start_line, None, "Незакрытая кавычка в конце файла")
@@ -0,0 +1,153 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.core.config import settings
+
+# Ключ документа: (путь, время изменения, размер) — замена файла дает новый ключ
+DocumentKey = Tuple[str, int, int]
+
+
+class DocumentCache:
+    """
+    LRU-кэш разобранных документов (PDF/EPUB) с ограничением по памяти.
+
+    Размер записи по умолчанию оценивается по размеру файла. Загрузка и использование документа
+    выполняются под блокировкой конкретной книги: один файл разбирается только
+    один раз, а не потокобезопасные объекты читателей не используются параллельно.
+
+    Вытесненные документы с методом close() закрываются (например, открытый архив EPUB).
+    Документ, который в этот момент читает другой поток, закрывается при выходе из open().
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        :param max_bytes: Максимальный суммарный размер документов в кэше.
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[DocumentKey, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._path_locks: Dict[str, threading.Lock] = {}
+        # Вытесненные документы, которые еще используются: закрываются владельцем блокировки книги
+        self._pending_close: Dict[str, List[Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            lock = self._path_locks.get(path)
+            if lock is None:
+                lock = self._path_locks[path] = threading.Lock()
+            return lock
+
+    @contextmanager
+    def open(
+        self, path: str, loader: Callable[[str], Any], sizer: Optional[Callable[[Any], int]] = None
+    ) -> Iterator[Any]:
+        """
+        Возвращает разобранный документ, загружая его при необходимости.
+
+        :param path: Путь к файлу.
+        :param loader: Функция разбора файла.
+        :param sizer: Оценка размера документа в байтах (по умолчанию — размер файла).
+        :return: Контекстный менеджер с документом; пока он открыт, книга заблокирована.
+        """
+        with self._path_lock(path):
+            try:
+                yield self._get_or_load(path, loader, sizer)
+            finally:
+                with self._lock:
+                    pending = self._pending_close.pop(path, [])
+                for document in pending:
+                    _close_document(document)
+
+    def _get_or_load(self, path: str, loader: Callable[[str], Any], sizer: Optional[Callable[[Any], int]]) -> Any:
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        document = loader(path)
+        cost = sizer(document) if sizer is not None else stat.st_size
+
+        removed = []
+        with self._lock:
+            # Удаляем устаревшие версии этого же файла
+            for stale_key in [k for k in self._entries if k[0] == path]:
+                removed.append((stale_key[0], self._remove(stale_key)))
+
+            self._entries[key] = (document, cost)
+            self.current_bytes += cost
+
+            # Вытесняем давно не использовавшиеся документы, оставляя текущий
+            while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+                oldest_key = next(iter(self._entries))
+                removed.append((oldest_key[0], self._remove(oldest_key)))
+                self.evictions += 1
+
+        for removed_path, removed_document in removed:
+            # Блокировку своей книги мы уже держим
+            self._release(removed_path, removed_document, held=removed_path == path)
+        return document
+
+    def _remove(self, key: DocumentKey) -> Any:
+        document, cost = self._entries.pop(key)
+        self.current_bytes -= cost
+        return document
+
+    def _release(self, path: str, document: Any, held: bool = False):
+        """Закрывает удаленный из кэша документ или откладывает закрытие, если его сейчас читают."""
+        if held:
+            _close_document(document)
+            return
+        lock = self._path_lock(path)
+        # Не ждем блокировку: ее владелец может сам ждать блокировку нашей книги
+        if lock.acquire(blocking=False):
+            try:
+                _close_document(document)
+            finally:
+                lock.release()
+        else:
+            with self._lock:
+                self._pending_close.setdefault(path, []).append(document)
+
+    def clear(self):
+        """Очищает кэш."""
+        with self._lock:
+            removed = [(key[0], document) for key, (document, _) in self._entries.items()]
+            self._entries.clear()
+            self.current_bytes = 0
+        for path, document in removed:
+            self._release(path, document)
+
+    def stats(self) -> dict:
+        """Возвращает метрики кэша."""
+        with self._lock:
+            return {
+                "documents": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def _close_document(document: Any):
+    close = getattr(document, "close", None)
+    if callable(close):
+        close()
+
+
+# Кэш документов процесса
+document_cache = DocumentCache(max_bytes=settings.DOCUMENT_CACHE_MAX_BYTES)
@@ -0,0 +1,72 @@
+import os
+from typing import List
+
+from src.services import epub_reader
+from src.services.document_cache import document_cache
+
+
+class PageOutOfRangeError(IndexError):
+    """Запрошенной страницы нет в документе."""
+
+
+class UnsupportedFormatError(ValueError):
+    """Формат файла не поддерживается."""
+
+
+def _load_pdf(file_path: str):
+    from PyPDF2 import PdfReader
+    return PdfReader(file_path)
+
+
+def _epub_cost(index: epub_reader.EpubIndex) -> int:
+    return index.cost()
+
+
+def read_pdf_page(file_path: str, page: int) -> str:
+    """Чтение страницы PDF."""
+    with document_cache.open(file_path, _load_pdf) as reader:
+        if page < 0 or page >= len(reader.pages):
+            raise PageOutOfRangeError(page)
+        return reader.pages[page].extract_text()
+
+
+def read_epub_page(file_path: str, page: int) -> str:
+    """Чтение страницы EPUB: распаковывается только нужный документ spine."""
+    with document_cache.open(file_path, epub_reader.open_index, _epub_cost) as index:
+        if page < 0 or page >= len(index):
+            raise PageOutOfRangeError(page)
+        return epub_reader.body_content(index.read_member(page))
+
+
+def read_page(file_path: str, page: int) -> str:
+    """
+    Читает страницу книги в зависимости от формата файла.
+
+    :param file_path: Путь к файлу книги.
+    :param page: Номер страницы (с нуля).
+    :return: Текстовое содержимое страницы.
+    """
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension == ".pdf":
+        return read_pdf_page(file_path, page)
+    if file_extension == ".epub":
+        return read_epub_page(file_path, page)
+    raise UnsupportedFormatError(file_extension)
+
+
+def extract_pages(file_path: str) -> List[str]:
+    """
+    Извлекает текст всех страниц книги (используется при загрузке файла).
+
+    :param file_path: Путь к файлу книги.
+    :return: Текст страниц по порядку.
+    """
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension == ".pdf":
+        reader = _load_pdf(file_path)
+        return [pdf_page.extract_text() for pdf_page in reader.pages]
+    if file_extension == ".epub":
+        index = epub_reader.open_index(file_path)
+        with index.archive:
+            return [epub_reader.body_content(index.read_member(page)) for page in range(len(index))]
+    raise UnsupportedFormatError(file_extension)
@@ -0,0 +1,122 @@
+import posixpath
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import List
+from urllib.parse import unquote
+
+# Пространства имен контейнера и пакета (OPF) EPUB
+_NS = {
+    "container": "urn:oasis:names:tc:opendocument:xmlns:container",
+    "opf": "http://www.idpf.org/2007/opf",
+}
+_CONTAINER_PATH = "META-INF/container.xml"
+_DOCUMENT_MEDIA_TYPES = ("application/xhtml+xml", "text/html", "application/xml")
+
+# Примерный объем памяти на одну запись индекса (для учета в кэше документов)
+_ENTRY_COST = 512
+
+
+class EpubFormatError(ValueError):
+    """Файл не является корректной EPUB-книгой."""
+
+
+class EpubIndex:
+    """
+    Индекс EPUB-книги: открытый zip-архив и документы spine по порядку чтения.
+
+    Центральный каталог архива и OPF разбираются один раз; при чтении страницы
+    распаковывается только один XHTML-документ.
+    """
+
+    def __init__(self, archive: zipfile.ZipFile, spine: List[zipfile.ZipInfo]):
+        """
+        :param archive: Открытый zip-архив книги.
+        :param spine: Записи архива с документами spine в порядке чтения.
+        """
+        self.archive = archive
+        self.spine = spine
+
+    def __len__(self) -> int:
+        return len(self.spine)
+
+    def cost(self) -> int:
+        """Оценка занимаемой индексом памяти в байтах."""
+        return len(self.archive.filelist) * _ENTRY_COST
+
+    def read_member(self, page: int) -> bytes:
+        """Распаковывает документ spine с указанным номером."""
+        return self.archive.read(self.spine[page])
+
+    def close(self):
+        """Закрывает архив книги (освобождает файловый дескриптор)."""
+        self.archive.close()
+
+
+def open_index(file_path: str) -> EpubIndex:
+    """
+    Читает spine книги: container.xml -> OPF -> manifest/spine.
+
+    :param file_path: Путь к EPUB-файлу.
+    :return: Индекс книги.
+    :raises EpubFormatError: Если структура EPUB некорректна.
+    """
+    archive = zipfile.ZipFile(file_path)
+    try:
+        spine = _read_spine(archive)
+    except Exception:
+        archive.close()
+        raise
+    return EpubIndex(archive, spine)
+
+
+def _read_spine(archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    try:
+        container = ET.fromstring(archive.read(_CONTAINER_PATH))
+        rootfile = container.find(".//container:rootfile", _NS)
+        opf_path = rootfile.get("full-path")
+        package = ET.fromstring(archive.read(opf_path))
+    except (KeyError, AttributeError, ET.ParseError) as e:
+        raise EpubFormatError(f"Не удалось прочитать OPF: {e}")
+
+    manifest = package.find("opf:manifest", _NS)
+    spine = package.find("opf:spine", _NS)
+    if manifest is None or spine is None:
+        raise EpubFormatError("В OPF нет manifest или spine")
+
+    base_dir = posixpath.dirname(opf_path)
+    items = {item.get("id"): item for item in manifest.findall("opf:item", _NS)}
+
+    members = []
+    for itemref in spine.findall("opf:itemref", _NS):
+        item = items.get(itemref.get("idref"))
+        if item is None or item.get("media-type") not in _DOCUMENT_MEDIA_TYPES:
+            continue
+        name = posixpath.normpath(posixpath.join(base_dir, unquote(item.get("href", ""))))
+        try:
+            members.append(archive.getinfo(name))
+        except KeyError:
+            continue  # Документ указан в OPF, но отсутствует в архиве
+    return members
+
+
+def body_content(document: bytes) -> str:
+    """
+    Возвращает содержимое элемента BODY XHTML-документа.
+
+    :param document: XHTML-документ.
+    :return: HTML-разметка внутри BODY (пустая строка, если BODY нет).
+    """
+    from lxml import etree, html
+
+    try:
+        tree = html.document_fromstring(document, parser=html.HTMLParser(encoding="utf-8"))
+    except Exception:
+        return ""
+
+    body = tree.find("body")
+    if body is None:
+        return ""
+
+    parts = [body.text or ""]
+    parts.extend(etree.tostring(child, encoding="unicode") for child in body)
+    return "".join(parts)
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from src.core.config import settings
+from src.db.models.transaction_models import ExpiryNotification, ExpiringRental
+from src.db.repositories.idempotency_repo import IdempotencyRepository
+from src.db.repositories.user_repo import UserRepository
+from src.services.notification_sinks import NotificationSink
+
+logger = logging.getLogger(__name__)
+
+
+class ExpiryScheduler:
+    """
+    Фоновая задача, которая периодически находит аренды, истекающие в ближайшее
+    окно, отправляет по ним уведомления пачками и обновляет в памяти список
+    истекающих аренд пользователей. Заодно она удаляет истекшие ключи
+    идемпотентности всех пользователей.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable,
+        sink: NotificationSink,
+        interval: int,
+        window: int,
+        batch_size: int,
+        idempotency_key_ttl: Optional[int] = None,
+    ):
+        """
+        :param session_factory: Фабрика асинхронных сессий БД.
+        :param sink: Получатель уведомлений.
+        :param interval: Интервал между запусками (секунды).
+        :param window: Окно, в котором аренда считается истекающей (секунды).
+        :param batch_size: Размер пачки уведомлений (и удаляемых ключей идемпотентности).
+        :param idempotency_key_ttl: Время жизни ключа идемпотентности (секунды); None — ключи не удаляются.
+        """
+        self.session_factory = session_factory
+        self.sink = sink
+        self.interval = interval
+        self.window = timedelta(seconds=window)
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        # Истекающие аренды: {ID пользователя: [аренды]}
+        self._expiring: Dict[int, List[ExpiringRental]] = {}
+        self.last_run_at: Optional[datetime] = None
+        self.notified_total = 0
+        self.idempotency_key_ttl = idempotency_key_ttl
+        self.purged_keys_total = 0
+
+    def start(self):
+        """Запускает фоновую задачу."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Останавливает фоновую задачу."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ошибка планировщика окончания аренды")
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> int:
+        """
+        Отправляет уведомления по истекающим арендам и обновляет список истекающих аренд.
+
+        :return: Количество отправленных уведомлений.
+        """
+        now = datetime.now()
+        until = now + self.window
+        sent = 0
+
+        async with self.session_factory() as db:
+            user_repo = UserRepository(db)
+            while True:
+                rows = await user_repo.claim_expiring_rentals(now, until, self.batch_size)
+                if not rows:
+                    break
+                notifications = [
+                    ExpiryNotification(
+                        transaction_id=row.id,
+                        user_id=row.user_id,
+                        book_id=row.book_id,
+                        status=row.status,
+                        expires_at=row.expires_at
+                    )
+                    for row in rows
+                ]
+                try:
+                    await self.sink.send(notifications)
+                except Exception:
+                    # Отметки об отправке откатываются, пачка уйдет при следующем запуске
+                    await db.rollback()
+                    logger.exception("Не удалось отправить уведомления об окончании аренды")
+                    break
+                await db.commit()
+                sent += len(notifications)
+                if len(rows) < self.batch_size:
+                    break
+
+            expiring: Dict[int, List[ExpiringRental]] = {}
+            for row in await user_repo.get_expiring_rentals(now, until):
+                expiring.setdefault(row.user_id, []).append(
+                    ExpiringRental(book_id=row.book_id, expires_at=row.expires_at)
+                )
+
+            if self.idempotency_key_ttl is not None:
+                self.purged_keys_total += await self._purge_idempotency_keys(db, now)
+
+        for rentals in expiring.values():
+            rentals.sort(key=lambda rental: rental.expires_at)
+        self._expiring = expiring
+        self.last_run_at = now
+        self.notified_total += sent
+        return sent
+
+    async def _purge_idempotency_keys(self, db, now: datetime) -> int:
+        """Удаляет истекшие ключи идемпотентности пачками по batch_size, фиксируя каждую пачку."""
+        idempotency_repo = IdempotencyRepository(db)
+        created_before = now - timedelta(seconds=self.idempotency_key_ttl)
+        purged = 0
+        while True:
+            deleted = await idempotency_repo.delete_keys_created_before(created_before, self.batch_size)
+            await db.commit()
+            purged += deleted
+            if deleted < self.batch_size:
+                return purged
+
+    def get_expiring_rentals(self, user_id: int) -> List[ExpiringRental]:
+        """
+        Возвращает аренды пользователя, истекающие в ближайшее окно (на момент последнего запуска).
+
+        :param user_id: ID пользователя.
+        """
+        now = datetime.now()
+        return [rental for rental in self._expiring.get(user_id, []) if rental.expires_at > now]
+
+
+# Планировщик приложения; создается в lifespan
+expiry_scheduler: Optional[ExpiryScheduler] = None
+
+
+async def start_expiry_scheduler(session_factory: Callable, sink: NotificationSink):
+    """Создает и запускает планировщик уведомлений об окончании аренды."""
+    global expiry_scheduler
+    expiry_scheduler = ExpiryScheduler(
+        session_factory,
+        sink,
+        interval=settings.EXPIRY_CHECK_INTERVAL,
+        window=settings.EXPIRY_NOTIFY_WINDOW,
+        batch_size=settings.EXPIRY_NOTIFY_BATCH_SIZE,
+        idempotency_key_ttl=settings.IDEMPOTENCY_KEY_TTL,
+    )
+    expiry_scheduler.start()
+
+
+async def stop_expiry_scheduler():
+    """Останавливает планировщик уведомлений об окончании аренды."""
+    global expiry_scheduler
+    if expiry_scheduler is not None:
+        await expiry_scheduler.stop()
+        expiry_scheduler = None
@@ -0,0 +1,61 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import List
+
+from fastapi.concurrency import run_in_threadpool
+
+from src.core.config import settings
+from src.db.models.transaction_models import ExpiryNotification
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationSink(ABC):
+    """Получатель уведомлений об окончании аренды (почта, push и т.п. подключаются здесь)."""
+
+    @abstractmethod
+    async def send(self, notifications: List[ExpiryNotification]):
+        """
+        Отправляет пачку уведомлений.
+
+        Если метод выбросил исключение, пачка считается неотправленной
+        и будет выбрана снова при следующем запуске планировщика.
+        """
+
+
+class LogNotificationSink(NotificationSink):
+    """Пишет уведомления в лог приложения."""
+
+    async def send(self, notifications: List[ExpiryNotification]):
+        for notification in notifications:
+            logger.info(
+                "Аренда книги %s пользователя %s заканчивается %s",
+                notification.book_id, notification.user_id, notification.expires_at.isoformat()
+            )
+
+
+class FileNotificationSink(NotificationSink):
+    """Дописывает уведомления в файл в формате JSON Lines."""
+
+    def __init__(self, path: str):
+        """
+        :param path: Путь к файлу уведомлений.
+        """
+        self.path = path
+
+    async def send(self, notifications: List[ExpiryNotification]):
+        lines = "".join(notification.json() + "\n" for notification in notifications)
+        await run_in_threadpool(self._append, lines)
+
+    def _append(self, lines: str):
+        with open(self.path, "a", encoding="utf-8") as notifications_file:
+            notifications_file.write(lines)
+
+
+def create_notification_sink() -> NotificationSink:
+    """Создает получателя уведомлений по настройке EXPIRY_NOTIFICATION_SINK."""
+    if settings.EXPIRY_NOTIFICATION_SINK == "file":
+        return FileNotificationSink(settings.EXPIRY_NOTIFICATION_FILE)
+    if settings.EXPIRY_NOTIFICATION_SINK == "log":
+        return LogNotificationSink()
+    raise ValueError(f"Неизвестный EXPIRY_NOTIFICATION_SINK: {settings.EXPIRY_NOTIFICATION_SINK}")
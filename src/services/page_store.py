@@ -0,0 +1,179 @@
+import mmap
+import os
+import secrets
+import struct
+import threading
+from collections import OrderedDict
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+from src.core.config import settings
+
+# Заголовок индекса: сигнатура, количество страниц, токен файла данных
+_HEADER = struct.Struct("<4sI8s")
+_OFFSET = struct.Struct("<Q")
+_MAGIC = b"BKPG"
+
+
+class _MappedBook(NamedTuple):
+    """Открытые отображения индекса и файла данных книги."""
+    stamp: Tuple[int, int]  # (inode, mtime) индекса: замена индекса дает новую отметку
+    page_count: int
+    index: mmap.mmap
+    data: Optional[mmap.mmap]  # None для пустого файла данных
+
+
+# Открытые книги хранилища страниц по пути индекса (LRU). Вытесненные отображения не закрываются
+# явно: их может дочитывать другой поток, они закрываются сборщиком мусора.
+_open_books: "OrderedDict[str, _MappedBook]" = OrderedDict()
+_open_books_lock = threading.Lock()
+
+
+def _store_dir() -> str:
+    return settings.PAGE_STORE_DIR or os.path.join(settings.PROTECTED_BOOKS_DIR, "pages")
+
+
+def _index_path(key: str) -> str:
+    return os.path.join(_store_dir(), f"{key}.idx")
+
+
+def _data_path(key: str, token: bytes) -> str:
+    return os.path.join(_store_dir(), f"{key}.{token.hex()}.pages")
+
+
+def write_pages(key: str, pages: Iterable[str]) -> int:
+    """
+    Записывает текст страниц книги в хранилище страниц.
+
+    Текст всех страниц пишется в один файл данных, а смещения страниц — в индекс.
+    Индекс ссылается на файл данных по токену и заменяется атомарно, поэтому
+    читатели видят либо старую, либо новую версию книги целиком.
+
+    :param key: Ключ книги в хранилище.
+    :param pages: Текст страниц по порядку.
+    :return: Количество страниц.
+    """
+    os.makedirs(_store_dir(), exist_ok=True)
+    token = secrets.token_bytes(8)
+    data_path = _data_path(key, token)
+    index_path = _index_path(key)
+    tmp_index_path = f"{index_path}.{token.hex()}.tmp"
+
+    offsets = [0]
+    with open(data_path, "wb") as data_file:
+        for text in pages:
+            data_file.write((text or "").encode("utf-8"))
+            offsets.append(data_file.tell())
+        data_file.flush()
+        os.fsync(data_file.fileno())
+
+    page_count = len(offsets) - 1
+    with open(tmp_index_path, "wb") as index_file:
+        index_file.write(_HEADER.pack(_MAGIC, page_count, token))
+        index_file.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        index_file.flush()
+        os.fsync(index_file.fileno())
+
+    previous = _read_header(key)
+    os.replace(tmp_index_path, index_path)
+    _forget(key)
+
+    # Старый файл данных больше не нужен; уже открытые отображения остаются валидными
+    if previous is not None and previous[1] != token:
+        _remove_quietly(_data_path(key, previous[1]))
+    return page_count
+
+
+def _read_header(key: str) -> Optional[Tuple[int, bytes]]:
+    try:
+        with open(_index_path(key), "rb") as index_file:
+            magic, page_count, token = _HEADER.unpack(index_file.read(_HEADER.size))
+    except (FileNotFoundError, struct.error):
+        return None
+    if magic != _MAGIC:
+        return None
+    return page_count, token
+
+
+def has_pages(key: str) -> bool:
+    """Проверяет, есть ли книга в хранилище страниц."""
+    return _read_header(key) is not None
+
+
+def get_page_count(key: str) -> Optional[int]:
+    """Возвращает количество страниц книги в хранилище (None, если книги нет)."""
+    header = _read_header(key)
+    return header[0] if header is not None else None
+
+
+def _map_book(key: str) -> _MappedBook:
+    index_path = _index_path(key)
+    stat = os.stat(index_path)
+    stamp = (stat.st_ino, stat.st_mtime_ns)
+    with _open_books_lock:
+        book = _open_books.get(index_path)
+        if book is not None and book.stamp == stamp:
+            _open_books.move_to_end(index_path)
+            return book
+
+    if stat.st_size < _HEADER.size:
+        raise FileNotFoundError(index_path)
+    with open(index_path, "rb") as index_file:
+        index = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, page_count, token = _HEADER.unpack_from(index)
+    if magic != _MAGIC:
+        raise FileNotFoundError(index_path)
+    with open(_data_path(key, token), "rb") as data_file:
+        has_data = os.fstat(data_file.fileno()).st_size > 0
+        data = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ) if has_data else None
+
+    book = _MappedBook(stamp, page_count, index, data)
+    with _open_books_lock:
+        _open_books[index_path] = book
+        _open_books.move_to_end(index_path)
+        while len(_open_books) > settings.PAGE_STORE_OPEN_BOOKS:
+            _open_books.popitem(last=False)
+    return book
+
+
+def _forget(key: str):
+    with _open_books_lock:
+        _open_books.pop(_index_path(key), None)
+
+
+def read_page(key: str, page: int) -> str:
+    """
+    Читает текст одной страницы за O(1): два смещения из индекса и срез файла данных.
+
+    Индекс и файл данных книги отображаются в память один раз и переиспользуются,
+    пока индекс не заменен. Чтение может обратиться к диску, поэтому из event loop
+    функцию вызывают через пул потоков.
+
+    :param key: Ключ книги в хранилище.
+    :param page: Номер страницы (с нуля).
+    :return: Текст страницы.
+    :raises FileNotFoundError: Если книги нет в хранилище.
+    :raises IndexError: Если страницы нет в книге.
+    """
+    book = _map_book(key)
+    if page < 0 or page >= book.page_count:
+        raise IndexError(page)
+    start, end = struct.unpack_from("<2Q", book.index, _HEADER.size + page * _OFFSET.size)
+    if start == end:
+        return ""
+    return book.data[start:end].decode("utf-8")
+
+
+def delete_pages(key: str):
+    """Удаляет книгу из хранилища страниц."""
+    header = _read_header(key)
+    _remove_quietly(_index_path(key))
+    _forget(key)
+    if header is not None:
+        _remove_quietly(_data_path(key, header[1]))
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
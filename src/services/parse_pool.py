@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import multiprocessing
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List, Optional
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ParsePoolBusyError(Exception):
+    """Очередь задач разбора документов переполнена."""
+
+
+class ParseTimeoutError(Exception):
+    """Задача разбора документа не уложилась в отведенное время."""
+
+
+# Воркеры разбора PDF/EPUB; создаются в lifespan приложения.
+# Каждый воркер — отдельный однопроцессный пул со своим кэшем документов
+# (document_cache живет в процессе воркера). Задачи одной книги всегда идут
+# в один воркер, чтобы документ разбирался один раз и оставался в его кэше,
+# а бюджет DOCUMENT_CACHE_MAX_BYTES делится между воркерами поровну.
+# Цена такого выбора — чтение одной книги не распараллеливается между воркерами.
+_executors: List[ProcessPoolExecutor] = []
+# Задачи, ожидающие или выполняющиеся в каждом воркере
+_worker_pending: List[int] = []
+_pending = 0
+
+
+def _init_worker(cache_max_bytes: int):
+    from src.services.document_cache import document_cache
+    document_cache.max_bytes = cache_max_bytes
+
+
+def _warmup() -> bool:
+    # Импортируем тяжелые библиотеки заранее, чтобы первый запрос не платил за это
+    import PyPDF2  # noqa: F401
+    import lxml.html  # noqa: F401
+    from src.services import document_reader  # noqa: F401
+    return True
+
+
+def _worker_cache_bytes() -> int:
+    return settings.DOCUMENT_CACHE_MAX_BYTES // max(settings.PARSE_POOL_WORKERS, 1)
+
+
+def _create_executor() -> ProcessPoolExecutor:
+    # spawn: дочерние процессы не наследуют event loop и соединения с БД
+    return ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(_worker_cache_bytes(),),
+    )
+
+
+async def start_parse_pool(warm: bool = True):
+    """
+    Создает воркеры при старте приложения и прогревает их.
+
+    :param warm: Запустить ли все воркеры сразу.
+    """
+    global _executors, _worker_pending
+    if not _executors:
+        _executors = [_create_executor() for _ in range(max(settings.PARSE_POOL_WORKERS, 1))]
+        _worker_pending = [0] * len(_executors)
+    if warm:
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(executor, _warmup) for executor in _executors])
+
+
+async def stop_parse_pool():
+    """Останавливает воркеры при остановке приложения."""
+    global _executors, _worker_pending
+    for executor in _executors:
+        executor.shutdown(wait=False, cancel_futures=True)
+    _executors = []
+    _worker_pending = []
+
+
+def _choose_worker(key: Optional[str]) -> int:
+    if key is not None:
+        # crc32, а не hash(): выбор воркера не зависит от PYTHONHASHSEED
+        return zlib.crc32(key.encode()) % len(_executors)
+    return min(range(len(_executors)), key=_worker_pending.__getitem__)
+
+
+async def run_in_parse_pool(func: Callable[..., Any], *args, timeout: Optional[float] = None, key: Optional[str] = None) -> Any:
+    """
+    Выполняет функцию разбора документа в пуле процессов, не блокируя event loop.
+
+    Количество одновременно ожидающих задач ограничено PARSE_POOL_MAX_PENDING:
+    при переполнении задача сразу отклоняется. Задача, не уложившаяся в таймаут,
+    перестает ожидаться (сам процесс доработает ее в фоне).
+
+    :param func: Функция уровня модуля (должна сериализоваться pickle).
+    :param timeout: Таймаут в секундах (по умолчанию PARSE_JOB_TIMEOUT).
+    :param key: Ключ привязки к воркеру (путь к книге); без ключа выбирается наименее загруженный воркер.
+    :return: Результат функции.
+    :raises ParsePoolBusyError: Если очередь переполнена.
+    :raises ParseTimeoutError: Если задача не уложилась в таймаут.
+    """
+    global _pending
+    if not _executors:
+        # Вне lifespan приложения (скрипты, тесты) пул создается без прогрева
+        await start_parse_pool(warm=False)
+
+    if _pending >= settings.PARSE_POOL_MAX_PENDING:
+        raise ParsePoolBusyError()
+
+    worker = _choose_worker(key)
+    _pending += 1
+    _worker_pending[worker] += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(_executors[worker], func, *args),
+            timeout=settings.PARSE_JOB_TIMEOUT if timeout is None else timeout,
+        )
+    except asyncio.TimeoutError:
+        raise ParseTimeoutError()
+    except BrokenProcessPool:
+        # Воркер упал (например, из-за нехватки памяти) — пересоздаем его
+        logger.error("Воркер разбора документов %s сломан, пересоздаем", worker)
+        _executors[worker].shutdown(wait=False, cancel_futures=True)
+        _executors[worker] = _create_executor()
+        raise
+    finally:
+        _pending -= 1
+        if worker < len(_worker_pending):
+            # Пул мог быть пересоздан, пока задача выполнялась
+            _worker_pending[worker] = max(_worker_pending[worker] - 1, 0)
+
+
+def has_free_slots(reserved: int = 0) -> bool:
+    """
+    Проверяет, что пул запущен и в нем свободно больше reserved мест.
+
+    Фоновые задачи (предзагрузка страниц) оставляют места для запросов пользователей.
+    """
+    return bool(_executors) and settings.PARSE_POOL_MAX_PENDING - _pending > reserved
+
+
+def get_parse_pool_stats() -> dict:
+    """Возвращает состояние пула разбора документов."""
+    return {
+        "workers": settings.PARSE_POOL_WORKERS,
+        "max_pending": settings.PARSE_POOL_MAX_PENDING,
+        "running": bool(_executors),
+        "pending": _pending,
+        "available_slots": settings.PARSE_POOL_MAX_PENDING - _pending if _executors else None,
+        "worker_pending": list(_worker_pending),
+        "worker_cache_max_bytes": _worker_cache_bytes(),
+    }
@@ -0,0 +1,182 @@
+import hashlib
+import os
+import tempfile
+import time
+from typing import BinaryIO, Iterable, NamedTuple
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from src.core.config import settings
+
+
+class UploadTooLargeError(Exception):
+    """Загружаемый файл превышает допустимый размер."""
+
+
+class StoredUpload(NamedTuple):
+    """Загруженный во временный файл файл книги."""
+    path: str
+    size: int
+    sha256: str
+
+
+async def save_upload(upload: UploadFile, directory: str, suffix: str = "") -> StoredUpload:
+    """
+    Сохраняет загружаемый файл во временный файл в указанной директории.
+
+    Файл читается и пишется блоками UPLOAD_CHUNK_SIZE, запись и хеширование
+    выполняются в пуле потоков, поэтому память не зависит от размера файла,
+    а event loop не блокируется. Временный файл создается в той же директории,
+    что и итоговый, чтобы затем переместить его атомарно (см. place_file).
+
+    :param upload: Загружаемый файл.
+    :param directory: Директория для временного файла.
+    :param suffix: Окончание имени временного файла (например, расширение книги).
+    :return: Путь к временному файлу, его размер и SHA-256.
+    :raises UploadTooLargeError: Если файл больше MAX_UPLOAD_BYTES.
+    """
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=suffix)
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            while True:
+                chunk = await upload.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > settings.MAX_UPLOAD_BYTES:
+                    raise UploadTooLargeError()
+                await run_in_threadpool(_write_chunk, tmp_file, hasher, chunk)
+            await run_in_threadpool(_sync_file, tmp_file)
+    except BaseException:
+        remove_file(tmp_path)
+        raise
+    return StoredUpload(path=tmp_path, size=size, sha256=hasher.hexdigest())
+
+
+def _write_chunk(tmp_file: BinaryIO, hasher, chunk: bytes):
+    hasher.update(chunk)
+    tmp_file.write(chunk)
+
+
+def _sync_file(tmp_file: BinaryIO):
+    tmp_file.flush()
+    os.fsync(tmp_file.fileno())
+
+
+def place_file(tmp_path: str, final_path: str):
+    """
+    Атомарно перемещает временный файл на итоговое место.
+
+    Читатели видят либо старый файл целиком, либо новый целиком.
+
+    :param tmp_path: Путь к временному файлу (в той же файловой системе).
+    :param final_path: Итоговый путь файла.
+    """
+    os.replace(tmp_path, final_path)
+    # Фиксируем запись о переименовании в директории
+    dir_fd = os.open(os.path.dirname(final_path) or ".", os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def remove_file(path: str):
+    """Удаляет файл, если он существует."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def blobs_dir() -> str:
+    """Корневая директория хранилища файлов книг (по умолчанию PROTECTED_BOOKS_DIR/blobs)."""
+    return settings.BLOB_STORE_DIR or os.path.join(settings.PROTECTED_BOOKS_DIR, "blobs")
+
+
+def blob_path(content_hash: str, extension: str) -> str:
+    """
+    Возвращает путь файла в хранилище: blobs/ab/cd/<sha256><расширение>.
+
+    Два уровня поддиректорий по первым байтам хеша ограничивают число файлов
+    в одной директории.
+
+    :param content_hash: SHA-256 файла (hex).
+    :param extension: Расширение файла книги (например, ".pdf").
+    """
+    return os.path.join(blobs_dir(), content_hash[:2], content_hash[2:4], f"{content_hash}{extension}")
+
+
+def blob_exists(content_hash: str, extension: str) -> bool:
+    """Проверяет, есть ли файл с таким содержимым в хранилище."""
+    return os.path.exists(blob_path(content_hash, extension))
+
+
+def store_blob(tmp_path: str, content_hash: str, extension: str) -> str:
+    """
+    Помещает временный файл в хранилище по хешу его содержимого.
+
+    Если такой файл уже есть, временный файл удаляется, а существующий
+    используется повторно (время изменения обновляется, чтобы сборщик
+    мусора не удалил его до сохранения ссылки в БД).
+
+    :param tmp_path: Путь к временному файлу (в той же файловой системе, что и хранилище).
+    :param content_hash: SHA-256 файла (hex).
+    :param extension: Расширение файла книги.
+    :return: Путь к файлу в хранилище.
+    """
+    path = blob_path(content_hash, extension)
+    if os.path.exists(path):
+        remove_file(tmp_path)
+        os.utime(path)
+        return path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    place_file(tmp_path, path)
+    return path
+
+
+def collect_garbage(referenced_hashes: Iterable[str], grace_seconds: int) -> dict:
+    """
+    Удаляет файлы хранилища, на которые не ссылается ни одна книга.
+
+    Файлы моложе grace_seconds не удаляются: ссылка на только что загруженный
+    файл могла еще не попасть в БД. Заодно удаляются брошенные временные файлы
+    незавершенных загрузок.
+
+    :param referenced_hashes: Хеши файлов, на которые ссылаются книги.
+    :param grace_seconds: Минимальный возраст удаляемого файла в секундах.
+    :return: Удаленные хеши, количество файлов и освобожденные байты.
+    """
+    referenced = set(referenced_hashes)
+    deadline = time.time() - grace_seconds
+    removed_hashes = []
+    removed_files = 0
+    freed_bytes = 0
+
+    for root, _, files in os.walk(blobs_dir()):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime > deadline:
+                continue
+
+            content_hash = os.path.splitext(name)[0]
+            if name.startswith(".upload-"):
+                pass  # Временный файл прерванной загрузки
+            elif content_hash in referenced:
+                continue
+            else:
+                removed_hashes.append(content_hash)
+
+            remove_file(path)
+            removed_files += 1
+            freed_bytes += stat.st_size
+
+    return {"removed_hashes": removed_hashes, "removed_files": removed_files, "freed_bytes": freed_bytes}
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Ограниченный по размеру in-process кэш с временем жизни записей.
+
+    При переполнении вытесняются записи, к которым дольше всего не обращались (LRU).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        :param maxsize: Максимальное количество записей.
+        :param ttl: Время жизни записи по умолчанию в секундах.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        """
+        Ищет запись в кэше.
+
+        :param key: Ключ записи.
+        :return: Кортеж (найдено ли значение, значение). Позволяет кэшировать None.
+        """
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._data[key]
+        self.misses += 1
+        return False, None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Возвращает значение по ключу или default, если записи нет или она устарела."""
+        found, value = self.lookup(key)
+        return value if found else default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Сохраняет значение в кэше.
+
+        :param key: Ключ записи.
+        :param value: Значение.
+        :param ttl: Время жизни записи в секундах (по умолчанию — ttl кэша).
+        """
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Удаляет запись из кэша."""
+        self._data.pop(key, None)
+
+    def clear(self):
+        """Очищает кэш."""
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """Возвращает метрики кэша."""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlight:
+    """
+    Объединяет одновременные асинхронные вызовы с одинаковым ключом в один.
+
+    Пока вызов выполняется, остальные запросы с тем же ключом ждут его результат,
+    а не запускают собственный. Отмена одного из ожидающих не отменяет сам вызов.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, "asyncio.Future"] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет func или присоединяется к уже выполняющемуся вызову с тем же ключом.
+
+        :param key: Ключ вызова.
+        :param func: Фабрика корутины, выполняющей работу.
+        :return: Результат вызова.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """Возвращает метрики: запущенные вызовы, присоединения к ним и выполняющиеся сейчас."""
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": len(self._calls),
+        }
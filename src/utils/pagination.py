@@ -0,0 +1,32 @@
+import base64
+import json
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Кодирует курсор keyset-пагинации в непрозрачную строку.
+
+    :param last_id: ID последней книги на текущей странице.
+    :return: Курсор для запроса следующей страницы.
+    """
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Декодирует курсор keyset-пагинации.
+
+    :param cursor: Курсор, полученный в ответе предыдущей страницы.
+    :return: ID последней книги предыдущей страницы.
+    :raises ValueError: Если курсор поврежден.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        last_id = payload["id"]
+    except (ValueError, TypeError, KeyError, UnicodeEncodeError) as e:
+        raise ValueError("Недопустимый курсор") from e
+    if not isinstance(last_id, int) or isinstance(last_id, bool):
+        raise ValueError("Недопустимый курсор")
+    return last_id
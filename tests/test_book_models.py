@@ -1,6 +1,7 @@
 import unittest
 from datetime import datetime
-from src.db.models.book_models import Book, BookContent, BookPrice
+from pydantic import ValidationError
+from src.db.models.book_models import Book, BookContent, BookPrice, BulkPriceUpdateRequest, CatalogFilter
 from colorama import Fore, Style  # Импортируем colorama
 
 class TestBookModels(unittest.TestCase):
@@ -52,5 +53,21 @@ class TestBookModels(unittest.TestCase):
         )
         self.assertEqual(price.book_id, "1")
 
+    def test_catalog_filter_rejects_empty(self):
+        with self.assertRaises(ValidationError):
+            CatalogFilter()
+        self.assertTrue(CatalogFilter(all_books=True).all_books)
+        self.assertEqual(CatalogFilter(authors=["Толстой"]).authors, ["Толстой"])
+
+    def test_bulk_price_update_request(self):
+        request = BulkPriceUpdateRequest(filter={"categories": ["Роман"]}, mode="percent", price=-20, price_rent_month=10)
+        self.assertEqual(request.price_changes(), {"price": -20, "price_rent_month": 10})
+        with self.assertRaises(ValidationError):
+            BulkPriceUpdateRequest(filter={"categories": ["Роман"]}, mode="set")
+        with self.assertRaises(ValidationError):
+            BulkPriceUpdateRequest(filter={"categories": ["Роман"]}, mode="set", price=-1)
+        with self.assertRaises(ValidationError):
+            BulkPriceUpdateRequest(filter={"categories": ["Роман"]}, mode="percent", price=-150)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
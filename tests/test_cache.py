@@ -0,0 +1,93 @@
+import asyncio
+import unittest
+from unittest import mock
+from src.utils.cache import TTLCache, SingleFlight
+from colorama import Fore, Style  # Импортируем colorama
+
+class TestTTLCache(unittest.TestCase):
+    def setUp(self):
+        # Выводим имя текущего теста перед его выполнением
+        print(f"{Fore.CYAN}Running test: {self._testMethodName}{Style.RESET_ALL}")
+
+    def tearDown(self):
+        # Выводим статус теста после его выполнения
+        if hasattr(self, '_outcome'):  # Python 3.4+
+            result = self._outcome.result
+            if result.errors or result.failures:
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+        else:  # Python 3.3 and below
+            if not self._resultForDoCleanups.wasSuccessful():
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+
+    def test_get_and_set(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        self.assertEqual(cache.lookup("a"), (False, None))
+        cache.set("a", None)
+        self.assertEqual(cache.lookup("a"), (True, None))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_expiration(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        with mock.patch("src.utils.cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1)
+            cache.set("b", 2, ttl=5)
+        with mock.patch("src.utils.cache.time.monotonic", return_value=110.0):
+            self.assertEqual(cache.get("a"), 1)
+            self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 1)
+
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_invalidate_and_clear(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.invalidate("a")
+        self.assertIsNone(cache.get("a"))
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_single_flight_shares_call(self):
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"id": "42"}
+
+        async def run():
+            flight = SingleFlight()
+            results = await asyncio.gather(*[flight.do("token", load) for _ in range(5)])
+            return flight, results
+
+        flight, results = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"id": "42"}] * 5)
+        self.assertEqual(flight.stats(), {"calls": 1, "shared": 4, "in_flight": 0})
+
+    def test_single_flight_propagates_errors(self):
+        async def fail():
+            raise RuntimeError("boom")
+
+        async def run():
+            flight = SingleFlight()
+            return await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+if __name__ == "__main__":
+    unittest.main()
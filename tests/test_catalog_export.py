@@ -0,0 +1,76 @@
+import asyncio
+import json
+import unittest
+from datetime import datetime
+from src.services.catalog_export import format_rows
+from src.services.catalog_import import ImportFormat, iter_rows
+from colorama import Fore, Style  # Импортируем colorama
+
+ROWS = [
+    [
+        (1, "Война и мир", "a.png", ["Роман", "Классика"], ["Толстой"], datetime(1869, 1, 1), False, 500, None, 100, 250),
+        (2, "Название, с запятой", "b.png", ["Проза"], ["Автор"], datetime(2001, 1, 1), True, 0, 0, 0, 0),
+    ],
+    [
+        (3, "Третья", "c.png", ["Проза"], ["Автор"], datetime(2010, 1, 1), False, None, None, None, None),
+    ],
+]
+
+async def _partitions():
+    for rows in ROWS:
+        yield rows
+
+def _export(export_format):
+    async def run():
+        return [chunk async for chunk in format_rows(_partitions(), export_format)]
+    return asyncio.run(run())
+
+class TestCatalogExport(unittest.TestCase):
+    def setUp(self):
+        # Выводим имя текущего теста перед его выполнением
+        print(f"{Fore.CYAN}Running test: {self._testMethodName}{Style.RESET_ALL}")
+
+    def tearDown(self):
+        # Выводим статус теста после его выполнения
+        if hasattr(self, '_outcome'):  # Python 3.4+
+            result = self._outcome.result
+            if result.errors or result.failures:
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+        else:  # Python 3.3 and below
+            if not self._resultForDoCleanups.wasSuccessful():
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+
+    def test_jsonl_chunk_per_partition(self):
+        chunks = _export(ImportFormat.JSONL)
+        self.assertEqual(len(chunks), 2)
+        records = [json.loads(line) for line in "".join(chunks).splitlines()]
+        self.assertEqual([record["id"] for record in records], [1, 2, 3])
+        self.assertEqual(records[0]["category"], ["Роман", "Классика"])
+        self.assertEqual(records[0]["year_of_create"], "1869-01-01T00:00:00")
+        self.assertIsNone(records[0]["price_rent_2week"])
+
+    def test_csv_can_be_imported_back(self):
+        data = "".join(_export(ImportFormat.CSV)).encode("utf-8")
+
+        async def chunks():
+            yield data
+
+        async def run():
+            return [parsed async for parsed in iter_rows(chunks(), ImportFormat.CSV)]
+
+        parsed = asyncio.run(run())
+        self.assertTrue(all(row.error is None for row in parsed))
+        first = parsed[0].row
+        self.assertEqual(first.category, ["Роман", "Классика"])
+        self.assertEqual(first.year_of_create, datetime(1869, 1, 1))
+        self.assertEqual(first.price, 500)
+        self.assertIsNone(first.price_rent_2week)
+        self.assertEqual(parsed[1].row.title, "Название, с запятой")
+        self.assertTrue(parsed[1].row.hidden)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+from datetime import datetime
+from src.services.catalog_import import ImportFormat, detect_format, iter_lines, iter_rows
+from colorama import Fore, Style  # Импортируем colorama
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+def _collect(agen):
+    async def run():
+        return [item async for item in agen]
+    return asyncio.run(run())
+
+class TestCatalogImport(unittest.TestCase):
+    def setUp(self):
+        # Выводим имя текущего теста перед его выполнением
+        print(f"{Fore.CYAN}Running test: {self._testMethodName}{Style.RESET_ALL}")
+
+    def tearDown(self):
+        # Выводим статус теста после его выполнения
+        if hasattr(self, '_outcome'):  # Python 3.4+
+            result = self._outcome.result
+            if result.errors or result.failures:
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+        else:  # Python 3.3 and below
+            if not self._resultForDoCleanups.wasSuccessful():
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+
+    def test_iter_lines_splits_across_chunks(self):
+        data = "\ufeffпервая\r\nвторая\nтретья".encode("utf-8")
+        # Блоки по 3 байта разрезают многобайтовые символы
+        lines = _collect(iter_lines(_chunks(data, 3)))
+        self.assertEqual(lines, ["первая", "вторая", "третья"])
+
+    def test_jsonl_rows_and_errors(self):
+        data = (
+            b'{"title": "A", "url_img": "a.png", "category": ["x"], "author": ["y"], "year_of_create": 1869, "price": 100}\n'
+            b'\n'
+            b'not json\n'
+            b'{"title": "", "url_img": "b.png", "category": [], "author": [], "year_of_create": "2001-01-01"}\n'
+        )
+        rows = _collect(iter_rows(_chunks(data, 7), ImportFormat.JSONL))
+        self.assertEqual([row.line for row in rows], [1, 3, 4])
+        self.assertEqual(rows[0].row.title, "A")
+        self.assertEqual(rows[0].row.year_of_create, datetime(1869, 1, 1))
+        self.assertEqual(rows[0].row.price, 100)
+        self.assertEqual(rows[0].row.price_rent_month, 0)
+        self.assertIsNone(rows[1].row)
+        self.assertIn("title", rows[2].error)
+
+    def test_csv_rows(self):
+        data = (
+            "title,url_img,category,author,year_of_create,price,price_rent_month\n"
+            "\"Война и мир\",a.png,Роман;Классика,Толстой,1869,500,\n"
+            "\"Многострочное\nназвание\",b.png,Проза,Автор,2001,10,5\n"
+            "Лишнее,c.png,Проза\n"
+        ).encode("utf-8")
+        rows = _collect(iter_rows(_chunks(data, 16), ImportFormat.CSV))
+        self.assertEqual([row.line for row in rows], [2, 3, 5])
+        self.assertEqual(rows[0].row.category, ["Роман", "Классика"])
+        self.assertIsNone(rows[0].row.price_rent_month)
+        self.assertEqual(rows[1].row.title, "Многострочное\nназвание")
+        self.assertEqual(rows[1].row.price_rent_month, 5)
+        self.assertIsNotNone(rows[2].error)
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format("text/csv; charset=utf-8"), ImportFormat.CSV)
+        self.assertEqual(detect_format("application/x-ndjson"), ImportFormat.JSONL)
+        self.assertEqual(detect_format(None), ImportFormat.JSONL)
+
+if __name__ == '__main__':
+    unittest.main()
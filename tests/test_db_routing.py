@@ -0,0 +1,206 @@
+import asyncio
+import importlib.util
+import os
+import tempfile
+import unittest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from src.db.routing import RoutingSession, read_only, use_replica
+from colorama import Fore, Style  # Импортируем colorama
+
+metadata = MetaData()
+books = Table("books", metadata, Column("id", Integer, primary_key=True), Column("title", String))
+
+class TestRoutingSession(unittest.TestCase):
+    def setUp(self):
+        # Выводим имя текущего теста перед его выполнением
+        print(f"{Fore.CYAN}Running test: {self._testMethodName}{Style.RESET_ALL}")
+        self.primary = create_engine("sqlite://")
+        self.replica = create_engine("sqlite://")
+        for engine, title in ((self.primary, "primary"), (self.replica, "replica")):
+            metadata.create_all(engine)
+            with engine.begin() as conn:
+                conn.execute(insert(books).values(id=1, title=title))
+
+    def tearDown(self):
+        self.primary.dispose()
+        self.replica.dispose()
+        # Выводим статус теста после его выполнения
+        if hasattr(self, '_outcome'):  # Python 3.4+
+            result = self._outcome.result
+            if result.errors or result.failures:
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+        else:  # Python 3.3 and below
+            if not self._resultForDoCleanups.wasSuccessful():
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+
+    def _title(self, session):
+        return session.execute(select(books.c.title).where(books.c.id == 1)).scalar()
+
+    def test_reads_go_to_primary_by_default(self):
+        with RoutingSession(primary=self.primary, replica=self.replica) as session:
+            self.assertEqual(self._title(session), "primary")
+
+    def test_read_only_scope_uses_replica(self):
+        with RoutingSession(primary=self.primary, replica=self.replica) as session:
+            with use_replica():
+                self.assertEqual(self._title(session), "replica")
+            self.assertEqual(self._title(session), "primary")
+
+    def test_without_replica_everything_goes_to_primary(self):
+        with RoutingSession(primary=self.primary) as session:
+            with use_replica():
+                self.assertEqual(self._title(session), "primary")
+
+    def test_write_pins_session_to_primary(self):
+        with RoutingSession(primary=self.primary, replica=self.replica) as session:
+            session.execute(insert(books).values(id=2, title="new"))
+            with use_replica():
+                # Чтение после записи видит свои изменения
+                count = session.execute(select(books.c.id)).all()
+            self.assertEqual(len(count), 2)
+            session.rollback()
+            session.close()
+            with use_replica():
+                self.assertEqual(self._title(session), "replica")
+
+    def test_read_only_decorator(self):
+        class Repo:
+            def __init__(self, session):
+                self.session = session
+
+            @read_only
+            async def get_title(self):
+                return self.session.execute(select(books.c.title)).scalar()
+
+        with RoutingSession(primary=self.primary, replica=self.replica) as session:
+            repo = Repo(session)
+            self.assertEqual(asyncio.run(repo.get_title()), "replica")
+            self.assertEqual(self._title(session), "primary")
+
+
+@unittest.skipUnless(importlib.util.find_spec("aiosqlite"), "для асинхронных тестов нужен aiosqlite")
+class TestAsyncRoutingSession(unittest.TestCase):
+    """Маршрутизация через AsyncSession(sync_session_class=RoutingSession), как в src.db.session."""
+
+    def setUp(self):
+        # Выводим имя текущего теста перед его выполнением
+        print(f"{Fore.CYAN}Running test: {self._testMethodName}{Style.RESET_ALL}")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        # Выводим статус теста после его выполнения
+        if hasattr(self, '_outcome'):  # Python 3.4+
+            result = self._outcome.result
+            if result.errors or result.failures:
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+        else:  # Python 3.3 and below
+            if not self._resultForDoCleanups.wasSuccessful():
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+
+    def _run(self, scenario):
+        async def run():
+            engines = {}
+            for name in ("primary", "replica"):
+                path = os.path.join(self.tmp_dir.name, f"{name}.db")
+                engine = engines[name] = create_async_engine(f"sqlite+aiosqlite:///{path}")
+                async with engine.begin() as conn:
+                    await conn.run_sync(metadata.create_all)
+                    await conn.execute(insert(books), [{"id": i, "title": f"{name} {i}"} for i in range(1, 4)])
+            session_factory = sessionmaker(
+                class_=AsyncSession,
+                sync_session_class=RoutingSession,
+                primary=engines["primary"].sync_engine,
+                replica=engines["replica"].sync_engine,
+                expire_on_commit=False,
+            )
+            try:
+                return await scenario(session_factory)
+            finally:
+                for engine in engines.values():
+                    await engine.dispose()
+        return asyncio.run(run())
+
+    def test_read_only_coroutine_uses_replica(self):
+        class Repo:
+            def __init__(self, db):
+                self.db = db
+
+            @read_only
+            async def get_title(self):
+                result = await self.db.execute(select(books.c.title).where(books.c.id == 1))
+                return result.scalar()
+
+            async def get_title_for_update(self):
+                result = await self.db.execute(select(books.c.title).where(books.c.id == 1))
+                return result.scalar()
+
+        async def scenario(session_factory):
+            async with session_factory() as db:
+                repo = Repo(db)
+                return await repo.get_title(), await repo.get_title_for_update()
+
+        self.assertEqual(self._run(scenario), ("replica 1", "primary 1"))
+
+    def test_stream_started_in_replica_scope(self):
+        async def scenario(session_factory):
+            async with session_factory() as db:
+                query = select(books.c.title).order_by(books.c.id).execution_options(yield_per=2)
+                with use_replica():
+                    result = await db.stream(query)
+                # Пачки дочитываются уже вне блока use_replica — из того же курсора реплики
+                return [list(partition) async for partition in result.partitions()]
+
+        partitions = self._run(scenario)
+        self.assertEqual([[row.title for row in partition] for partition in partitions],
+                         [["replica 1", "replica 2"], ["replica 3"]])
+
+    def test_scope_does_not_leak_between_tasks(self):
+        async def scenario(session_factory):
+            started = asyncio.Event()
+
+            async def replica_reader():
+                async with session_factory() as db:
+                    with use_replica():
+                        started.set()
+                        await asyncio.sleep(0.01)
+                        return (await db.execute(select(books.c.title).where(books.c.id == 1))).scalar()
+
+            async def primary_reader():
+                await started.wait()
+                async with session_factory() as db:
+                    return (await db.execute(select(books.c.title).where(books.c.id == 1))).scalar()
+
+            return await asyncio.gather(replica_reader(), primary_reader())
+
+        self.assertEqual(self._run(scenario), ["replica 1", "primary 1"])
+
+    def test_write_pins_async_session_to_primary(self):
+        async def scenario(session_factory):
+            async with session_factory() as db:
+                await db.execute(insert(books).values(id=4, title="primary 4"))
+                with use_replica():
+                    titles = (await db.execute(select(books.c.title).order_by(books.c.id))).scalars().all()
+                await db.commit()
+            async with session_factory() as db:
+                with use_replica():
+                    replica_count = len((await db.execute(select(books.c.id))).all())
+            return titles, replica_count
+
+        titles, replica_count = self._run(scenario)
+        self.assertEqual(titles[-1], "primary 4")
+        self.assertEqual(replica_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
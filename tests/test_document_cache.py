@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from src.services.document_cache import DocumentCache
+from colorama import Fore, Style  # Импортируем colorama
+
+class ClosingDocument:
+    def __init__(self, size):
+        self.size = size
+        self.closed = False
+
+    def __len__(self):
+        return self.size
+
+    def close(self):
+        self.closed = True
+
+class TestDocumentCache(unittest.TestCase):
+    def setUp(self):
+        # Выводим имя текущего теста перед его выполнением
+        print(f"{Fore.CYAN}Running test: {self._testMethodName}{Style.RESET_ALL}")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.loads = []
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        # Выводим статус теста после его выполнения
+        if hasattr(self, '_outcome'):  # Python 3.4+
+            result = self._outcome.result
+            if result.errors or result.failures:
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+        else:  # Python 3.3 and below
+            if not self._resultForDoCleanups.wasSuccessful():
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+
+    def _make_file(self, name, size):
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, "wb") as f:
+            f.write(b"x" * size)
+        return path
+
+    def _loader(self, path):
+        self.loads.append(path)
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _closing_loader(self, path):
+        document = ClosingDocument(os.path.getsize(path))
+        self.loads.append(document)
+        return document
+
+    def test_document_parsed_once(self):
+        cache = DocumentCache(max_bytes=1000)
+        path = self._make_file("a.pdf", 10)
+        for _ in range(3):
+            with cache.open(path, self._loader) as document:
+                self.assertEqual(len(document), 10)
+        self.assertEqual(self.loads, [path])
+        self.assertEqual(cache.stats()["hits"], 2)
+
+    def test_eviction_by_size(self):
+        cache = DocumentCache(max_bytes=150)
+        first = self._make_file("a.pdf", 100)
+        second = self._make_file("b.pdf", 100)
+        with cache.open(first, self._loader):
+            pass
+        with cache.open(second, self._loader):
+            pass
+        stats = cache.stats()
+        self.assertEqual(stats["documents"], 1)
+        self.assertEqual(stats["bytes"], 100)
+        self.assertEqual(stats["evictions"], 1)
+
+    def test_changed_file_is_reloaded(self):
+        cache = DocumentCache(max_bytes=1000)
+        path = self._make_file("a.pdf", 10)
+        with cache.open(path, self._loader):
+            pass
+        self._make_file("a.pdf", 20)
+        with cache.open(path, self._loader) as document:
+            self.assertEqual(len(document), 20)
+        self.assertEqual(len(self.loads), 2)
+        self.assertEqual(cache.stats()["documents"], 1)
+
+    def test_evicted_document_is_closed(self):
+        cache = DocumentCache(max_bytes=150)
+        first = self._make_file("a.epub", 100)
+        second = self._make_file("b.epub", 100)
+        with cache.open(first, self._closing_loader):
+            pass
+        with cache.open(second, self._closing_loader):
+            pass
+        self.assertTrue(self.loads[0].closed)
+        self.assertFalse(self.loads[1].closed)
+        cache.clear()
+        self.assertTrue(self.loads[1].closed)
+
+    def test_document_in_use_is_closed_after_use(self):
+        cache = DocumentCache(max_bytes=150)
+        first = self._make_file("a.epub", 100)
+        second = self._make_file("b.epub", 100)
+        with cache.open(first, self._closing_loader) as document:
+            # Пока книга открыта, ее вытесняет другая книга
+            with cache.open(second, self._closing_loader):
+                pass
+            self.assertFalse(document.closed)
+        self.assertTrue(document.closed)
+
+    def test_replaced_version_is_closed(self):
+        cache = DocumentCache(max_bytes=1000)
+        path = self._make_file("a.epub", 10)
+        with cache.open(path, self._closing_loader):
+            pass
+        self._make_file("a.epub", 20)
+        with cache.open(path, self._closing_loader):
+            pass
+        self.assertTrue(self.loads[0].closed)
+        self.assertFalse(self.loads[1].closed)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+import zipfile
+from src.services import document_reader, epub_reader
+from src.services.document_cache import document_cache
+from colorama import Fore, Style  # Импортируем colorama
+
+CONTAINER = """<?xml version="1.0"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/></rootfiles>
+</container>"""
+
+# В manifest главы идут в обратном порядке, порядок чтения задает spine
+OPF = """<?xml version="1.0"?>
+<package xmlns="http://www.idpf.org/2007/opf" version="3.0">
+  <manifest>
+    <item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>
+    <item id="ch2" href="text/chapter%202.xhtml" media-type="application/xhtml+xml"/>
+    <item id="ch1" href="text/chapter1.xhtml" media-type="application/xhtml+xml"/>
+    <item id="img" href="images/cover.png" media-type="image/png"/>
+  </manifest>
+  <spine><itemref idref="ch1"/><itemref idref="ch2"/></spine>
+</package>"""
+
+CHAPTER = """<?xml version="1.0" encoding="utf-8"?>
+<html xmlns="http://www.w3.org/1999/xhtml"><head><title>{title}</title></head>
+<body><h1>{title}</h1><p>Текст</p></body></html>"""
+
+class TestEpubReader(unittest.TestCase):
+    def setUp(self):
+        # Выводим имя текущего теста перед его выполнением
+        print(f"{Fore.CYAN}Running test: {self._testMethodName}{Style.RESET_ALL}")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "book.epub")
+        with zipfile.ZipFile(self.path, "w") as archive:
+            archive.writestr("mimetype", "application/epub+zip")
+            archive.writestr("META-INF/container.xml", CONTAINER)
+            archive.writestr("OEBPS/content.opf", OPF)
+            archive.writestr("OEBPS/nav.xhtml", CHAPTER.format(title="Оглавление"))
+            archive.writestr("OEBPS/text/chapter1.xhtml", CHAPTER.format(title="Глава 1"), zipfile.ZIP_DEFLATED)
+            archive.writestr("OEBPS/text/chapter 2.xhtml", CHAPTER.format(title="Глава 2"), zipfile.ZIP_DEFLATED)
+            archive.writestr("OEBPS/images/cover.png", b"\x89PNG" + b"\x00" * 1024)
+
+    def tearDown(self):
+        document_cache.clear()
+        self.tmp_dir.cleanup()
+        # Выводим статус теста после его выполнения
+        if hasattr(self, '_outcome'):  # Python 3.4+
+            result = self._outcome.result
+            if result.errors or result.failures:
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+        else:  # Python 3.3 and below
+            if not self._resultForDoCleanups.wasSuccessful():
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+
+    def test_spine_order(self):
+        index = epub_reader.open_index(self.path)
+        with index.archive:
+            names = [info.filename for info in index.spine]
+        self.assertEqual(names, ["OEBPS/text/chapter1.xhtml", "OEBPS/text/chapter 2.xhtml"])
+
+    def test_read_page_returns_body(self):
+        self.assertEqual(document_reader.read_epub_page(self.path, 1), "<h1>Глава 2</h1><p>Текст</p>")
+        with self.assertRaises(document_reader.PageOutOfRangeError):
+            document_reader.read_epub_page(self.path, 2)
+
+    def test_extract_pages(self):
+        pages = document_reader.extract_pages(self.path)
+        self.assertEqual(len(pages), 2)
+        self.assertIn("Глава 1", pages[0])
+
+    def test_invalid_epub(self):
+        with zipfile.ZipFile(self.path, "w") as archive:
+            archive.writestr("mimetype", "application/epub+zip")
+        with self.assertRaises(epub_reader.EpubFormatError):
+            epub_reader.open_index(self.path)
+
+if __name__ == "__main__":
+    unittest.main()
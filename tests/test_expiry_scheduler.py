@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+from src.services.expiry_scheduler import ExpiryScheduler
+from src.services.notification_sinks import FileNotificationSink, NotificationSink
+from colorama import Fore, Style  # Импортируем colorama
+
+class FakeSession:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+class FakeUserRepository:
+    def __init__(self, rentals):
+        self.pending = list(rentals)
+        self.rentals = list(rentals)
+
+    async def claim_expiring_rentals(self, now, until, limit):
+        batch, self.pending = self.pending[:limit], self.pending[limit:]
+        return batch
+
+    async def get_expiring_rentals(self, now, until):
+        return self.rentals
+
+class FakeIdempotencyRepository:
+    def __init__(self, expired):
+        self.expired = expired
+        self.cutoffs = []
+
+    async def delete_keys_created_before(self, created_before, limit):
+        self.cutoffs.append(created_before)
+        deleted = min(self.expired, limit)
+        self.expired -= deleted
+        return deleted
+
+class CollectingSink(NotificationSink):
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    async def send(self, notifications):
+        if self.fail:
+            raise RuntimeError("sink unavailable")
+        self.batches.append(notifications)
+
+class TestExpiryScheduler(unittest.TestCase):
+    def setUp(self):
+        # Выводим имя текущего теста перед его выполнением
+        print(f"{Fore.CYAN}Running test: {self._testMethodName}{Style.RESET_ALL}")
+        expires_at = datetime.now() + timedelta(days=1)
+        self.rentals = [
+            SimpleNamespace(id=i, user_id=i % 2, book_id=10 + i, status="rent_month", expires_at=expires_at + timedelta(hours=i))
+            for i in range(5)
+        ]
+        self.session = FakeSession()
+
+    def tearDown(self):
+        # Выводим статус теста после его выполнения
+        if hasattr(self, '_outcome'):  # Python 3.4+
+            result = self._outcome.result
+            if result.errors or result.failures:
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+        else:  # Python 3.3 and below
+            if not self._resultForDoCleanups.wasSuccessful():
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+
+    def _run(self, sink):
+        scheduler = ExpiryScheduler(lambda: self.session, sink, interval=60, window=3 * 24 * 3600, batch_size=2)
+        repo = FakeUserRepository(self.rentals)
+        with mock.patch("src.services.expiry_scheduler.UserRepository", return_value=repo):
+            sent = asyncio.run(scheduler.run_once())
+        return scheduler, sent
+
+    def test_notifications_sent_in_batches(self):
+        sink = CollectingSink()
+        scheduler, sent = self._run(sink)
+        self.assertEqual(sent, 5)
+        self.assertEqual([len(batch) for batch in sink.batches], [2, 2, 1])
+        self.assertEqual(self.session.commits, 3)
+
+        expiring = scheduler.get_expiring_rentals(0)
+        self.assertEqual([rental.book_id for rental in expiring], [10, 12, 14])
+
+    def test_failed_batch_is_rolled_back(self):
+        scheduler, sent = self._run(CollectingSink(fail=True))
+        self.assertEqual(sent, 0)
+        self.assertEqual(self.session.rollbacks, 1)
+        self.assertEqual(self.session.commits, 0)
+
+    def test_expired_idempotency_keys_purged_in_batches(self):
+        scheduler = ExpiryScheduler(
+            lambda: self.session, CollectingSink(), interval=60, window=3 * 24 * 3600, batch_size=2,
+            idempotency_key_ttl=3600
+        )
+        keys = FakeIdempotencyRepository(expired=5)
+        with mock.patch("src.services.expiry_scheduler.UserRepository", return_value=FakeUserRepository([])), \
+                mock.patch("src.services.expiry_scheduler.IdempotencyRepository", return_value=keys):
+            asyncio.run(scheduler.run_once())
+        self.assertEqual(scheduler.purged_keys_total, 5)
+        self.assertEqual(keys.expired, 0)
+        # Пачки 2 + 2 + 1, каждая фиксируется отдельно
+        self.assertEqual(len(keys.cutoffs), 3)
+        self.assertEqual(self.session.commits, 3)
+        self.assertEqual(scheduler.last_run_at - keys.cutoffs[0], timedelta(hours=1))
+
+    def test_file_sink(self):
+        sink = CollectingSink()
+        self._run(sink)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "notifications.jsonl")
+            asyncio.run(FileNotificationSink(path).send(sink.batches[0]))
+            with open(path, encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual([line["transaction_id"] for line in lines], [0, 1])
+
+    def test_sink_without_send_cannot_be_created(self):
+        class IncompleteSink(NotificationSink):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteSink()
+
+if __name__ == "__main__":
+    unittest.main()
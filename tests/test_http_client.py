@@ -0,0 +1,125 @@
+import asyncio
+import unittest
+from unittest import mock
+import httpx
+from src.core import http_client
+from src.core.config import settings
+from src.core.http_client import get_with_retry
+from colorama import Fore, Style  # Импортируем colorama
+
+URL = "http://service.test/resource"
+
+
+class ScriptedServer:
+    """Отвечает по очереди заданными ответами; исключение в списке выбрасывается как ошибка транспорта."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return httpx.Response(response)
+
+
+class TestGetWithRetry(unittest.TestCase):
+    def setUp(self):
+        # Выводим имя текущего теста перед его выполнением
+        print(f"{Fore.CYAN}Running test: {self._testMethodName}{Style.RESET_ALL}")
+        self.patches = [
+            mock.patch.object(settings, "HTTP_RETRIES", 2),
+            mock.patch.object(settings, "HTTP_RETRY_BACKOFF", 0.01),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        # Выводим статус теста после его выполнения
+        if hasattr(self, '_outcome'):  # Python 3.4+
+            result = self._outcome.result
+            if result.errors or result.failures:
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+        else:  # Python 3.3 and below
+            if not self._resultForDoCleanups.wasSuccessful():
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+
+    def _get(self, server):
+        sleeps = []
+
+        async def fake_sleep(delay):
+            sleeps.append(delay)
+
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(server))
+            with mock.patch.object(http_client, "_client", client), \
+                    mock.patch.object(http_client.asyncio, "sleep", fake_sleep):
+                try:
+                    return await get_with_retry(URL)
+                finally:
+                    await client.aclose()
+        return asyncio.run(run()), sleeps
+
+    def test_retries_gateway_errors(self):
+        for status_code in (502, 503, 504):
+            server = ScriptedServer(status_code, 200)
+            response, sleeps = self._get(server)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(server.calls, 2)
+            self.assertEqual(sleeps, [0.01])
+
+    def test_retries_timeouts_and_network_errors(self):
+        server = ScriptedServer(httpx.ReadTimeout("timeout"), httpx.ReadError("reset"), 200)
+        response, sleeps = self._get(server)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(server.calls, 3)
+        # Задержка растет экспоненциально
+        self.assertEqual(sleeps, [0.01, 0.02])
+
+    def test_gives_up_after_max_attempts(self):
+        server = ScriptedServer(503, 503, 503, 200)
+        response, sleeps = self._get(server)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(server.calls, 3)
+        self.assertEqual(len(sleeps), 2)
+
+    def test_last_timeout_is_raised(self):
+        server = ScriptedServer(*[httpx.ReadTimeout("timeout")] * 3)
+        with self.assertRaises(httpx.ReadTimeout):
+            self._get(server)
+        self.assertEqual(server.calls, 3)
+
+    def test_connect_errors_are_left_to_transport(self):
+        for error in (httpx.ConnectError("refused"), httpx.ConnectTimeout("timeout")):
+            server = ScriptedServer(error, 200)
+            with self.assertRaises(type(error)):
+                self._get(server)
+            self.assertEqual(server.calls, 1)
+
+    def test_transport_retries_connects(self):
+        async def run():
+            client = http_client.create_http_client()
+            try:
+                return client._transport._pool._retries
+            finally:
+                await client.aclose()
+        self.assertEqual(asyncio.run(run()), settings.HTTP_RETRIES)
+
+    def test_client_errors_and_500_are_not_retried(self):
+        for status_code in (400, 401, 404, 500):
+            server = ScriptedServer(status_code, 200)
+            response, sleeps = self._get(server)
+            self.assertEqual(response.status_code, status_code)
+            self.assertEqual(server.calls, 1)
+            self.assertEqual(sleeps, [])
+
+if __name__ == '__main__':
+    unittest.main()
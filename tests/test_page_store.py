@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src.core.config import settings
+from src.services import page_store
+from colorama import Fore, Style  # Импортируем colorama
+
+class TestPageStore(unittest.TestCase):
+    def setUp(self):
+        # Выводим имя текущего теста перед его выполнением
+        print(f"{Fore.CYAN}Running test: {self._testMethodName}{Style.RESET_ALL}")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.patcher = mock.patch.object(settings, "PAGE_STORE_DIR", self.tmp_dir.name)
+        self.patcher.start()
+
+    def tearDown(self):
+        page_store._open_books.clear()
+        self.patcher.stop()
+        self.tmp_dir.cleanup()
+        # Выводим статус теста после его выполнения
+        if hasattr(self, '_outcome'):  # Python 3.4+
+            result = self._outcome.result
+            if result.errors or result.failures:
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+        else:  # Python 3.3 and below
+            if not self._resultForDoCleanups.wasSuccessful():
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+
+    def test_write_and_read_pages(self):
+        pages = ["Первая страница", "", "Third page"]
+        self.assertEqual(page_store.write_pages("1", pages), 3)
+        self.assertTrue(page_store.has_pages("1"))
+        for number, text in enumerate(pages):
+            self.assertEqual(page_store.read_page("1", number), text)
+
+    def test_page_out_of_range(self):
+        page_store.write_pages("1", ["a"])
+        with self.assertRaises(IndexError):
+            page_store.read_page("1", 1)
+        with self.assertRaises(IndexError):
+            page_store.read_page("1", -1)
+
+    def test_missing_book(self):
+        self.assertFalse(page_store.has_pages("404"))
+        with self.assertRaises(FileNotFoundError):
+            page_store.read_page("404", 0)
+
+    def test_rewrite_replaces_data_file(self):
+        page_store.write_pages("1", ["old"])
+        page_store.write_pages("1", ["new", "pages"])
+        self.assertEqual(page_store.read_page("1", 0), "new")
+        self.assertEqual(len(os.listdir(self.tmp_dir.name)), 2)
+        page_store.delete_pages("1")
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+    def test_open_book_is_reused_until_rewritten(self):
+        page_store.write_pages("1", ["old", "pages"])
+        with mock.patch.object(page_store.mmap, "mmap", wraps=page_store.mmap.mmap) as mapped:
+            self.assertEqual(page_store.read_page("1", 0), "old")
+            self.assertEqual(page_store.read_page("1", 1), "pages")
+            # Индекс и файл данных отображаются один раз на книгу
+            self.assertEqual(mapped.call_count, 2)
+            page_store.write_pages("1", ["new"])
+            self.assertEqual(page_store.read_page("1", 0), "new")
+            self.assertEqual(mapped.call_count, 4)
+        with self.assertRaises(IndexError):
+            page_store.read_page("1", 1)
+
+    def test_deleted_book_is_not_served_from_open_books(self):
+        page_store.write_pages("1", ["text"])
+        self.assertEqual(page_store.read_page("1", 0), "text")
+        page_store.delete_pages("1")
+        with self.assertRaises(FileNotFoundError):
+            page_store.read_page("1", 0)
+
+    def test_book_with_empty_pages(self):
+        page_store.write_pages("1", ["", ""])
+        self.assertEqual(page_store.read_page("1", 1), "")
+
+    def test_open_books_are_bounded(self):
+        with mock.patch.object(settings, "PAGE_STORE_OPEN_BOOKS", 2):
+            for key in ("1", "2", "3"):
+                page_store.write_pages(key, [f"book {key}"])
+                self.assertEqual(page_store.read_page(key, 0), f"book {key}")
+            self.assertEqual(len(page_store._open_books), 2)
+            self.assertEqual(page_store.read_page("1", 0), "book 1")
+
+if __name__ == "__main__":
+    unittest.main()
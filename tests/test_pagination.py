@@ -0,0 +1,35 @@
+import unittest
+from src.utils.pagination import encode_cursor, decode_cursor
+from colorama import Fore, Style  # Импортируем colorama
+
+class TestPagination(unittest.TestCase):
+    def setUp(self):
+        # Выводим имя текущего теста перед его выполнением
+        print(f"{Fore.CYAN}Running test: {self._testMethodName}{Style.RESET_ALL}")
+
+    def tearDown(self):
+        # Выводим статус теста после его выполнения
+        if hasattr(self, '_outcome'):  # Python 3.4+
+            result = self._outcome.result
+            if result.errors or result.failures:
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+        else:  # Python 3.3 and below
+            if not self._resultForDoCleanups.wasSuccessful():
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor(12345)
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor), 12345)
+
+    def test_invalid_cursor(self):
+        for cursor in ["", "not-a-cursor", encode_cursor(1)[:-2], "eyJ4IjoxfQ", "eyJpZCI6ImEifQ"]:
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+if __name__ == "__main__":
+    unittest.main()
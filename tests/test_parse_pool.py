@@ -0,0 +1,94 @@
+import asyncio
+import os
+import time
+import unittest
+from unittest import mock
+from src.core.config import settings
+from src.services import parse_pool
+from src.services.parse_pool import run_in_parse_pool, start_parse_pool, stop_parse_pool, ParsePoolBusyError, ParseTimeoutError
+from colorama import Fore, Style  # Импортируем colorama
+
+
+def _worker_state(_):
+    # Выполняется в воркере: его PID и бюджет кэша документов
+    from src.services.document_cache import document_cache
+    return os.getpid(), document_cache.max_bytes
+
+
+class TestParsePool(unittest.TestCase):
+    def setUp(self):
+        # Выводим имя текущего теста перед его выполнением
+        print(f"{Fore.CYAN}Running test: {self._testMethodName}{Style.RESET_ALL}")
+
+    def tearDown(self):
+        # Выводим статус теста после его выполнения
+        if hasattr(self, '_outcome'):  # Python 3.4+
+            result = self._outcome.result
+            if result.errors or result.failures:
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+        else:  # Python 3.3 and below
+            if not self._resultForDoCleanups.wasSuccessful():
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+
+    def test_runs_job_and_propagates_errors(self):
+        async def run():
+            await start_parse_pool()
+            try:
+                result = await run_in_parse_pool(pow, 2, 10)
+                with self.assertRaises(ValueError):
+                    await run_in_parse_pool(int, "not a number")
+                return result
+            finally:
+                await stop_parse_pool()
+
+        with mock.patch.object(settings, "PARSE_POOL_WORKERS", 1):
+            self.assertEqual(asyncio.run(run()), 1024)
+
+    def test_busy_and_timeout(self):
+        async def run():
+            await start_parse_pool(warm=False)
+            try:
+                slow = asyncio.ensure_future(run_in_parse_pool(time.sleep, 2, timeout=0.5))
+                await asyncio.sleep(0)
+                # Единственное место в очереди занято — новая задача отклоняется сразу
+                with self.assertRaises(ParsePoolBusyError):
+                    await run_in_parse_pool(pow, 2, 2)
+                with self.assertRaises(ParseTimeoutError):
+                    await slow
+                self.assertEqual(parse_pool.get_parse_pool_stats()["available_slots"], 1)
+                self.assertTrue(parse_pool.has_free_slots())
+            finally:
+                await stop_parse_pool()
+
+        with mock.patch.object(settings, "PARSE_POOL_WORKERS", 1), \
+                mock.patch.object(settings, "PARSE_POOL_MAX_PENDING", 1):
+            asyncio.run(run())
+    def test_book_jobs_stay_on_one_worker_with_split_cache(self):
+        async def run():
+            await start_parse_pool(warm=False)
+            try:
+                by_book = {}
+                for path in ("a.pdf", "b.epub", "c.pdf", "a.pdf", "b.epub", "c.pdf"):
+                    by_book.setdefault(path, set()).add(await run_in_parse_pool(_worker_state, path, key=path))
+                unkeyed = set(await asyncio.gather(*[run_in_parse_pool(_worker_state, None) for _ in range(4)]))
+                return by_book, unkeyed, parse_pool.get_parse_pool_stats()
+            finally:
+                await stop_parse_pool()
+
+        with mock.patch.object(settings, "PARSE_POOL_WORKERS", 2), \
+                mock.patch.object(settings, "DOCUMENT_CACHE_MAX_BYTES", 1000):
+            by_book, unkeyed, stats = asyncio.run(run())
+        for path, states in by_book.items():
+            self.assertEqual(len(states), 1, path)
+            self.assertEqual(next(iter(states))[1], 500)
+        # Задачи без ключа распределяются по наименее загруженным воркерам
+        self.assertEqual(len({pid for pid, _ in unkeyed}), 2)
+        self.assertEqual(stats["pending"], 0)
+        self.assertEqual(stats["worker_cache_max_bytes"], 500)
+
+if __name__ == "__main__":
+    unittest.main()
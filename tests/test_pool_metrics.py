@@ -0,0 +1,66 @@
+import sqlite3
+import unittest
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+from src.db.pool_metrics import InstrumentedPoolMixin, PoolMetrics
+from colorama import Fore, Style  # Импортируем colorama
+
+class _InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+class TestPoolMetrics(unittest.TestCase):
+    def setUp(self):
+        # Выводим имя текущего теста перед его выполнением
+        print(f"{Fore.CYAN}Running test: {self._testMethodName}{Style.RESET_ALL}")
+
+    def tearDown(self):
+        # Выводим статус теста после его выполнения
+        if hasattr(self, '_outcome'):  # Python 3.4+
+            result = self._outcome.result
+            if result.errors or result.failures:
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+        else:  # Python 3.3 and below
+            if not self._resultForDoCleanups.wasSuccessful():
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+
+    def test_checkouts_overflow_and_timeout(self):
+        pool = _InstrumentedQueuePool(lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=1, timeout=0.05)
+        first = pool.connect()
+        second = pool.connect()
+        metrics = pool.get_metrics()
+        self.assertEqual(metrics["checked_out"], 2)
+        self.assertEqual(metrics["overflow"], 1)
+        self.assertEqual(metrics["checkouts"], 2)
+        self.assertEqual(metrics["waits"], 0)
+
+        # Пул и переполнение исчерпаны — третий запрос ждет и получает таймаут
+        with self.assertRaises(exc.TimeoutError):
+            pool.connect()
+        metrics = pool.get_metrics()
+        self.assertEqual(metrics["timeouts"], 1)
+        self.assertEqual(metrics["waits"], 1)
+        self.assertGreaterEqual(metrics["max_wait_ms"], 40)
+
+        first.close()
+        second.close()
+        metrics = pool.get_metrics()
+        self.assertEqual(metrics["checked_out"], 0)
+        self.assertEqual(metrics["checked_in"], 1)
+        pool.dispose()
+
+    def test_snapshot_averages(self):
+        metrics = PoolMetrics()
+        metrics.record_checkout(0.002, waited=False)
+        metrics.record_checkout(0.004, waited=True)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["checkouts"], 2)
+        self.assertEqual(snapshot["waits"], 1)
+        self.assertAlmostEqual(snapshot["avg_checkout_ms"], 3.0)
+        self.assertAlmostEqual(snapshot["avg_wait_ms"], 4.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from starlette.requests import Request
+from src.api.responses import RangeFileResponse, RangeNotSatisfiableError, parse_range, ZERO_COPY_EXTENSION
+from colorama import Fore, Style  # Импортируем colorama
+
+class TestRangeFileResponse(unittest.TestCase):
+    def setUp(self):
+        # Выводим имя текущего теста перед его выполнением
+        print(f"{Fore.CYAN}Running test: {self._testMethodName}{Style.RESET_ALL}")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "book.pdf")
+        self.data = bytes(range(256)) * 4
+        with open(self.path, "wb") as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        # Выводим статус теста после его выполнения
+        if hasattr(self, '_outcome'):  # Python 3.4+
+            result = self._outcome.result
+            if result.errors or result.failures:
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+        else:  # Python 3.3 and below
+            if not self._resultForDoCleanups.wasSuccessful():
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+
+    def _send(self, headers=None, extensions=None):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+            "extensions": extensions or {},
+        }
+        response = RangeFileResponse(self.path, Request(scope), os.stat(self.path), etag='"abc"')
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(response(scope, None, send))
+        start = messages[0]
+        response_headers = {k.decode(): v.decode() for k, v in start["headers"]}
+        return start["status"], response_headers, messages[1:]
+
+    def _body(self, messages):
+        return b"".join(message.get("body", b"") for message in messages)
+
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range("bytes=900-", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=990-2000", 1000), (990, 999))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 1000))
+        self.assertIsNone(parse_range("items=0-1", 1000))
+        with self.assertRaises(RangeNotSatisfiableError):
+            parse_range("bytes=1000-", 1000)
+
+    def test_full_and_partial_content(self):
+        status, headers, messages = self._send()
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["accept-ranges"], "bytes")
+        self.assertEqual(self._body(messages), self.data)
+
+        status, headers, messages = self._send({"Range": "bytes=10-19"})
+        self.assertEqual(status, 206)
+        self.assertEqual(headers["content-range"], f"bytes 10-19/{len(self.data)}")
+        self.assertEqual(self._body(messages), self.data[10:20])
+
+        status, headers, _ = self._send({"Range": "bytes=5000-"})
+        self.assertEqual(status, 416)
+        self.assertEqual(headers["content-range"], f"bytes */{len(self.data)}")
+
+    def test_conditional_requests(self):
+        status, headers, messages = self._send({"If-None-Match": '"abc"'})
+        self.assertEqual(status, 304)
+        self.assertEqual(self._body(messages), b"")
+
+        # Файл изменился (другой ETag) — If-Range отдает файл целиком
+        status, _, messages = self._send({"Range": "bytes=0-9", "If-Range": '"old"'})
+        self.assertEqual(status, 200)
+        self.assertEqual(self._body(messages), self.data)
+
+    def test_zero_copy_send(self):
+        status, _, messages = self._send({"Range": "bytes=100-"}, extensions={ZERO_COPY_EXTENSION: {}})
+        self.assertEqual(status, 206)
+        self.assertEqual(messages[0]["type"], ZERO_COPY_EXTENSION)
+        self.assertEqual((messages[0]["offset"], messages[0]["count"]), (100, len(self.data) - 100))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+from fastapi import UploadFile
+from src.core.config import settings
+from src.services import storage_service
+from colorama import Fore, Style  # Импортируем colorama
+
+class TestStorageService(unittest.TestCase):
+    def setUp(self):
+        # Выводим имя текущего теста перед его выполнением
+        print(f"{Fore.CYAN}Running test: {self._testMethodName}{Style.RESET_ALL}")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        # Выводим статус теста после его выполнения
+        if hasattr(self, '_outcome'):  # Python 3.4+
+            result = self._outcome.result
+            if result.errors or result.failures:
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+        else:  # Python 3.3 and below
+            if not self._resultForDoCleanups.wasSuccessful():
+                print(f"{Fore.RED}Test {self._testMethodName} FAILED{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.GREEN}Test {self._testMethodName} PASSED{Style.RESET_ALL}")
+
+    def _save(self, data):
+        upload = UploadFile(file=io.BytesIO(data), filename="book.pdf")
+        return asyncio.run(storage_service.save_upload(upload, self.tmp_dir.name, suffix=".pdf"))
+
+    def test_save_and_place(self):
+        data = os.urandom(10000)
+        with mock.patch.object(settings, "UPLOAD_CHUNK_SIZE", 1024):
+            stored = self._save(data)
+        self.assertEqual(stored.size, len(data))
+        self.assertEqual(stored.sha256, hashlib.sha256(data).hexdigest())
+        self.assertTrue(stored.path.endswith(".pdf"))
+
+        final_path = os.path.join(self.tmp_dir.name, "1_book.pdf")
+        storage_service.place_file(stored.path, final_path)
+        self.assertFalse(os.path.exists(stored.path))
+        with open(final_path, "rb") as f:
+            self.assertEqual(f.read(), data)
+
+    def test_too_large_upload_is_removed(self):
+        with mock.patch.object(settings, "UPLOAD_CHUNK_SIZE", 1024), \
+                mock.patch.object(settings, "MAX_UPLOAD_BYTES", 4096):
+            with self.assertRaises(storage_service.UploadTooLargeError):
+                self._save(b"x" * 5000)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def _blob_settings(self):
+        return mock.patch.object(settings, "BLOB_STORE_DIR", os.path.join(self.tmp_dir.name, "blobs"))
+
+    def _tmp_file(self, data):
+        path = os.path.join(self.tmp_dir.name, ".upload-test.pdf")
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_blob_layout_and_deduplication(self):
+        content_hash = hashlib.sha256(b"book").hexdigest()
+        with self._blob_settings():
+            first = storage_service.store_blob(self._tmp_file(b"book"), content_hash, ".pdf")
+            self.assertEqual(
+                first,
+                os.path.join(self.tmp_dir.name, "blobs", content_hash[:2], content_hash[2:4], content_hash + ".pdf")
+            )
+            second_tmp = self._tmp_file(b"book")
+            self.assertEqual(storage_service.store_blob(second_tmp, content_hash, ".pdf"), first)
+            self.assertFalse(os.path.exists(second_tmp))
+            self.assertTrue(storage_service.blob_exists(content_hash, ".pdf"))
+
+    def test_garbage_collection(self):
+        kept_hash = hashlib.sha256(b"kept").hexdigest()
+        orphan_hash = hashlib.sha256(b"orphan").hexdigest()
+        with self._blob_settings():
+            kept = storage_service.store_blob(self._tmp_file(b"kept"), kept_hash, ".pdf")
+            orphan = storage_service.store_blob(self._tmp_file(b"orphan"), orphan_hash, ".pdf")
+
+            # Свежие файлы защищены периодом ожидания
+            result = storage_service.collect_garbage({kept_hash}, grace_seconds=3600)
+            self.assertEqual(result["removed_files"], 0)
+
+            result = storage_service.collect_garbage({kept_hash}, grace_seconds=-1)
+            self.assertEqual(result["removed_hashes"], [orphan_hash])
+            self.assertEqual(result["freed_bytes"], len(b"orphan"))
+            self.assertTrue(os.path.exists(kept))
+            self.assertFalse(os.path.exists(orphan))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
-from datetime import datetime
-from src.db.models.transaction_models import UserTransaction, TransactionStatus
+from datetime import datetime, timedelta
+from src.db.models.transaction_models import UserTransaction, TransactionStatus, calculate_expires_at
 from colorama import Fore, Style  # Импортируем colorama
 
 class TestTransactionModels(unittest.TestCase):
@@ -33,5 +33,12 @@ class TestTransactionModels(unittest.TestCase):
         self.assertEqual(transaction.user_id, "1")
         self.assertEqual(transaction.book_id, "1")
 
+    def test_calculate_expires_at(self):
+        date_buy = datetime(2023, 10, 1)
+        self.assertIsNone(calculate_expires_at(TransactionStatus.BUY, date_buy))
+        self.assertEqual(calculate_expires_at(TransactionStatus.RENT_2WEEK, date_buy), date_buy + timedelta(weeks=2))
+        self.assertEqual(calculate_expires_at(TransactionStatus.RENT_MONTH, date_buy), date_buy + timedelta(days=30))
+        self.assertEqual(calculate_expires_at(TransactionStatus.RENT_3MONTH, date_buy), date_buy + timedelta(days=90))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file